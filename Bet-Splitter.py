@@ -1,8 +1,69 @@
 import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog, filedialog
+from tkinter import ttk
 from datetime import datetime
 import json
+import math
 import os
+import sys
+
+from lazy_imports import lazy_module
+
+# Only needed once a dialog opens or a file is parsed, so imported on first use
+messagebox = lazy_module('tkinter.messagebox')
+simpledialog = lazy_module('tkinter.simpledialog')
+filedialog = lazy_module('tkinter.filedialog')
+
+from session_journal import JOURNAL_SUFFIX, SessionJournal, journal_path, read_session, write_snapshot
+from session_model import SessionTotals, bettor_key, index_bet, index_bets, new_bet_id, remove_bets, validate_bettors
+from background import LARGE_FILE_BYTES, Progress, ProgressDialog, submit, when_done
+from columnar import COLUMNAR_SUFFIX
+from results_editor import VirtualResultsList
+from money import add_amounts, format_cents, from_cents, parse_cents, to_cents
+from instrumentation import count_widgets, enable_from_env, profiler, timed
+from session_stream import StreamedSession
+from settlement import STATUS_CODES, STATUS_NAMES, settle
+from tree_rows import KeyedTreeRows
+from bet_view import BetFilter, BetsView
+
+# Set BET_SPLITTER_DEBUG=1 to cross-check running totals after every change
+DEBUG_CHECKS = bool(os.environ.get('BET_SPLITTER_DEBUG'))
+
+# Journal records after which the snapshot is rewritten and the journal emptied
+JOURNAL_COMPACT_EVERY = 1000
+
+# Bets are added to the bets table a page at a time as the user scrolls
+BETS_PAGE_SIZE = 500
+
+# JSON sessions at least this big are streamed in instead of parsed up front
+LAZY_LOAD_BYTES = 8 * 1024 * 1024
+
+# Set to make the GUI quit as soon as the main menu has been drawn
+EXIT_AFTER_PAINT_ENV = 'BET_SPLITTER_EXIT_AFTER_PAINT'
+
+# How often queued odds feed updates are applied, as one batch
+ODDS_APPLY_MS = 250
+
+# How often changes pushed by a shared session server are applied
+SHARED_APPLY_MS = 50
+
+# Pause in typing after which the bets filter is applied
+FILTER_DELAY_MS = 150
+
+def app_dir():
+    """Directory next to the script, or next to the EXE when frozen"""
+    if getattr(sys, 'frozen', False):
+        return os.path.dirname(sys.executable)
+    return os.path.dirname(os.path.abspath(__file__))
+
+def index_path():
+    """SQLite index of saved sessions, kept next to the app"""
+    from session_index import INDEX_FILENAME
+    return os.path.join(app_dir(), INDEX_FILENAME)
+
+def ledger_path():
+    """Cross-session bettor ledger database, kept next to the app"""
+    from ledger import LEDGER_FILENAME
+    return os.path.join(app_dir(), LEDGER_FILENAME)
 
 class BetSplitterApp:
     def __init__(self, root):
@@ -11,7 +72,47 @@ class BetSplitterApp:
         self.root.geometry("800x600")
         self.root.configure(bg='#f0f0f0')
         
-        # Set custom icon for the application
+        # The icon is a large .ico; load it once the main menu has been drawn
+        self.custom_icon_path = None
+        self.root.after_idle(self.root.after, 0, self.load_app_icon)
+        
+        # Data storage
+        self.current_session = None
+        self.bettors = []
+        self.bettor_names = set()  # bettor_key() of every name in self.bettors
+        self.bets = []
+        self.bet_index = {}  # bet['id'] -> bet, also used as the Treeview iid
+        self.total_pool = 0
+        self.totals = SessionTotals()
+        self.journal = None
+        self.session_path = None  # Session file the user saved to or opened; None until saved
+        self.io_busy = False  # True while a save or load runs on a worker
+        self.stream = None  # StreamedSession while a large file is still being read
+        self.bet_view = BetsView(self.bets)  # Sorted, filtered order of the bets table
+        self.bets_shown = 0  # Leading rows of bet_view currently materialized in the bets table
+        self.odds_feed = None  # OddsFeed while connected to a live odds feed
+        self.odds_updates = None  # Queue of ('prices' | 'error', data) from the feed thread
+        self.odds_backlog = {}  # Moved prices waiting for the session to be ready
+        self.shared = None  # SessionClient while editing a session shared through a server
+        
+        # Keep the journal on disk even if the window is closed mid-session
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.root.after(1000, self.sync_journal)
+        
+        # Hidden diagnostics panel for profiling data
+        profiler.widget_root = self.root
+        self.root.bind_all('<Control-Shift-D>', lambda event: self.show_diagnostics())
+        
+        # Style configuration
+        self.style = ttk.Style()
+        self.style.theme_use('clam')
+        self.style.configure('Title.TLabel', font=('Arial', 16, 'bold'))
+        self.style.configure('Header.TLabel', font=('Arial', 12, 'bold'))
+        
+        self.create_main_menu()
+        
+    def load_app_icon(self):
+        """Set the custom window icon, or remove the default tkinter one"""
         try:
             # Try to load custom DAMA icon
             icon_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "DAMA-app-icon.ico")
@@ -30,20 +131,6 @@ class BetSplitterApp:
             except:
                 pass
         
-        # Data storage
-        self.current_session = None
-        self.bettors = []
-        self.bets = []
-        self.total_pool = 0
-        
-        # Style configuration
-        self.style = ttk.Style()
-        self.style.theme_use('clam')
-        self.style.configure('Title.TLabel', font=('Arial', 16, 'bold'))
-        self.style.configure('Header.TLabel', font=('Arial', 12, 'bold'))
-        
-        self.create_main_menu()
-        
     def remove_window_icon(self, window):
         """Helper method to set custom icon or remove the tkinter feather icon from any window"""
         try:
@@ -59,8 +146,13 @@ class BetSplitterApp:
             except:
                 pass
         
+    @timed
     def create_main_menu(self):
         """Create the main menu interface"""
+        self.stream = None  # Leaving a session abandons any load still streaming in
+        self.leave_shared_session()
+        self.stop_odds_feed()  # Prices are matched to bets by name, so never carry them into another session
+        
         # Clear the window
         for widget in self.root.winfo_children():
             widget.destroy()
@@ -88,10 +180,108 @@ class BetSplitterApp:
                                     command=self.load_session, width=25)
         load_session_btn.pack(pady=10)
         
+        # Search Sessions button
+        search_sessions_btn = ttk.Button(main_frame, text="Search Saved Sessions", 
+                                       command=self.search_sessions, width=25)
+        search_sessions_btn.pack(pady=10)
+        
+        # Shared Session button
+        shared_session_btn = ttk.Button(main_frame, text="Join Shared Session", 
+                                      command=self.join_shared_session, width=25)
+        shared_session_btn.pack(pady=10)
+        
+        # Bettor Ledger button
+        ledger_btn = ttk.Button(main_frame, text="Bettor Ledger", 
+                              command=self.show_ledger, width=25)
+        ledger_btn.pack(pady=10)
+        
         # Copyright
         copyright_label = ttk.Label(main_frame, text="© 2025 DAMA - All Rights Reserved")
         copyright_label.pack(side=tk.BOTTOM, pady=(20, 0))
         
+    def join_shared_session(self):
+        """Connect to a session server and edit its session together with other operators"""
+        from session_server import DEFAULT_HOST, DEFAULT_PORT, SessionClient, parse_address
+        
+        address = simpledialog.askstring("Join Shared Session", "Session server address (host:port):",
+                                         initialvalue=f"{DEFAULT_HOST}:{DEFAULT_PORT}")
+        if not address:
+            return
+        try:
+            host, port = parse_address(address)
+        except ValueError:
+            messagebox.showerror("Error", "Please enter the address as host:port")
+            return
+            
+        self.close_journal()  # The server journals the shared session
+        self.stop_odds_feed()
+        self.leave_shared_session()
+        self.current_session = None
+        self.session_path = None
+        self.shared = SessionClient(host, port).start()
+        self.root.after(SHARED_APPLY_MS, self.apply_shared_updates, self.shared)
+        
+    def leave_shared_session(self):
+        """Disconnect from the session server, if connected"""
+        if self.shared:
+            self.shared.close()
+            self.shared = None
+            
+    @timed
+    def apply_shared_updates(self, client):
+        """Apply everything the session server pushed since the last tick, then redraw once"""
+        import queue
+        
+        if client is not self.shared:
+            return  # Left the shared session meanwhile
+        changed = False
+        while True:
+            try:
+                message = client.messages.get_nowait()
+            except queue.Empty:
+                break
+            if message['type'] == 'closed':
+                self.shared = None
+                if self.current_session is None:
+                    messagebox.showerror("Error", f"Could not join the shared session: {message['reason']}")
+                else:
+                    messagebox.showwarning("Shared Session",
+                                           "Disconnected from the session server. Further changes are "
+                                           "not shared; use Save Session to keep them.")
+                return
+            first_snapshot = message['type'] == 'snapshot' and self.current_session is None
+            kind = client.receive(message, self.session_snapshot() if self.current_session else None,
+                                  self.bet_index, self.totals)
+            if kind == 'snapshot':
+                self.current_session = message['session']
+                self.bettors = self.current_session['bettors']
+                self.bets = self.current_session['bets']
+                self.bet_index = index_bets(self.bets)
+                self.totals = SessionTotals(self.bets)
+            elif kind == 'reject':
+                self.show_status(f"Change undone - the shared session refused it: {message['reason']}")
+            if first_snapshot:
+                self.total_pool = self.current_session['total_pool']
+                self.bettor_names = {bettor_key(bettor['name']) for bettor in self.bettors}
+                if self.bets:
+                    self.create_betting_page()
+                else:
+                    self.create_bettors_page()
+                self.show_status(f"Joined shared session '{self.current_session.get('event', 'Unknown')}'")
+            elif kind:
+                changed = True
+                
+        if changed:
+            self.total_pool = self.current_session['total_pool']
+            self.bettor_names = {bettor_key(bettor['name']) for bettor in self.bettors}
+            self.check_totals()
+            if getattr(self, 'bettors_tree', None) and self.bettors_tree.winfo_exists():
+                self.update_bettors_display()
+            if getattr(self, 'bets_tree', None) and self.bets_tree.winfo_exists():
+                self.update_bets_display()
+                self.update_pool_display()
+        self.root.after(SHARED_APPLY_MS, self.apply_shared_updates, client)
+        
     def create_new_session(self):
         """Create a new betting session"""
         # Get session details
@@ -101,6 +291,7 @@ class BetSplitterApp:
         if not event_name:
             return
             
+        self.stop_odds_feed()
         self.current_session = {
             'date': date,
             'event': event_name,
@@ -110,11 +301,71 @@ class BetSplitterApp:
         }
         
         self.bettors = []
+        self.bettor_names = set()  # bettor_key() of every name in self.bettors
         self.bets = []
+        self.bet_index = {}  # bet['id'] -> bet, also used as the Treeview iid
         self.total_pool = 0
+        self.totals = SessionTotals()
+        self.session_path = None
+        
+        # Journal every change from the start so nothing is lost before the first save
+        try:
+            self.start_journal(os.path.join(app_dir(), self.default_session_filename()))
+        except OSError:
+            self.journal = None  # Read-only location; changes are kept until saved elsewhere
+        self.record({'op': 'session', 'date': date, 'event': event_name})
         
         self.create_bettors_page()
         
+    def default_session_filename(self):
+        """Default file name for saving the current session"""
+        event_name = self.current_session['event'].replace(' ', '_').replace('/', '_').replace('\\', '_')
+        date_str = datetime.now().strftime("%Y%m%d_%H%M%S")
+        return f"betting_session_{event_name}_{date_str}.json"
+        
+    def session_snapshot(self):
+        """Return the current session dict with the live bettors and bets"""
+        self.current_session['bettors'] = self.bettors
+        self.current_session['bets'] = self.bets
+        self.current_session['total_pool'] = self.total_pool
+        return self.current_session
+        
+    def start_journal(self, snapshot_path, last_seq=0):
+        """Start journaling changes for the session stored at snapshot_path"""
+        self.close_journal()
+        self.journal = SessionJournal(snapshot_path, last_seq)
+        
+    def record(self, op):
+        """Append one change to the session journal, or send it to the shared session"""
+        if self.shared:
+            self.shared.send(op)
+            return
+        if not self.journal:
+            return
+        self.journal.append(op)
+        if self.journal.records_since_compaction >= JOURNAL_COMPACT_EVERY:
+            self.journal.compact(self.session_snapshot())
+            
+    def sync_journal(self):
+        """Periodically flush the journal's last unsynced batch to disk"""
+        if self.journal and not self.io_busy:
+            self.journal.sync()
+        self.root.after(1000, self.sync_journal)
+        
+    def close_journal(self, remove=False):
+        """Close the current journal, if any"""
+        if self.journal:
+            self.journal.close(remove=remove)
+            self.journal = None
+            
+    def on_close(self):
+        """Close the journal and connections cleanly before the window goes away"""
+        self.stop_odds_feed()
+        self.leave_shared_session()
+        self.close_journal()
+        self.root.destroy()
+        
+    @timed
     def create_bettors_page(self):
         """Create the page for adding bettors"""
         # Clear the window
@@ -150,6 +401,9 @@ class BetSplitterApp:
         add_btn = ttk.Button(add_frame, text="Add Bettor", command=self.add_bettor)
         add_btn.grid(row=0, column=4)
         
+        import_btn = ttk.Button(add_frame, text="Import CSV...", command=self.import_bettors_csv)
+        import_btn.grid(row=0, column=5, padx=(10, 0))
+        
         # Bettors list
         list_frame = ttk.LabelFrame(main_frame, text="Current Bettors", padding="10")
         list_frame.pack(fill=tk.BOTH, expand=True, pady=(0, 20))
@@ -163,6 +417,7 @@ class BetSplitterApp:
             self.bettors_tree.column(col, width=150)
             
         self.bettors_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.bettor_rows = KeyedTreeRows(self.bettors_tree)
         
         # Scrollbar
         scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.bettors_tree.yview)
@@ -187,11 +442,14 @@ class BetSplitterApp:
         if self.bettors:
             self.update_bettors_display()
         
+    @timed
     def add_bettor(self):
         """Add a bettor to the list"""
+        if not self.session_ready():
+            return
         name = self.name_entry.get().strip()
         try:
-            stake = float(self.stake_entry.get())
+            stake = from_cents(parse_cents(self.stake_entry.get()))
         except ValueError:
             messagebox.showerror("Error", "Please enter a valid stake amount")
             return
@@ -205,15 +463,16 @@ class BetSplitterApp:
             return
             
         # Check if name already exists
-        for bettor in self.bettors:
-            if bettor['name'].lower() == name.lower():
-                messagebox.showerror("Error", "Bettor name already exists")
-                return
+        if bettor_key(name) in self.bettor_names:
+            messagebox.showerror("Error", "Bettor name already exists")
+            return
                 
         # Add bettor
         bettor = {'name': name, 'stake': stake}
         self.bettors.append(bettor)
-        self.total_pool += stake
+        self.bettor_names.add(bettor_key(name))
+        self.total_pool = add_amounts(self.total_pool, stake)
+        self.record({'op': 'add_bettors', 'bettors': [bettor]})
         
         # Update display
         self.update_bettors_display()
@@ -222,24 +481,97 @@ class BetSplitterApp:
         self.name_entry.delete(0, tk.END)
         self.stake_entry.delete(0, tk.END)
         
+    @timed
+    def add_bettors(self, entries):
+        """Add a whole roster of (name, stake) entries, validated in one pass
+        
+        Valid entries are added even if others fail; returns the list of
+        (entry_number, message) errors.
+        """
+        bettors, errors = validate_bettors(entries, self.bettor_names)
+        
+        self.bettors.extend(bettors)
+        for bettor in bettors:
+            self.bettor_names.add(bettor_key(bettor['name']))
+            self.total_pool = add_amounts(self.total_pool, bettor['stake'])
+        if bettors:
+            self.record({'op': 'add_bettors', 'bettors': bettors})
+            
+        if bettors and getattr(self, 'bettors_tree', None) and self.bettors_tree.winfo_exists():
+            self.update_bettors_display()
+        return errors
+        
+    def import_bettors_csv(self):
+        """Add a whole bettor roster from a CSV file with name and stake columns"""
+        from csv_import import read_bettors
+        
+        if not self.session_ready():
+            return
+        filename = filedialog.askopenfilename(
+            title="Import Bettors",
+            initialdir=app_dir(),
+            filetypes=[("CSV files", "*.csv"), ("Text files", "*.txt;*.tsv"), ("All files", "*.*")]
+        )
+        if not filename:
+            return
+            
+        def imported(result):
+            bettors, errors = result
+            if not self.confirm_import(bettors, errors, "bettor"):
+                return
+            late_errors = self.add_bettors([(bettor['name'], bettor['stake']) for bettor in bettors])
+            self.show_import_summary(bettors, "bettor", errors, late_errors)
+            
+        when_done(self.root, submit(read_bettors, filename, set(self.bettor_names)), imported,
+                  lambda e: messagebox.showerror("Error", f"Failed to import bettors: {str(e)}"))
+        
+    def confirm_import(self, rows, errors, noun):
+        """Report validation errors; returns True if the valid rows should be added"""
+        from csv_import import format_errors
+        
+        if not errors:
+            if not rows:
+                messagebox.showinfo("Import", f"The file has no {noun}s to import")
+            return bool(rows)
+        if not rows:
+            messagebox.showerror("Import", f"No {noun}s were imported:\n\n{format_errors(errors)}")
+            return False
+        return messagebox.askyesno("Import", f"{len(errors)} row(s) have problems and will be skipped:\n\n"
+                                             f"{format_errors(errors)}\n\n"
+                                             f"Import the {len(rows)} valid {noun}(s)?")
+        
+    def show_import_summary(self, rows, noun, errors, late_errors):
+        """Tell the user how an import went"""
+        message = f"Imported {len(rows) - len(late_errors)} {noun}(s)"
+        if errors:
+            message += f", skipped {len(errors)} row(s) with problems"
+        if late_errors:
+            # The session changed while the file was being checked
+            late = '\n'.join(f"{rows[number - 1]['name']}: {text}" for number, text in late_errors[:15])
+            message += f".\n\n{len(late_errors)} no longer fit the session:\n{late}"
+            messagebox.showwarning("Import", message)
+        else:
+            messagebox.showinfo("Import", message)
+            
+    @timed
     def update_bettors_display(self):
-        """Update the bettors display"""
-        # Clear tree
-        for item in self.bettors_tree.get_children():
-            self.bettors_tree.delete(item)
-            
-        # Add bettors
-        for bettor in self.bettors:
-            percentage = (bettor['stake'] / self.total_pool * 100) if self.total_pool > 0 else 0
-            self.bettors_tree.insert('', tk.END, values=(
-                bettor['name'], 
-                f"LKR {bettor['stake']:.2f}", 
-                f"{percentage:.1f}%"
-            ))
+        """Update the bettors display, touching only rows whose values changed"""
+        self.bettor_rows.sync((bettor_key(bettor['name']), self.bettor_row_values(bettor))
+                              for bettor in self.bettors)
             
         # Update pool label
         self.pool_label.config(text=f"Total Pool: LKR {self.total_pool:.2f}")
         
+    def bettor_row_values(self, bettor):
+        """Format a bettor for the bettors Treeview"""
+        percentage = (bettor['stake'] / self.total_pool * 100) if self.total_pool > 0 else 0
+        return (
+            bettor['name'], 
+            f"LKR {bettor['stake']:.2f}", 
+            f"{percentage:.1f}%"
+        )
+        
+    @timed
     def create_betting_page(self):
         """Create the betting page"""
         if not self.bettors:
@@ -296,10 +628,50 @@ class BetSplitterApp:
         add_bet_btn = ttk.Button(row1_frame, text="Add Bet", command=self.add_bet)
         add_bet_btn.pack(side=tk.LEFT)
         
+        import_bets_btn = ttk.Button(row1_frame, text="Import CSV...", command=self.import_bets_csv)
+        import_bets_btn.pack(side=tk.LEFT, padx=(10, 0))
+        
         # Bets list - FIXED: Better space allocation and scrolling
         bets_frame = ttk.LabelFrame(main_frame, text="Current Bets", padding="10")
         bets_frame.pack(fill=tk.BOTH, expand=True, pady=(0, 15))
         
+        # Quick filter, applied as the user types
+        filter_frame = ttk.Frame(bets_frame)
+        filter_frame.pack(fill=tk.X, pady=(0, 5))
+        
+        ttk.Label(filter_frame, text="Find:").pack(side=tk.LEFT, padx=(0, 5))
+        self.filter_text_entry = ttk.Entry(filter_frame, width=18)
+        self.filter_text_entry.pack(side=tk.LEFT, padx=(0, 10))
+        
+        ttk.Label(filter_frame, text="Status:").pack(side=tk.LEFT, padx=(0, 5))
+        self.filter_status_combo = ttk.Combobox(filter_frame, values=('All', 'Pending', 'Won', 'Lost', 'Void'),
+                                                state='readonly', width=8)
+        self.filter_status_combo.pack(side=tk.LEFT, padx=(0, 10))
+        
+        ttk.Label(filter_frame, text="Odds:").pack(side=tk.LEFT, padx=(0, 5))
+        self.filter_min_odds_entry = ttk.Entry(filter_frame, width=5)
+        self.filter_min_odds_entry.pack(side=tk.LEFT)
+        ttk.Label(filter_frame, text="to").pack(side=tk.LEFT, padx=5)
+        self.filter_max_odds_entry = ttk.Entry(filter_frame, width=5)
+        self.filter_max_odds_entry.pack(side=tk.LEFT, padx=(0, 10))
+        
+        ttk.Button(filter_frame, text="Clear", command=self.clear_bet_filter).pack(side=tk.LEFT)
+        self.bets_count_label = ttk.Label(filter_frame, text="", foreground='#7f8c8d')
+        self.bets_count_label.pack(side=tk.RIGHT)
+        
+        # Show the filter this session was last viewed with
+        bet_filter = self.bet_view.filter if self.bet_view.bets is self.bets else BetFilter()
+        self.filter_text_entry.insert(0, bet_filter.text)
+        self.filter_status_combo.set(next(iter(bet_filter.statuses)) if bet_filter.statuses else 'All')
+        for entry, odds in ((self.filter_min_odds_entry, bet_filter.min_odds),
+                            (self.filter_max_odds_entry, bet_filter.max_odds)):
+            if odds is not None:
+                entry.insert(0, f"{odds:g}")
+        self.filter_after_id = None
+        for entry in (self.filter_text_entry, self.filter_min_odds_entry, self.filter_max_odds_entry):
+            entry.bind('<KeyRelease>', self.on_bet_filter_typed)
+        self.filter_status_combo.bind('<<ComboboxSelected>>', lambda event: self.apply_bet_filter())
+        
         # Create a frame for the treeview and scrollbar
         tree_container = ttk.Frame(bets_frame)
         tree_container.pack(fill=tk.BOTH, expand=True, pady=(0, 10))
@@ -307,18 +679,22 @@ class BetSplitterApp:
         # Treeview for bets with better column sizing
         bet_columns = ('Name', 'Bet', 'Odds', 'Stake', 'Potential Payout', 'Status')
         self.bets_tree = ttk.Treeview(tree_container, columns=bet_columns, show='headings')
+        self.bet_rows = KeyedTreeRows(self.bets_tree)
         
         # Better column configuration for visibility
         column_widths = {'Name': 100, 'Bet': 150, 'Odds': 60, 'Stake': 80, 'Potential Payout': 100, 'Status': 70}
         for col in bet_columns:
-            self.bets_tree.heading(col, text=col)
+            self.bets_tree.heading(col, text=col, command=lambda c=col: self.sort_bets(c))
             self.bets_tree.column(col, width=column_widths[col], minwidth=50)
         
         # Add scrollbars
         v_scrollbar = ttk.Scrollbar(tree_container, orient=tk.VERTICAL, command=self.bets_tree.yview)
         h_scrollbar = ttk.Scrollbar(tree_container, orient=tk.HORIZONTAL, command=self.bets_tree.xview)
         
-        self.bets_tree.configure(yscrollcommand=v_scrollbar.set, xscrollcommand=h_scrollbar.set)
+        self.bets_tree.configure(yscrollcommand=self.on_bets_scroll, xscrollcommand=h_scrollbar.set)
+        self.bets_v_scrollbar = v_scrollbar
+        self.bets_shown = 0
+        self.more_bets_pending = False
         
         # Pack treeview and scrollbars
         self.bets_tree.grid(row=0, column=0, sticky='nsew')
@@ -339,12 +715,17 @@ class BetSplitterApp:
         
         ttk.Button(status_frame, text="Mark as Won", command=self.mark_won).pack(side=tk.LEFT, padx=(0, 5))
         ttk.Button(status_frame, text="Mark as Lost", command=self.mark_lost).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(status_frame, text="Mark as Pending", 
+                  command=lambda: self.set_selected_status('Pending')).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(status_frame, text="Mark as Void", 
+                  command=lambda: self.set_selected_status('Void')).pack(side=tk.LEFT, padx=(0, 5))
         
         # Right side - Management buttons
         actions_frame = ttk.LabelFrame(management_frame, text="Bet Management", padding="5")
         actions_frame.pack(side=tk.RIGHT, padx=(10, 0))
         
         ttk.Button(actions_frame, text="Set All Results", command=self.set_bet_results).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(actions_frame, text="What-If", command=self.show_what_if).pack(side=tk.LEFT, padx=(0, 5))
         ttk.Button(actions_frame, text="Delete Selected", command=self.delete_bet).pack(side=tk.LEFT)
         
         # Navigation and action buttons
@@ -360,29 +741,61 @@ class BetSplitterApp:
         save_btn = ttk.Button(nav_frame, text="Save Session", command=self.save_session)
         save_btn.pack(side=tk.RIGHT)
         
+        self.odds_feed_btn = ttk.Button(nav_frame, command=self.toggle_odds_feed,
+                                        text="Disconnect Odds Feed" if self.odds_feed else "Connect Odds Feed")
+        self.odds_feed_btn.pack(side=tk.RIGHT, padx=(0, 10))
+        
+        # Status bar for non-blocking notices
+        if getattr(self, 'status_after_id', None):
+            self.root.after_cancel(self.status_after_id)
+        self.status_label = ttk.Label(main_frame, text="", foreground='#7f8c8d')
+        self.status_label.pack(fill=tk.X, pady=(10, 0))
+        self.status_after_id = None
+        
         # Update displays with existing data
-        if self.bets:
-            self.update_bets_display()
+        self.update_bets_display()
+        self.show_sort_indicator()
         self.update_pool_display()
         
     def get_available_pool(self):
         """Calculate available pool amount"""
-        used_stake = sum(bet['stake'] for bet in self.bets)
-        return self.total_pool - used_stake
+        return from_cents(to_cents(self.total_pool) - self.totals.used_stake_cents)
+    
+    def check_totals(self):
+        """Verify the running totals against a full recount in debug mode"""
+        if DEBUG_CHECKS:
+            self.totals.verify(self.bets)
     
     def update_pool_display(self):
         """Update the available pool display"""
-        if hasattr(self, 'pool_display_label'):
+        if hasattr(self, 'pool_display_label') and self.pool_display_label.winfo_exists():
             available = self.get_available_pool()
             self.pool_display_label.config(text=f"Available Pool: LKR {available:.2f}")
     
+    def session_ready(self):
+        """Return False (with a notice) while a large session is still streaming in"""
+        if self.stream:
+            self.show_status("Still loading bets - please wait until loading finishes")
+            return False
+        return True
+        
+    @timed
     def add_bet(self):
         """Add a new bet"""
+        if not self.session_ready():
+            return
         try:
             name = self.bet_name_entry.get().strip()
             bet_desc = self.bet_desc_entry.get().strip()
-            odds = float(self.odds_entry.get())
-            stake = float(self.bet_stake_entry.get())
+            odds_text = self.odds_entry.get().strip()
+            if not odds_text and self.odds_feed:
+                live_odds = self.odds_feed.cache.get(name)  # Read once: the price may expire meanwhile
+                if live_odds is not None:
+                    odds_text = str(live_odds)  # Left blank: take the live price
+            odds = float(odds_text)
+            stake_cents = parse_cents(self.bet_stake_entry.get())
+            if not math.isfinite(odds) or not math.isfinite(from_cents(stake_cents) * odds):
+                raise ValueError(odds_text)  # inf, or a payout too large to hold
         except ValueError:
             messagebox.showerror("Error", "Please enter valid odds and stake values")
             return
@@ -391,29 +804,44 @@ class BetSplitterApp:
             messagebox.showerror("Error", "Please fill in all fields")
             return
             
-        if stake <= 0 or odds <= 0:
+        if stake_cents <= 0 or odds <= 0:
             messagebox.showerror("Error", "Odds and stake must be greater than 0")
             return
             
         # Calculate remaining pool
         available = self.get_available_pool()
         
-        if stake > available:
+        if stake_cents > to_cents(available):
             messagebox.showerror("Error", f"Not enough funds. Available: LKR {available:.2f}")
             return
             
         # Add bet
         bet = {
+            'id': new_bet_id(),
             'name': name,
             'description': bet_desc,
             'odds': odds,
-            'stake': stake,
-            'potential_payout': stake * odds,
+            'stake': from_cents(stake_cents),
+            'potential_payout': from_cents(to_cents(from_cents(stake_cents) * odds)),  # Paid out to the cent
             'status': 'Pending'
         }
         
         self.bets.append(bet)
-        self.update_bets_display()
+        self.bet_index[bet['id']] = bet
+        self.totals.add_bet(bet)
+        self.record({'op': 'add_bet', 'bet': bet})
+        self.check_totals()
+        index, = self.bet_view.add([bet])
+        if index is None:
+            self.show_status(f"Bet '{name}' added - it is hidden by the current filter")
+        else:
+            if index <= self.bets_shown:
+                self.bet_rows.upsert(self.bet_key(bet), self.bet_row_values(bet), index=index)
+                self.bets_shown += 1
+            else:
+                self.show_more_bets(index + 1 - self.bets_shown)
+            self.bets_tree.see(self.bet_key(bet))  # Bring the new bet into view
+        self.update_bets_count()
         self.update_pool_display()  # Update available pool display
         
         # Clear entries
@@ -422,110 +850,283 @@ class BetSplitterApp:
         self.odds_entry.delete(0, tk.END)
         self.bet_stake_entry.delete(0, tk.END)
     
-    def update_bets_display(self):
-        """Update the bets display"""
-        # Clear tree
-        for item in self.bets_tree.get_children():
-            self.bets_tree.delete(item)
-            
-        # Add bets
-        for bet in self.bets:
-            self.bets_tree.insert('', tk.END, values=(
-                bet['name'],
-                bet['description'],
-                f"{bet['odds']:.2f}",
-                f"LKR {bet['stake']:.2f}",
-                f"LKR {bet['potential_payout']:.2f}",
-                bet['status']
-            ))
-    
-    def delete_bet(self):
-        """Delete selected bet - FIXED IMPLEMENTATION"""
-        selection = self.bets_tree.selection()
-        if not selection:
-            messagebox.showwarning("No Selection", "Please select a bet from the list to delete")
-            return
+    @timed
+    def add_bets(self, bets):
+        """Add validated bets in one batch with a single redraw
+        
+        Stakes are checked against the pool again, as it may have changed
+        since the bets were validated; returns the (number, message) errors
+        for bets that no longer fit.
+        """
+        available = to_cents(self.get_available_pool())
+        added = []
+        errors = []
+        for number, bet in enumerate(bets, start=1):
+            stake = to_cents(bet['stake'])
+            if stake > available:
+                errors.append((number, f"Not enough funds. Available: LKR {from_cents(available):.2f}"))
+                continue
+            available -= stake
+            index_bet(bet, self.bet_index)
+            self.bets.append(bet)
+            self.totals.add_bet(bet)
+            added.append(bet)
+        if not added:
+            return errors
             
-        # Get the selected item
-        selected_item = selection[0]
+        self.record({'op': 'add_bets', 'bets': added})
+        self.check_totals()
+        self.bet_view.add(added)
+        if getattr(self, 'bets_tree', None) and self.bets_tree.winfo_exists():
+            # Only rows landing in the pages already shown are drawn; the rest are paged in on scroll
+            self.sync_bets_page()
+            self.update_pool_display()
+        return errors
         
-        # Get bet details for confirmation
-        bet_values = self.bets_tree.item(selected_item, 'values')
-        bet_name = bet_values[0]
-        bet_stake = bet_values[3]
+    def import_bets_csv(self):
+        """Add many bets from a CSV file with name, bet, odds, stake and optional status columns"""
+        from csv_import import read_bets
         
-        # Confirm deletion
-        if messagebox.askyesno("Confirm Deletion", 
-                              f"Are you sure you want to delete this bet?\n\n"
-                              f"Bet: {bet_name}\n"
-                              f"Stake: {bet_stake}\n\n"
-                              f"This stake will be returned to the available pool."):
+        if not self.session_ready():
+            return
+        filename = filedialog.askopenfilename(
+            title="Import Bets",
+            initialdir=app_dir(),
+            filetypes=[("CSV files", "*.csv"), ("Text files", "*.txt;*.tsv"), ("All files", "*.*")]
+        )
+        if not filename:
+            return
             
-            # Find the index of the selected item
-            all_items = self.bets_tree.get_children()
-            index = all_items.index(selected_item)
+        def imported(result):
+            bets, errors = result
+            if not self.confirm_import(bets, errors, "bet"):
+                return
+            late_errors = self.add_bets(bets)
+            self.show_import_summary(bets, "bet", errors, late_errors)
             
-            # Remove from data
-            deleted_bet = self.bets.pop(index)
+        when_done(self.root, submit(read_bets, filename, to_cents(self.get_available_pool())), imported,
+                  lambda e: messagebox.showerror("Error", f"Failed to import bets: {str(e)}"))
+    
+    @timed
+    def update_bets_display(self):
+        """Update the bets display after any change, touching only rows whose values or places changed"""
+        if self.bet_view.bets is not self.bets:
+            self.bet_view = BetsView(self.bets)  # Another session is shown
+        else:
+            self.bet_view.reset()
+        self.sync_bets_page()
+        
+    def sync_bets_page(self):
+        """Make the bets table show the leading rows of the sorted, filtered view"""
+        rows = self.bet_view.rows
+        self.bets_shown = max(min(self.bets_shown, len(rows)), min(len(rows), BETS_PAGE_SIZE))
+        self.bet_rows.sync((self.bet_key(bet), self.bet_row_values(bet)) for bet in rows[:self.bets_shown])
+        self.update_bets_count()
+        
+    def update_bets_count(self):
+        """Show how many bets the filter lets through"""
+        if not getattr(self, 'bets_count_label', None) or not self.bets_count_label.winfo_exists():
+            return
+        if self.bet_view.filter.active:
+            self.bets_count_label.config(text=f"Showing {len(self.bet_view.rows)} of {len(self.bets)} bets")
+        else:
+            self.bets_count_label.config(text=f"{len(self.bets)} bets")
             
-            # Update displays
-            self.update_bets_display()
-            self.update_pool_display()
+    @timed
+    def sort_bets(self, column):
+        """Sort the bets table on a column; clicking the same heading again reverses it"""
+        if not self.session_ready():
+            return
+        self.bet_view.sort_by(column)
+        self.show_sort_indicator()
+        self.bets_shown = 0  # Start again from the top of the new order
+        self.sync_bets_page()
+        self.bets_tree.yview_moveto(0)
+        
+    def show_sort_indicator(self):
+        """Mark the sorted column's heading with the sort direction"""
+        for col in self.bets_tree['columns']:
+            if col == self.bet_view.sort_column:
+                self.bets_tree.heading(col, text=f"{col} {'▼' if self.bet_view.descending else '▲'}")
+            else:
+                self.bets_tree.heading(col, text=col)
+                
+    def on_bet_filter_typed(self, event=None):
+        """Filter the bets table once the user pauses typing"""
+        if self.filter_after_id:
+            self.root.after_cancel(self.filter_after_id)
+        self.filter_after_id = self.root.after(FILTER_DELAY_MS, self.apply_bet_filter)
+        
+    @timed
+    def apply_bet_filter(self):
+        """Show only the bets matching the filter row"""
+        self.filter_after_id = None
+        if not self.bets_tree.winfo_exists():
+            return
+        try:
+            min_odds = float(self.filter_min_odds_entry.get()) if self.filter_min_odds_entry.get().strip() else None
+            max_odds = float(self.filter_max_odds_entry.get()) if self.filter_max_odds_entry.get().strip() else None
+        except ValueError:
+            self.show_status("Please enter numbers for the odds range")
+            return
+        status = self.filter_status_combo.get()
+        self.bet_view.set_filter(BetFilter(self.filter_text_entry.get(),
+                                           None if status in ('', 'All') else {status},
+                                           min_odds, max_odds))
+        self.bets_shown = 0
+        self.sync_bets_page()
+        self.bets_tree.yview_moveto(0)
+        
+    def clear_bet_filter(self):
+        """Show every bet again"""
+        for entry in (self.filter_text_entry, self.filter_min_odds_entry, self.filter_max_odds_entry):
+            entry.delete(0, tk.END)
+        self.filter_status_combo.set('All')
+        self.apply_bet_filter()
+    
+    @timed
+    def show_more_bets(self, count=BETS_PAGE_SIZE):
+        """Append the next count rows of the view to the bets table"""
+        self.more_bets_pending = False
+        if not self.bets_tree.winfo_exists():
+            return
+        for bet in self.bet_view.rows[self.bets_shown:self.bets_shown + count]:
+            self.bet_rows.upsert(self.bet_key(bet), self.bet_row_values(bet))
+            self.bets_shown += 1
             
-            messagebox.showinfo("Bet Deleted", 
-                               f"Bet '{deleted_bet['name']}' has been deleted.\n"
-                               f"LKR {deleted_bet['stake']:.2f} returned to available pool.")
+    def on_bets_scroll(self, first, last):
+        """Scrollbar hook that loads the next page when the user nears the end"""
+        self.bets_v_scrollbar.set(first, last)
+        if float(last) >= 0.9 and self.bets_shown < len(self.bet_view.rows) and not self.more_bets_pending:
+            self.more_bets_pending = True
+            self.root.after_idle(self.show_more_bets)
     
-    def mark_won(self):
-        """Mark selected bet as won - FIXED IMPLEMENTATION"""
+    def bet_key(self, bet):
+        """Stable Treeview iid for a bet"""
+        return bet['id']
+    
+    def bet_row_values(self, bet):
+        """Format a bet for the bets Treeview"""
+        return (
+            bet['name'],
+            bet['description'],
+            f"{bet['odds']:.2f}",
+            f"LKR {bet['stake']:.2f}",
+            f"LKR {bet['potential_payout']:.2f}",
+            bet['status']
+        )
+    
+    @timed
+    def delete_bet(self):
+        """Delete the selected bets with one batched update"""
+        if not self.session_ready():
+            return
         selection = self.bets_tree.selection()
         if not selection:
-            messagebox.showwarning("No Selection", "Please select a bet from the list to mark as won")
+            messagebox.showwarning("No Selection", "Please select one or more bets from the list to delete")
             return
             
-        # Get the selected item
-        selected_item = selection[0]
-        
-        # Find the index of the selected item
-        all_items = self.bets_tree.get_children()
-        index = all_items.index(selected_item)
-        
-        # Update status
-        old_status = self.bets[index]['status']
-        self.bets[index]['status'] = 'Won'
+        bets = [self.bet_index[iid] for iid in selection]
+        stake = from_cents(sum(to_cents(bet['stake']) for bet in bets))
         
-        # Update display
-        self.update_bets_display()
+        # Confirm deletion
+        if len(bets) == 1:
+            question = (f"Are you sure you want to delete this bet?\n\n"
+                        f"Bet: {bets[0]['name']}\n"
+                        f"Stake: LKR {stake:.2f}\n\n"
+                        f"This stake will be returned to the available pool.")
+        else:
+            question = (f"Are you sure you want to delete these {len(bets)} bets?\n\n"
+                        f"Total stake: LKR {stake:.2f}\n\n"
+                        f"These stakes will be returned to the available pool.")
+        if not messagebox.askyesno("Confirm Deletion", question):
+            return
+            
+        # Remove from data, finding each bet by ID
+        for bet in bets:
+            del self.bet_index[bet['id']]
+            self.bet_view.remove(bet)
+            self.totals.remove_bet(bet)
+        remove_bets(self.bets, bets)
+        self.record({'op': 'delete_bets', 'ids': [bet['id'] for bet in bets]})
+        self.check_totals()
+        
+        # Update displays
+        for bet in bets:
+            self.bet_rows.remove(bet['id'])
+        self.bets_shown -= len(bets)
+        self.update_bets_count()
+        self.update_pool_display()
         
-        bet_name = self.bets[index]['name']
-        messagebox.showinfo("Status Updated", f"Bet '{bet_name}' marked as Won")
+        if len(bets) == 1:
+            messagebox.showinfo("Bet Deleted", 
+                               f"Bet '{bets[0]['name']}' has been deleted.\n"
+                               f"LKR {stake:.2f} returned to available pool.")
+        else:
+            messagebox.showinfo("Bets Deleted", 
+                               f"{len(bets)} bets have been deleted.\n"
+                               f"LKR {stake:.2f} returned to available pool.")
+    
+    def mark_won(self):
+        """Mark the selected bets as won"""
+        self.set_selected_status('Won')
         
     def mark_lost(self):
-        """Mark selected bet as lost - FIXED IMPLEMENTATION"""
+        """Mark the selected bets as lost"""
+        self.set_selected_status('Lost')
+        
+    @timed
+    def set_selected_status(self, status):
+        """Apply one status to every selected bet with a single batched update"""
+        if not self.session_ready():
+            return
         selection = self.bets_tree.selection()
         if not selection:
-            messagebox.showwarning("No Selection", "Please select a bet from the list to mark as lost")
+            messagebox.showwarning("No Selection", f"Please select one or more bets to mark as {status}")
             return
             
-        # Get the selected item
-        selected_item = selection[0]
-        
-        # Find the index of the selected item
-        all_items = self.bets_tree.get_children()
-        index = all_items.index(selected_item)
-        
-        # Update status
-        old_status = self.bets[index]['status']
-        self.bets[index]['status'] = 'Lost'
-        
-        # Update display
-        self.update_bets_display()
-        
-        bet_name = self.bets[index]['name']
-        messagebox.showinfo("Status Updated", f"Bet '{bet_name}' marked as Lost")
+        # Update the model first, then redraw only the rows that changed
+        changed = []
+        for iid in selection:
+            bet = self.bet_index[iid]
+            if bet['status'] != status:
+                self.totals.set_status(bet, status)
+                changed.append(bet)
+        self.check_totals()
+        if changed:
+            self.record({'op': 'set_status', 'ids': [bet['id'] for bet in changed], 'status': status})
+        
+        if changed and self.bet_view.update(('status',)):
+            self.sync_bets_page()  # Sorted or filtered by status, so rows move
+        else:
+            for bet in changed:
+                self.bet_rows.upsert(bet['id'], self.bet_row_values(bet))
+            
+        if len(selection) == 1:
+            self.show_status(f"Bet '{self.bet_index[selection[0]]['name']}' marked as {status}")
+        else:
+            self.show_status(f"{len(selection)} bets marked as {status} ({len(changed)} changed)")
+            
+    def show_status(self, message, timeout_ms=5000):
+        """Show a non-modal notice in the betting page status bar"""
+        if not getattr(self, 'status_label', None) or not self.status_label.winfo_exists():
+            return
+        if self.status_after_id:
+            self.root.after_cancel(self.status_after_id)
+        self.status_label.config(text=message)
+        self.status_after_id = self.root.after(timeout_ms, self.clear_status)
+        
+    def clear_status(self):
+        """Clear the status bar notice"""
+        self.status_after_id = None
+        if self.status_label.winfo_exists():
+            self.status_label.config(text="")
     
+    @timed
     def set_bet_results(self):
         """Set results for all bets before calculating final results - REDESIGNED"""
+        if not self.session_ready():
+            return
         if not self.bets:
             messagebox.showinfo("Info", "No bets to set results for")
             return
@@ -565,90 +1166,20 @@ class BetSplitterApp:
         stats_inner = ttk.Frame(stats_frame)
         stats_inner.pack(fill=tk.X)
         
-        total_bets = len(self.bets)
-        total_stake = sum(bet['stake'] for bet in self.bets)
-        pending_bets = len([bet for bet in self.bets if bet['status'] == 'Pending'])
+        total_bets = self.totals.bet_count
+        total_stake = self.totals.used_stake
+        pending_bets = self.totals.pending_count
         
         ttk.Label(stats_inner, text=f"Total Bets: {total_bets}", font=('Arial', 10, 'bold')).pack(side=tk.LEFT, padx=(0, 30))
         ttk.Label(stats_inner, text=f"Total Stake: LKR {total_stake:.2f}", font=('Arial', 10, 'bold')).pack(side=tk.LEFT, padx=(0, 30))
         ttk.Label(stats_inner, text=f"Pending: {pending_bets}", font=('Arial', 10, 'bold'), foreground='#e74c3c').pack(side=tk.LEFT)
         
-        # Main content area with scrollbar
+        # Main content area - rows are virtualized so only visible bets get widgets
         content_frame = ttk.LabelFrame(main_container, text="Bet Results", padding="10")
         content_frame.pack(fill=tk.BOTH, expand=True, pady=(0, 20))
         
-        # Create canvas and scrollbar
-        canvas = tk.Canvas(content_frame, bg='white')
-        v_scrollbar = ttk.Scrollbar(content_frame, orient="vertical", command=canvas.yview)
-        h_scrollbar = ttk.Scrollbar(content_frame, orient="horizontal", command=canvas.xview)
-        scrollable_frame = ttk.Frame(canvas)
-        
-        # Configure scrolling
-        scrollable_frame.bind(
-            "<Configure>",
-            lambda e: canvas.configure(scrollregion=canvas.bbox("all"))
-        )
-        
-        canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
-        canvas.configure(yscrollcommand=v_scrollbar.set, xscrollcommand=h_scrollbar.set)
-        
-        # Store result variables
-        self.result_vars = []
-        
-        # Create header row
-        header_row = ttk.Frame(scrollable_frame)
-        header_row.pack(fill=tk.X, padx=5, pady=(0, 10))
-        
-        ttk.Label(header_row, text="Bet Name", font=('Arial', 10, 'bold'), width=15).pack(side=tk.LEFT, padx=(0, 10))
-        ttk.Label(header_row, text="Description", font=('Arial', 10, 'bold'), width=20).pack(side=tk.LEFT, padx=(0, 10))
-        ttk.Label(header_row, text="Odds", font=('Arial', 10, 'bold'), width=8).pack(side=tk.LEFT, padx=(0, 10))
-        ttk.Label(header_row, text="Stake", font=('Arial', 10, 'bold'), width=12).pack(side=tk.LEFT, padx=(0, 10))
-        ttk.Label(header_row, text="Potential Win", font=('Arial', 10, 'bold'), width=12).pack(side=tk.LEFT, padx=(0, 20))
-        ttk.Label(header_row, text="Result", font=('Arial', 10, 'bold'), width=15).pack(side=tk.LEFT)
-        
-        # Add separator
-        separator = ttk.Separator(scrollable_frame, orient='horizontal')
-        separator.pack(fill=tk.X, padx=5, pady=(0, 10))
-        
-        # Create result controls for each bet
-        for i, bet in enumerate(self.bets):
-            # Main bet frame with alternating colors
-            bet_frame = ttk.Frame(scrollable_frame)
-            bet_frame.pack(fill=tk.X, padx=5, pady=2)
-            
-            # Bet details in columns
-            ttk.Label(bet_frame, text=bet['name'][:15], width=15, 
-                     font=('Arial', 9, 'bold')).pack(side=tk.LEFT, padx=(0, 10))
-            ttk.Label(bet_frame, text=bet['description'][:20], width=20).pack(side=tk.LEFT, padx=(0, 10))
-            ttk.Label(bet_frame, text=f"{bet['odds']:.2f}", width=8).pack(side=tk.LEFT, padx=(0, 10))
-            ttk.Label(bet_frame, text=f"LKR {bet['stake']:.2f}", width=12).pack(side=tk.LEFT, padx=(0, 10))
-            ttk.Label(bet_frame, text=f"LKR {bet['potential_payout']:.2f}", width=12, 
-                     foreground='#27ae60').pack(side=tk.LEFT, padx=(0, 20))
-            
-            # Result selection with better styling
-            result_var = tk.StringVar(value=bet['status'] if bet['status'] != 'Pending' else 'Won')
-            self.result_vars.append(result_var)
-            
-            result_frame = ttk.Frame(bet_frame)
-            result_frame.pack(side=tk.LEFT)
-            
-            # Custom styled radio buttons
-            won_rb = ttk.Radiobutton(result_frame, text="Won", variable=result_var, 
-                                   value="Won", style="Success.TRadiobutton")
-            won_rb.pack(side=tk.LEFT, padx=(0, 15))
-            
-            lost_rb = ttk.Radiobutton(result_frame, text="Lost", variable=result_var, 
-                                    value="Lost", style="Danger.TRadiobutton")
-            lost_rb.pack(side=tk.LEFT)
-            
-            # Add subtle separator between bets
-            if i < len(self.bets) - 1:
-                ttk.Separator(scrollable_frame, orient='horizontal').pack(fill=tk.X, padx=20, pady=5)
-        
-        # Pack scrollbars and canvas
-        canvas.pack(side="left", fill="both", expand=True)
-        v_scrollbar.pack(side="right", fill="y")
-        h_scrollbar.pack(side="bottom", fill="x")
+        self.results_list = VirtualResultsList(content_frame, self.bets)
+        self.results_list.pack(fill=tk.BOTH, expand=True)
         
         # Action buttons with better styling
         button_frame = ttk.Frame(main_container)
@@ -678,48 +1209,260 @@ class BetSplitterApp:
         style = ttk.Style()
         style.configure("Success.TRadiobutton", foreground='#27ae60')
         style.configure("Danger.TRadiobutton", foreground='#e74c3c')
-        
-        # Bind mouse wheel scrolling
-        def on_mousewheel(event):
-            canvas.yview_scroll(int(-1*(event.delta/120)), "units")
-        canvas.bind_all("<MouseWheel>", on_mousewheel)
     
     def set_all_results(self, result):
         """Set all bets to the same result"""
-        for var in self.result_vars:
-            var.set(result)
+        self.results_list.set_all(STATUS_CODES[result])
         messagebox.showinfo("Updated", f"All bets set to '{result}'")
     
+    @timed
     def apply_bet_results(self, window):
         """Apply the bet results and close the window"""
-        for i, result_var in enumerate(self.result_vars):
-            self.bets[i]['status'] = result_var.get()
+        changed = {}
+        for bet_id, code in self.results_list.results().items():
+            bet = self.bet_index.get(bet_id)
+            if bet is None:
+                continue  # Deleted in the shared session while the dialog was open
+            status = STATUS_NAMES[code]
+            if bet['status'] != status:
+                self.totals.set_status(bet, status)
+                changed.setdefault(status, []).append(bet['id'])
+        self.check_totals()
+        for status, ids in changed.items():
+            self.record({'op': 'set_status', 'ids': ids, 'status': status})
         
         self.update_bets_display()
         window.destroy()
         messagebox.showinfo("Success", "Bet results have been updated!")
         
+    @timed
+    def toggle_odds_feed(self):
+        """Connect to a live odds feed, or disconnect from the current one"""
+        import queue
+        from odds_feed import DEFAULT_FEED_URL, OddsFeed
+        
+        if self.odds_feed:
+            self.stop_odds_feed()
+            self.odds_feed_btn.config(text="Connect Odds Feed")
+            self.show_status("Disconnected from the odds feed")
+            return
+            
+        url = simpledialog.askstring("Odds Feed", "Odds feed URL:", initialvalue=DEFAULT_FEED_URL)
+        if not url:
+            return
+        self.odds_updates = queue.Queue()
+        updates = self.odds_updates
+        self.odds_feed = OddsFeed(url.strip(),
+                                  on_prices=lambda prices: updates.put(('prices', prices)),
+                                  on_error=lambda message: updates.put(('error', message)))
+        self.odds_feed.start()
+        self.odds_feed_btn.config(text="Disconnect Odds Feed")
+        self.show_status(f"Connected to {url.strip()} - pending bets follow the market named like the bet")
+        self.root.after(ODDS_APPLY_MS, self.apply_odds_updates, self.odds_feed)
+        
+    def stop_odds_feed(self):
+        """Disconnect from the odds feed, dropping prices not applied yet"""
+        if self.odds_feed:
+            self.odds_feed.stop()
+        self.odds_feed = None
+        self.odds_updates = None
+        self.odds_backlog = {}
+        
+    @timed
+    def apply_odds_updates(self, feed):
+        """Drain the feed queue and re-price pending bets once for everything that moved"""
+        import queue
+        
+        if feed is not self.odds_feed:
+            return  # Disconnected (or replaced) since this was scheduled
+        error = None
+        while True:
+            try:
+                kind, data = self.odds_updates.get_nowait()
+            except queue.Empty:
+                break
+            if kind == 'prices':
+                self.odds_backlog.update(data)  # Later prices for a market replace earlier ones
+            else:
+                error = data
+        if error:
+            self.show_status(f"Odds feed unavailable, retrying: {error}")
+        if self.odds_backlog and self.current_session and not self.stream and not self.io_busy:
+            prices, self.odds_backlog = self.odds_backlog, {}
+            self.reprice_pending_bets(prices)
+        self.root.after(ODDS_APPLY_MS, self.apply_odds_updates, feed)
+        
+    def reprice_pending_bets(self, prices):
+        """Set new odds and payouts on the pending bets whose market moved"""
+        from odds_feed import repricing_plan
+        
+        plan = repricing_plan(self.bets, prices)
+        if not plan:
+            return
+        # Only pending bets change, so the running totals are unaffected
+        for bet, odds, payout in plan:
+            bet['odds'] = odds
+            bet['potential_payout'] = payout
+        self.record({'op': 'reprice', 'prices': [[bet['id'], odds, payout] for bet, odds, payout in plan]})
+        
+        reordered = self.bet_view.update(('odds', 'potential_payout'))
+        if getattr(self, 'bets_tree', None) and self.bets_tree.winfo_exists():
+            if reordered:
+                self.sync_bets_page()
+            for bet, _, _ in plan:
+                if bet['id'] in self.bet_rows:  # Rows not paged in yet pick the new odds up later
+                    self.bet_rows.upsert(bet['id'], self.bet_row_values(bet))
+        self.show_status(f"Odds feed re-priced {len(plan)} pending bet(s)")
+        
+    @timed
+    def show_what_if(self):
+        """Preview every bettor's payout over the possible outcomes of the pending bets"""
+        from scenarios import ScenarioEngine, histogram
+        
+        if not self.session_ready():
+            return
+        engine = ScenarioEngine(self.bettors, self.bets, self.total_pool)
+        if not engine.pending:
+            messagebox.showinfo("Info", "There are no pending bets to preview")
+            return
+            
+        whatif_window = tk.Toplevel(self.root)
+        whatif_window.title("What-If Preview")
+        whatif_window.geometry("950x650")
+        whatif_window.configure(bg='#f0f0f0')
+        
+        # Remove the tkinter icon from this window
+        self.remove_window_icon(whatif_window)
+        
+        main_frame = ttk.Frame(whatif_window, padding="15")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        
+        summary_label = ttk.Label(main_frame, text=f"Working out {len(engine.pending)} pending bet(s)...",
+                                  font=('Arial', 11, 'bold'))
+        summary_label.pack(anchor=tk.W)
+        ttk.Label(main_frame, text="Win chances are implied by the odds (1 / odds). "
+                                   "Double-click a pending bet to flip its result in the picked outcome.",
+                  foreground='#7f8c8d').pack(anchor=tk.W, pady=(0, 10))
+        
+        # Per-bettor payouts across the distribution and for the picked outcome
+        bettor_columns = ('Bettor', 'Stake', 'Worst', '5%', 'Median', 'Expected', '95%', 'Best', 'Picked Outcome')
+        bettor_tree = ttk.Treeview(main_frame, columns=bettor_columns, show='headings', height=6)
+        for col in bettor_columns:
+            bettor_tree.heading(col, text=col)
+            bettor_tree.column(col, width=120 if col in ('Bettor', 'Picked Outcome') else 90)
+        bettor_tree.pack(fill=tk.X)
+        
+        # Distribution of the final amount
+        histogram_canvas = tk.Canvas(main_frame, height=140, bg='white', highlightthickness=0)
+        histogram_canvas.pack(fill=tk.X, pady=(10, 10))
+        
+        # Pending bets whose result can be picked; very long lists are left out
+        won_ids = set()
+        pick_tree = None
+        if len(engine.pending) <= 500:
+            pick_columns = ('Bet', 'Description', 'Odds', 'Payout', 'Chance', 'Picked')
+            pick_tree = ttk.Treeview(main_frame, columns=pick_columns, show='headings')
+            for col in pick_columns:
+                pick_tree.heading(col, text=col)
+                pick_tree.column(col, width=220 if col == 'Description' else 100)
+            pick_tree.pack(fill=tk.BOTH, expand=True)
+            for bet in engine.pending:
+                pick_tree.insert('', tk.END, iid=bet['id'], values=(
+                    bet['name'], bet['description'], f"{bet['odds']:.2f}",
+                    f"LKR {bet['potential_payout']:.2f}", f"{100 / bet['odds']:.0f}%" if bet['odds'] > 0 else "0%",
+                    'Lost'
+                ))
+        else:
+            ttk.Label(main_frame, text="Too many pending bets to pick results one by one; "
+                                       "the picked outcome assumes every pending bet loses.").pack(anchor=tk.W)
+            
+        rows = {}
+        
+        def show_picked():
+            picked = engine.scenario(won_ids)
+            for name, share in zip(engine.bettor_names, picked):
+                if name in rows:
+                    bettor_tree.set(rows[name], 'Picked Outcome', f"LKR {from_cents(share):.2f}")
+                    
+        def flip(event):
+            bet_id = pick_tree.identify_row(event.y)
+            if not bet_id:
+                return
+            if bet_id in won_ids:
+                won_ids.discard(bet_id)
+            else:
+                won_ids.add(bet_id)
+            pick_tree.set(bet_id, 'Picked', 'Won' if bet_id in won_ids else 'Lost')
+            show_picked()
+            
+        def draw_histogram(result):
+            histogram_canvas.delete('all')
+            histogram_canvas.update_idletasks()
+            width = max(histogram_canvas.winfo_width(), 600)
+            height = int(histogram_canvas['height'])
+            bins = histogram(result)
+            tallest = max(probability for _, _, probability in bins) or 1
+            bar_width = (width - 20) / len(bins)
+            for i, (low, high, probability) in enumerate(bins):
+                bar_height = (height - 30) * probability / tallest
+                x = 10 + i * bar_width
+                histogram_canvas.create_rectangle(x, height - 20 - bar_height, x + bar_width - 2, height - 20,
+                                                  fill='#2980b9', outline='')
+            histogram_canvas.create_text(10, height - 8, anchor=tk.W,
+                                         text=f"LKR {from_cents(bins[0][0]):,.0f}")
+            histogram_canvas.create_text(width - 10, height - 8, anchor=tk.E,
+                                         text=f"LKR {from_cents(bins[-1][1]):,.0f}")
+            histogram_canvas.create_text(width / 2, 10, text="Final amount to share out")
+            
+        def analysed(result):
+            if not whatif_window.winfo_exists():
+                return
+            if result.method == 'exact':
+                method = f"exact over all {2 ** len(engine.pending):,} combinations ({len(result.outcomes):,} distinct totals)"
+            else:
+                method = f"Monte Carlo estimate from {result.samples:,} samples"
+            summary_label.config(text=f"{len(engine.pending)} pending bet(s) - {method}. "
+                                      f"Expected final amount: LKR {from_cents(result.expected):,.2f}")
+            for values in engine.bettor_table(result):
+                name = values[0]
+                rows[name] = bettor_tree.insert('', tk.END, values=tuple(
+                    [name] + [f"LKR {amount:.2f}" for amount in values[1:]] + ['']))
+            show_picked()
+            draw_histogram(result)
+            
+        def failed(e):
+            if whatif_window.winfo_exists():
+                summary_label.config(text=f"Could not work out the preview: {str(e)}")
+                
+        if pick_tree is not None:
+            pick_tree.bind('<Double-1>', flip)
+        when_done(self.root, submit(engine.analyse), analysed, failed)
+        
     def calculate_results(self):
         """Calculate and display final results"""
+        if not self.session_ready():
+            return
         if not self.bets:
             messagebox.showinfo("Info", "No bets to calculate")
             return
             
         # Check if all bets have results
-        pending_bets = [bet for bet in self.bets if bet['status'] == 'Pending']
+        pending_bets = self.totals.pending_count
         if pending_bets:
             response = messagebox.askyesno("Pending Bets", 
-                                         f"There are {len(pending_bets)} bets with pending results. "
+                                         f"There are {pending_bets} bets with pending results. "
                                          "Do you want to set results for all bets first?")
             if response:
                 self.set_bet_results()
                 return
             
         # Calculate totals
-        total_stake = sum(bet['stake'] for bet in self.bets)
-        total_won = sum(bet['potential_payout'] for bet in self.bets if bet['status'] == 'Won')
-        total_lost = sum(bet['stake'] for bet in self.bets if bet['status'] == 'Lost')
-        total_profit = total_won - total_stake
+        result = settle(self.bettors, self.bets, self.total_pool)
+        total_stake = result['total_stake']
+        total_won = result['total_won']
+        total_lost = result['total_lost']
+        total_void = result['total_void']
+        total_profit = result['total_profit']
         
         # Create results window
         results_window = tk.Toplevel(self.root)
@@ -740,6 +1483,8 @@ class BetSplitterApp:
         ttk.Label(summary_frame, text=f"Total Stakes: LKR {total_stake:.2f}", font=('Arial', 11)).pack(anchor=tk.W)
         ttk.Label(summary_frame, text=f"Total Winnings: LKR {total_won:.2f}", font=('Arial', 11)).pack(anchor=tk.W)
         ttk.Label(summary_frame, text=f"Total Losses: LKR {total_lost:.2f}", font=('Arial', 11)).pack(anchor=tk.W)
+        if total_void:
+            ttk.Label(summary_frame, text=f"Void Stakes Returned: LKR {total_void:.2f}", font=('Arial', 11)).pack(anchor=tk.W)
         ttk.Label(summary_frame, text=f"Net Profit/Loss: LKR {total_profit:.2f}", 
                  font=('Arial', 12, 'bold')).pack(anchor=tk.W)
         
@@ -747,9 +1492,8 @@ class BetSplitterApp:
         payout_frame = ttk.LabelFrame(main_frame, text="Payout Distribution", padding="15")
         payout_frame.pack(fill=tk.BOTH, expand=True)
         
-        # Calculate each bettor's share INCLUDING LEFTOVER MONEY
-        leftover_money = self.get_available_pool()  # Money not used in bets
-        final_amount = self.total_pool + total_profit  # Original pool + profit/loss
+        # Each bettor's share INCLUDING LEFTOVER MONEY
+        leftover_money = result['leftover_money']  # Money not used in bets
         
         # Show leftover money info
         if leftover_money > 0:
@@ -774,96 +1518,576 @@ class BetSplitterApp:
         payout_tree.pack(fill=tk.BOTH, expand=True)
         
         # Add payout data with leftover money calculation
-        for bettor in self.bettors:
-            percentage = bettor['stake'] / self.total_pool
+        for payout in result['payouts']:
+            payout_tree.insert('', tk.END, values=(
+                payout['name'],
+                f"LKR {payout['stake']:.2f}",
+                f"{payout['percentage']*100:.1f}%",
+                f"LKR {payout['share_of_winnings']:.2f}",
+                f"LKR {payout['share_of_leftover']:.2f}",
+                f"LKR {payout['final_payout']:.2f}",
+                f"LKR {payout['net_profit_loss']:.2f}"
+            ))
             
-            # Share of winnings/losses (excluding leftover)
-            share_of_winnings = (self.total_pool + total_profit - leftover_money) * percentage
+        actions_frame = ttk.Frame(main_frame)
+        actions_frame.pack(fill=tk.X, pady=(10, 0))
+        
+        export_btn = ttk.Button(actions_frame, text="Export Results...", command=lambda: self.export_results(result))
+        export_btn.pack(side=tk.RIGHT)
+        
+        # Only fully settled sessions saved to a file go into the cross-session ledger, keyed on that file
+        if not result['pending_count'] and self.session_path:
+            ledger_label = ttk.Label(actions_frame, text="", foreground='#7f8c8d')
+            ledger_label.pack(side=tk.LEFT)
+            ledger_btn = ttk.Button(actions_frame, text="Post to Bettor Ledger",
+                                    command=lambda: self.post_to_ledger(result, ledger_btn, ledger_label))
+            ledger_btn.pack(side=tk.RIGHT, padx=(0, 10))
             
-            # Share of leftover money
-            share_of_leftover = leftover_money * percentage
+    def export_results(self, result):
+        """Write the payout table and a per-bet breakdown to CSV or Parquet files"""
+        from export import SessionSource, bets_path_for, export_results, pyarrow
+        
+        event_name = self.current_session['event'].replace(' ', '_').replace('/', '_').replace('\\', '_')
+        filetypes = [("CSV files", "*.csv")]
+        if pyarrow:
+            filetypes.append(("Parquet files", "*.parquet"))
+        filename = filedialog.asksaveasfilename(
+            title="Export Results",
+            initialdir=app_dir(),
+            initialfile=f"results_{event_name}.csv",
+            defaultextension=".csv",
+            filetypes=filetypes
+        )
+        if not filename:
+            return
             
-            # Final payout = initial stake portion of winnings + leftover share
-            final_payout = share_of_winnings + share_of_leftover
+        # Write a copy so later edits cannot change the lists mid-export
+        source = SessionSource.from_session(dict(self.current_session, bettors=list(self.bettors),
+                                                 bets=list(self.bets), total_pool=self.total_pool))
+        
+        def exported(written):
+            messagebox.showinfo("Export Results", "Exported:\n\n" + "\n".join(
+                f"{os.path.basename(path)} ({rows} rows)" for path, rows in written))
             
-            # Net profit/loss compared to initial stake
-            net_profit_loss = final_payout - bettor['stake']
+        def failed(e):
+            messagebox.showerror("Error", f"Failed to export results: {str(e)}")
             
-            payout_tree.insert('', tk.END, values=(
-                bettor['name'],
-                f"LKR {bettor['stake']:.2f}",
-                f"{percentage*100:.1f}%",
-                f"LKR {share_of_winnings:.2f}",
-                f"LKR {share_of_leftover:.2f}",
-                f"LKR {final_payout:.2f}",
-                f"LKR {net_profit_loss:.2f}"
-            ))
+        self.show_status(f"Exporting to {os.path.basename(filename)} and "
+                         f"{os.path.basename(bets_path_for(filename))}...")
+        when_done(self.root, submit(export_results, source, filename, result), exported, failed)
+        
+    def post_to_ledger(self, result, button, label):
+        """Post settled results to the bettor ledger on a worker, under the saved session file"""
+        from ledger import post_session
+        
+        display_name = os.path.basename(self.session_path)
+        if not messagebox.askyesno("Bettor Ledger", f"Record these results in the bettor ledger as {display_name}?\n\n"
+                                                    "Posting the same file again replaces its earlier results."):
+            return
+        session = dict(self.current_session, bettors=[], bets=[])  # Only the header is needed
+        future = submit(post_session, ledger_path(), self.session_path, session, result)
+        button.config(state=tk.DISABLED)
+        label.config(text="Posting to bettor ledger...", foreground='#7f8c8d')
+        
+        def posted(_):
+            if label.winfo_exists():
+                label.config(text=f"Recorded in the bettor ledger as {display_name}")
+                
+        def failed(e):
+            if label.winfo_exists():
+                label.config(text=f"Bettor ledger not updated: {str(e)}", foreground='#c0392b')
+                button.config(state=tk.NORMAL)
+                
+        when_done(self.root, future, posted, failed)
+        
+    def show_ledger(self):
+        """Show running per-bettor balances from the ledger for a chosen period"""
+        from ledger import Ledger
+        
+        ledger_window = tk.Toplevel(self.root)
+        ledger_window.title("Bettor Ledger")
+        ledger_window.geometry("700x450")
+        ledger_window.configure(bg='#f0f0f0')
+        
+        # Remove the tkinter icon from this window
+        self.remove_window_icon(ledger_window)
+        
+        main_frame = ttk.Frame(ledger_window, padding="15")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        
+        controls = ttk.Frame(main_frame)
+        controls.pack(fill=tk.X, pady=(0, 10))
+        
+        kinds = {"All Time": 'all', "Season": 'season', "Month": 'month'}
+        ttk.Label(controls, text="Period:").pack(side=tk.LEFT, padx=(0, 5))
+        kind_var = tk.StringVar(value="All Time")
+        kind_box = ttk.Combobox(controls, textvariable=kind_var, values=list(kinds), state='readonly', width=10)
+        kind_box.pack(side=tk.LEFT, padx=(0, 10))
+        period_var = tk.StringVar()
+        period_box = ttk.Combobox(controls, textvariable=period_var, state='readonly', width=10)
+        period_box.pack(side=tk.LEFT)
+        
+        columns = ('Bettor', 'Sessions', 'Total Stake', 'Total Payout', 'Net Profit/Loss')
+        balances_tree = ttk.Treeview(main_frame, columns=columns, show='headings')
+        for col in columns:
+            balances_tree.heading(col, text=col)
+            balances_tree.column(col, width=120)
+        balances_tree.pack(fill=tk.BOTH, expand=True)
+        
+        def show_balances(event=None):
+            try:
+                with Ledger(ledger_path()) as ledger:
+                    rows = ledger.balances(kinds[kind_var.get()], period_var.get())
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to read ledger: {str(e)}")
+                return
+            balances_tree.delete(*balances_tree.get_children())
+            for row in rows:
+                balances_tree.insert('', tk.END, values=(
+                    row['name'], row['sessions'], f"LKR {format_cents(row['stake_cents'])}",
+                    f"LKR {format_cents(row['final_payout_cents'])}",
+                    f"LKR {format_cents(row['net_profit_loss_cents'])}"
+                ))
+                
+        def choose_kind(event=None):
+            kind = kinds[kind_var.get()]
+            try:
+                with Ledger(ledger_path()) as ledger:
+                    periods = ledger.periods(kind)
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to read ledger: {str(e)}")
+                return
+            period_box.config(values=periods, state='disabled' if kind == 'all' else 'readonly')
+            period_var.set(periods[-1] if periods else '')  # Latest season/month first
+            show_balances()
+            
+        kind_box.bind('<<ComboboxSelected>>', choose_kind)
+        period_box.bind('<<ComboboxSelected>>', show_balances)
+        choose_kind()
             
+    @timed
     def save_session(self):
         """Save the current session to a JSON file - FIXED: Added file dialog"""
+        if not self.session_ready():
+            return
         if not self.current_session:
             messagebox.showinfo("Info", "No session to save")
             return
             
-        # Update session data
-        self.current_session['bettors'] = self.bettors
-        self.current_session['bets'] = self.bets
-        self.current_session['total_pool'] = self.total_pool
-        
-        # Generate default filename
-        event_name = self.current_session['event'].replace(' ', '_').replace('/', '_').replace('\\', '_')
-        date_str = datetime.now().strftime("%Y%m%d_%H%M%S")
-        default_filename = f"betting_session_{event_name}_{date_str}.json"
-        
-        # Get the directory where the Python file is located
-        current_dir = os.path.dirname(os.path.abspath(__file__))
+        # Default to the file this session is already journaled to
+        if self.journal:
+            current_dir, default_filename = os.path.split(self.journal.snapshot_path)
+        else:
+            current_dir, default_filename = app_dir(), self.default_session_filename()
         
         # Open save file dialog
         filename = filedialog.asksaveasfilename(
             title="Save Betting Session",
             initialdir=current_dir,
             initialfile=default_filename,
-            filetypes=[("JSON files", "*.json"), ("All files", "*.*")],
+            filetypes=[("JSON files", "*.json"), ("Compact columnar files", "*" + COLUMNAR_SUFFIX), ("All files", "*.*")],
             defaultextension=".json"
         )
         
         if not filename:
             return  # User cancelled the save dialog
             
-        try:
-            with open(filename, 'w') as f:
-                json.dump(self.current_session, f, indent=2)
+        session = self.session_snapshot()
+        same_file = self.journal and os.path.abspath(self.journal.snapshot_path) == os.path.abspath(filename)
+        if same_file:
+            future = submit(self.journal.compact, session)
+        else:
+            session['journal_seq'] = 0
+            future = submit(write_snapshot, session, filename)
             
-            # Get just the filename for display (not full path)
-            display_name = os.path.basename(filename)
+        # Get just the filename for display (not full path)
+        display_name = os.path.basename(filename)
+        dialog = ProgressDialog(self.root, "Saving", f"Saving {display_name}...")
+        self.io_busy = True
+        
+        def saved(result):
+            dialog.close()
+            self.io_busy = False
+            if not same_file:
+                # Saved somewhere new: the old journal is fully captured by the new snapshot
+                self.close_journal(remove=True)
+                self.start_journal(filename)
+            self.session_path = filename
+            self.index_session(filename)
             messagebox.showinfo("Success", f"Session saved as {display_name}")
             
-        except Exception as e:
+        def failed(e):
+            dialog.close()
+            self.io_busy = False
             messagebox.showerror("Error", f"Failed to save session: {str(e)}")
             
+        when_done(self.root, future, saved, failed)
+            
+    def index_session(self, filename):
+        """Record a saved session in the session index on a worker"""
+        from session_index import index_saved_session
+        
+        # Shallow copies so later edits on the Tk thread can't race the worker
+        session = dict(self.current_session, bettors=list(self.bettors), bets=list(self.bets))
+        result = settle(self.bettors, self.bets, self.total_pool)
+        future = submit(index_saved_session, index_path(), filename, session, result)
+        when_done(self.root, future, lambda result: None,
+                  lambda e: self.show_status(f"Session index not updated: {str(e)}"))
+        
+    def show_diagnostics(self):
+        """Hidden panel (Ctrl+Shift+D) with per-handler timings and counters"""
+        diag_window = tk.Toplevel(self.root)
+        diag_window.title("Diagnostics")
+        diag_window.geometry("700x500")
+        diag_window.configure(bg='#f0f0f0')
+        
+        # Remove the tkinter icon from this window
+        self.remove_window_icon(diag_window)
+        
+        main_frame = ttk.Frame(diag_window, padding="15")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        
+        state_label = ttk.Label(main_frame, text="", font=('Arial', 10, 'bold'))
+        state_label.pack(anchor=tk.W, pady=(0, 10))
+        
+        handler_columns = ('Handler', 'Calls', 'Total ms', 'Mean ms', 'Max ms')
+        handler_tree = ttk.Treeview(main_frame, columns=handler_columns, show='headings', height=12)
+        for col in handler_columns:
+            handler_tree.heading(col, text=col)
+            handler_tree.column(col, width=260 if col == 'Handler' else 90)
+        handler_tree.pack(fill=tk.BOTH, expand=True)
+        
+        counter_tree = ttk.Treeview(main_frame, columns=('Counter', 'Value'), show='headings', height=6)
+        for col in ('Counter', 'Value'):
+            counter_tree.heading(col, text=col)
+        counter_tree.pack(fill=tk.X, pady=(10, 0))
+        
+        def refresh():
+            state_label.config(text="Profiling is ON" if profiler.enabled else
+                               "Profiling is OFF - start with --profile or BET_SPLITTER_PROFILE=1, or enable it here")
+            toggle_btn.config(text="Disable Profiling" if profiler.enabled else "Enable Profiling")
+            rows, counters = profiler.summary()
+            handler_tree.delete(*handler_tree.get_children())
+            for name, calls, total, longest in rows:
+                handler_tree.insert('', tk.END, values=(
+                    name, calls, f"{total * 1000:.1f}", f"{total * 1000 / calls:.2f}", f"{longest * 1000:.1f}"
+                ))
+            # Live figures are read now; the rest were recorded while profiling
+            counters['widgets (now)'] = count_widgets(self.root)
+            counters['bets in session'] = len(self.bets)
+            if hasattr(self, 'bet_rows') and self.bets_tree.winfo_exists():
+                counters['bet rows in table'] = len(self.bet_rows.values)
+            counter_tree.delete(*counter_tree.get_children())
+            for name in sorted(counters):
+                counter_tree.insert('', tk.END, values=(name, f"{counters[name]:,}"))
+                
+        def toggle():
+            profiler.enabled = not profiler.enabled
+            refresh()
+            
+        def reset():
+            profiler.reset()
+            refresh()
+            
+        def export():
+            filename = filedialog.asksaveasfilename(
+                parent=diag_window,
+                title="Export Trace",
+                initialdir=app_dir(),
+                initialfile="bet-splitter-trace.json",
+                filetypes=[("Chrome trace files", "*.json"), ("All files", "*.*")],
+                defaultextension=".json"
+            )
+            if not filename:
+                return
+            try:
+                profiler.export_trace(filename)
+            except OSError as e:
+                messagebox.showerror("Error", f"Failed to export trace: {str(e)}", parent=diag_window)
+                return
+            messagebox.showinfo("Trace Exported",
+                                f"Saved {os.path.basename(filename)} - open it in chrome://tracing or ui.perfetto.dev",
+                                parent=diag_window)
+            
+        button_frame = ttk.Frame(main_frame)
+        button_frame.pack(fill=tk.X, pady=(10, 0))
+        toggle_btn = ttk.Button(button_frame, text="", command=toggle)
+        toggle_btn.pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Button(button_frame, text="Refresh", command=refresh).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Button(button_frame, text="Reset", command=reset).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Button(button_frame, text="Export Trace...", command=export).pack(side=tk.LEFT)
+        refresh()
+        
+    def search_sessions(self):
+        """Search the saved-session index by bettor, event and date"""
+        from session_index import SessionIndex, update_index
+        
+        search_window = tk.Toplevel(self.root)
+        search_window.title("Search Saved Sessions")
+        search_window.geometry("900x550")
+        search_window.configure(bg='#f0f0f0')
+        
+        # Remove the tkinter icon from this window
+        self.remove_window_icon(search_window)
+        
+        main_frame = ttk.Frame(search_window, padding="15")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        
+        # Filters
+        filter_frame = ttk.LabelFrame(main_frame, text="Filters", padding="10")
+        filter_frame.pack(fill=tk.X, pady=(0, 10))
+        
+        filters = {}
+        for column, (key, label, width) in enumerate((('bettor', "Bettor:", 15), ('event', "Event:", 20),
+                                                      ('since', "From (YYYY-MM-DD):", 12),
+                                                      ('until', "Before (YYYY-MM-DD):", 12))):
+            ttk.Label(filter_frame, text=label).grid(row=0, column=column * 2, sticky=tk.W, padx=(0, 5))
+            filters[key] = ttk.Entry(filter_frame, width=width)
+            filters[key].grid(row=0, column=column * 2 + 1, padx=(0, 10))
+            
+        status_label = ttk.Label(main_frame, text="", foreground='#7f8c8d')
+        
+        # Results: matching sessions and per-bettor totals over the same dates
+        notebook = ttk.Notebook(main_frame)
+        notebook.pack(fill=tk.BOTH, expand=True)
+        
+        sessions_frame = ttk.Frame(notebook)
+        notebook.add(sessions_frame, text="Sessions")
+        session_columns = ('Date', 'Event', 'Bettors', 'Pool', 'Bets', 'Pending', 'Net Profit/Loss')
+        sessions_tree = ttk.Treeview(sessions_frame, columns=session_columns, show='headings')
+        for col in session_columns:
+            sessions_tree.heading(col, text=col)
+            sessions_tree.column(col, width=220 if col == 'Bettors' else 90)
+        sessions_tree.pack(fill=tk.BOTH, expand=True)
+        
+        totals_frame = ttk.Frame(notebook)
+        notebook.add(totals_frame, text="Bettor Totals")
+        totals_columns = ('Bettor', 'Sessions', 'Total Stake', 'Total Payout', 'Net Profit/Loss')
+        totals_tree = ttk.Treeview(totals_frame, columns=totals_columns, show='headings')
+        for col in totals_columns:
+            totals_tree.heading(col, text=col)
+            totals_tree.column(col, width=120)
+        totals_tree.pack(fill=tk.BOTH, expand=True)
+        
+        def run_search():
+            values = {key: entry.get().strip() or None for key, entry in filters.items()}
+            try:
+                with SessionIndex(index_path()) as index:
+                    sessions = index.sessions(**values)
+                    totals = index.bettor_totals(values['since'], values['until'])
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to search sessions: {str(e)}")
+                return
+            
+            sessions_tree.delete(*sessions_tree.get_children())
+            for row in sessions:
+                sessions_tree.insert('', tk.END, iid=row['path'], values=(
+                    row['date'], row['event'], row['bettors'] or '',
+                    f"LKR {format_cents(row['total_pool_cents'])}", row['bet_count'], row['pending_count'],
+                    f"LKR {format_cents(row['total_profit_cents'])}"
+                ))
+            totals_tree.delete(*totals_tree.get_children())
+            for row in totals:
+                totals_tree.insert('', tk.END, values=(
+                    row['name'], row['sessions'], f"LKR {format_cents(row['stake_cents'])}",
+                    f"LKR {format_cents(row['final_payout_cents'])}", f"LKR {format_cents(row['net_profit_loss_cents'])}"
+                ))
+            status_label.config(text=f"{len(sessions)} session(s) found - double-click one to open it")
+            
+        def rescan():
+            rescan_btn.config(state=tk.DISABLED)
+            status_label.config(text="Scanning saved sessions...")
+            
+            def done(result):
+                indexed, removed, errors = result
+                if rescan_btn.winfo_exists():
+                    rescan_btn.config(state=tk.NORMAL)
+                    status_label.config(text=f"Indexed {indexed} session(s), removed {removed}, "
+                                             f"{len(errors)} could not be read")
+                    run_search()
+                    
+            def failed(e):
+                if rescan_btn.winfo_exists():
+                    rescan_btn.config(state=tk.NORMAL)
+                messagebox.showerror("Error", f"Failed to scan sessions: {str(e)}")
+                
+            when_done(self.root, submit(update_index, index_path(), app_dir()), done, failed)
+            
+        def open_selected(event=None):
+            selection = sessions_tree.selection()
+            if not selection:
+                return
+            path = selection[0]
+            if not os.path.exists(path):
+                messagebox.showerror("Error", "File not found")
+                return
+            search_window.destroy()
+            self.open_session_file(path)
+            
+        sessions_tree.bind('<Double-1>', open_selected)
+        
+        ttk.Button(filter_frame, text="Search", command=run_search).grid(row=0, column=8, padx=(0, 5))
+        rescan_btn = ttk.Button(filter_frame, text="Rescan Folder", command=rescan)
+        rescan_btn.grid(row=0, column=9)
+        for entry in filters.values():
+            entry.bind('<Return>', lambda event: run_search())
+            
+        status_label.pack(anchor=tk.W, pady=(10, 0))
+        run_search()
+        
+    @timed
     def load_session(self):
         """Load a previous session - FIXED: Added file dialog"""
         # Get the directory where the Python file is located
-        current_dir = os.path.dirname(os.path.abspath(__file__))
+        current_dir = app_dir()
         
         # Open file dialog to select JSON file
         filename = filedialog.askopenfilename(
             title="Select Betting Session File",
             initialdir=current_dir,
-            filetypes=[("JSON files", "*.json"), ("All files", "*.*")],
+            filetypes=[("JSON files", "*.json"), ("Compact columnar files", "*" + COLUMNAR_SUFFIX),
+                       ("Session journals", "*" + JOURNAL_SUFFIX), ("All files", "*.*")],
             defaultextension=".json"
         )
         
         if not filename:
             return
+        self.open_session_file(filename)
+        
+    @timed
+    def open_session_file(self, filename):
+        """Load a session file picked from the file dialog or the session index"""
+        # A journal on its own recovers a session that was never saved
+        if filename.endswith(JOURNAL_SUFFIX):
+            filename = filename[:-len(JOURNAL_SUFFIX)]
             
-        try:
-            with open(filename, 'r') as f:
-                self.current_session = json.load(f)
+        # Huge JSON files are streamed so the first page shows before the whole file is read
+        if (not filename.endswith(COLUMNAR_SUFFIX) and os.path.exists(filename)
+                and os.path.getsize(filename) >= LAZY_LOAD_BYTES
+                and not os.path.exists(journal_path(filename))):
+            self.start_lazy_load(filename)
+            return
+            
+        # Parse on a worker; very large JSON files get their own process
+        use_process = (not filename.endswith(COLUMNAR_SUFFIX) and os.path.exists(filename)
+                       and os.path.getsize(filename) >= LARGE_FILE_BYTES)
+        progress = None if use_process else Progress()
+        future = submit(read_session, filename, progress, use_process=use_process)
+        
+        dialog = ProgressDialog(self.root, "Loading", f"Loading {os.path.basename(filename)}...")
+        self.io_busy = True
+        
+        def loaded(result):
+            dialog.close()
+            self.io_busy = False
+            self.finish_load(filename, result)
+            
+        def failed(e):
+            dialog.close()
+            self.io_busy = False
+            if isinstance(e, FileNotFoundError):
+                messagebox.showerror("Error", "File not found")
+            elif isinstance(e, json.JSONDecodeError):
+                messagebox.showerror("Error", "Invalid JSON file format")
+            else:
+                messagebox.showerror("Error", f"Failed to load session: {str(e)}")
                 
+        when_done(self.root, future, loaded, failed, on_poll=lambda: dialog.show(progress))
+        
+    def start_lazy_load(self, filename):
+        """Stream a large session in, painting the first page as soon as it arrives"""
+        self.close_journal()
+        self.stop_odds_feed()
+        self.current_session = None
+        self.session_path = filename
+        self.bettors = []
+        self.bettor_names = set()
+        self.bets = []
+        self.bet_index = {}
+        self.total_pool = 0
+        self.totals = SessionTotals()
+        self.stream = StreamedSession(filename).start()
+        self.root.after(20, lambda: self.poll_lazy_load(self.stream, filename))
+        
+    @timed
+    def poll_lazy_load(self, stream, filename):
+        """Move newly parsed bets into the session and the first table page"""
+        if stream is not self.stream:
+            return  # Another session was started or loaded meanwhile
+            
+        # Read done first: the reader sets it only after queueing its last bet
+        done = stream.done
+        # Aggregates are updated as bets arrive; rows are only built for visible pages
+        batch = stream.take_bets()
+        for bet in batch:
+            index_bet(bet, self.bet_index, len(self.bets))
+            self.bets.append(bet)
+            self.totals.add_bet(bet)
+        if self.bet_view.bets is self.bets:
+            self.bet_view.add(batch)
+            
+        if stream.error:
+            self.stream = None
+            messagebox.showerror("Error", f"Failed to load session: {str(stream.error)}")
+            self.create_main_menu()
+            return
+            
+        if self.current_session is None:
+            # First paint once the header and a page of bets (or the whole file) are in
+            if done or (stream.header('bettors') is not None and len(self.bets) >= BETS_PAGE_SIZE):
+                fields = stream.header_fields()
+                self.current_session = fields
+                self.bettors = fields.get('bettors', [])
+                self.bettor_names = {bettor_key(bettor['name']) for bettor in self.bettors}
+                # total_pool is written after the bets; use the bettors' stakes until it arrives
+                self.total_pool = fields.get('total_pool', add_amounts(*(bettor['stake'] for bettor in self.bettors)))
+                if self.bets:
+                    self.create_betting_page()
+                else:
+                    self.create_bettors_page()
+        elif hasattr(self, 'bets_tree') and self.bets_tree.winfo_exists():
+            if self.bets_shown < BETS_PAGE_SIZE:
+                self.show_more_bets(BETS_PAGE_SIZE - self.bets_shown)
+            self.update_bets_count()
+            self.update_pool_display()
+            
+        if done and self.current_session is not None:
+            self.stream = None
+            self.current_session.update(stream.header_fields())
+            self.total_pool = self.current_session.get('total_pool', self.total_pool)
+            self.current_session['bettors'] = self.bettors
+            self.current_session['bets'] = self.bets
+            try:
+                self.start_journal(filename, self.current_session.get('journal_seq', 0))
+            except OSError:
+                self.journal = None
+            self.update_pool_display()
+            self.show_status(f"Session '{self.current_session.get('event', 'Unknown')}' loaded: {len(self.bets)} bets")
+            return
+            
+        if self.current_session is not None:
+            self.show_status(f"Loading bets... {len(self.bets)} so far")
+        self.root.after(50, lambda: self.poll_lazy_load(stream, filename))
+        
+    @timed
+    def finish_load(self, filename, loaded):
+        """Swap in a session parsed by read_session and show it"""
+        try:
+            self.stop_odds_feed()
+            self.current_session, self.bet_index, self.totals = loaded
+            
             self.bettors = self.current_session.get('bettors', [])
+            self.bettor_names = {bettor_key(bettor['name']) for bettor in self.bettors}
             self.bets = self.current_session.get('bets', [])
             self.total_pool = self.current_session.get('total_pool', 0)
+            # A session recovered from its journal alone has not been saved yet
+            self.session_path = filename if os.path.exists(filename) else None
+            
+            # Keep journaling further changes next to the loaded file
+            try:
+                self.start_journal(filename, self.current_session.get('journal_seq', 0))
+            except OSError:
+                self.journal = None  # Read-only location; changes are kept until saved elsewhere
             
             # Go directly to betting page if there are bets, otherwise go to bettors page
             if self.bets:
@@ -873,17 +2097,249 @@ class BetSplitterApp:
                 
             messagebox.showinfo("Success", f"Session '{self.current_session.get('event', 'Unknown')}' loaded successfully")
             
-        except FileNotFoundError:
-            messagebox.showerror("Error", "File not found")
-        except json.JSONDecodeError:
-            messagebox.showerror("Error", "Invalid JSON file format")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load session: {str(e)}")
 
-def main():
+def main(trace_path=None):
+    env_trace_path = enable_from_env()
+    trace_path = trace_path or env_trace_path
     root = tk.Tk()
     app = BetSplitterApp(root)
+    if os.environ.get(EXIT_AFTER_PAINT_ENV):
+        # Used by benchmarks/startup.py to time launch-to-main-menu
+        root.after_idle(root.after, 0, root.destroy)
     root.mainloop()
+    if trace_path:
+        profiler.export_trace(trace_path)
+
+def batch_main(args):
+    """Settle every saved session under a directory into one ledger"""
+    from batch import settle_directory
+    
+    totals, errors = settle_directory(args.directory, args.ledger, workers=args.workers)
+    
+    for path, error in errors:
+        print(f"Failed to settle {path}: {error}", file=sys.stderr)
+        
+    print(f"{'Bettor':<20} {'Sessions':>8} {'Stake':>14} {'Payout':>14} {'Net P/L':>14}")
+    for name in sorted(totals, key=str.casefold):
+        bettor = totals[name]
+        print(f"{name:<20} {bettor['sessions']:>8} {bettor['stake']:>14.2f} "
+              f"{bettor['final_payout']:>14.2f} {bettor['net_profit_loss']:>14.2f}")
+    print(f"Ledger written to {args.ledger}")
+    
+    return 1 if errors else 0
+
+def convert_main(args):
+    """Convert a session between the JSON and compact columnar formats"""
+    from columnar import columnar_to_json, json_to_columnar
+    
+    if args.source.endswith(COLUMNAR_SUFFIX):
+        columnar_to_json(args.source, args.destination)
+    else:
+        json_to_columnar(args.source, args.destination)
+    print(f"Converted {args.source} -> {args.destination}")
+    return 0
+
+def index_main(args):
+    """Update or query the saved-session index"""
+    from session_index import SessionIndex, update_index
+    
+    if args.action == 'update':
+        indexed, removed, errors = update_index(args.db, args.directory)
+        for path, error in errors:
+            print(f"Failed to index {path}: {error}", file=sys.stderr)
+        print(f"Indexed {indexed} session(s), removed {removed} missing file(s)")
+        return 1 if errors else 0
+        
+    with SessionIndex(args.db) as index:
+        if args.action == 'sessions':
+            rows = index.sessions(args.bettor, args.event, args.since, args.until)
+            print(f"{'Date':<20} {'Event':<30} {'Pool':>12} {'Net P/L':>12}  File")
+            for row in rows:
+                print(f"{row['date']:<20} {row['event']:<30} {format_cents(row['total_pool_cents']):>12} "
+                      f"{format_cents(row['total_profit_cents']):>12}  {row['path']}")
+        else:
+            rows = index.bettor_totals(args.since, args.until)
+            print(f"{'Bettor':<20} {'Sessions':>8} {'Stake':>14} {'Payout':>14} {'Net P/L':>14}")
+            for row in rows:
+                print(f"{row['name']:<20} {row['sessions']:>8} {format_cents(row['stake_cents']):>14} "
+                      f"{format_cents(row['final_payout_cents']):>14} {format_cents(row['net_profit_loss_cents']):>14}")
+    return 0
+
+def ledger_main(args):
+    """Post settled sessions to the bettor ledger or report its balances"""
+    from ledger import Ledger
+    
+    with Ledger(args.db) as ledger:
+        if args.action == 'post':
+            posted, skipped, errors = ledger.post_directory(args.directory)
+            for path, error in errors:
+                print(f"Failed to post {path}: {error}", file=sys.stderr)
+            print(f"Posted {posted} session(s), skipped {skipped} with pending bets")
+            return 1 if errors else 0
+            
+        if args.action == 'verify':
+            ledger.verify()
+            print("Ledger rollups match the posted entries")
+            return 0
+            
+        if args.season:
+            rows = ledger.balances('season', args.season)
+        elif args.month:
+            rows = ledger.balances('month', args.month)
+        else:
+            rows = ledger.balances('all', '')
+    print(f"{'Bettor':<20} {'Sessions':>8} {'Stake':>14} {'Payout':>14} {'Net P/L':>14}")
+    for row in rows:
+        print(f"{row['name']:<20} {row['sessions']:>8} {format_cents(row['stake_cents']):>14} "
+              f"{format_cents(row['final_payout_cents']):>14} {format_cents(row['net_profit_loss_cents']):>14}")
+    return 0
+
+def odds_server_main(args):
+    """Serve drifting odds for testing the live odds feed"""
+    from odds_feed import serve_stand_in
+    
+    markets = {}
+    if args.session:
+        session = read_session(args.session)[0]
+        for bet in session['bets']:
+            if bet['status'] == 'Pending':
+                markets[bet['name']] = bet['odds']
+    for part in (args.markets or '').split(','):
+        if part.strip():
+            market, _, odds = part.rpartition('=')
+            markets[market.strip()] = float(odds)
+    if not markets:
+        print("No markets to serve: pass --markets or --session", file=sys.stderr)
+        return 1
+    serve_stand_in(markets, args.host, args.port, drift=args.drift, interval=args.interval)
+    return 0
+
+def serve_main(args):
+    """Share a session with other Bet Splitter windows through a session server"""
+    from session_server import serve_session
+    
+    if os.path.exists(args.session) or os.path.exists(journal_path(args.session)):
+        session = read_session(args.session)[0]
+    elif args.event:
+        session = {'date': datetime.now().strftime("%Y-%m-%d %H:%M:%S"), 'event': args.event,
+                   'bettors': [], 'bets': [], 'total_pool': 0}
+    else:
+        print(f"{args.session} does not exist; pass --event to start a new session there", file=sys.stderr)
+        return 1
+    serve_session(session, args.session, args.host, args.port)
+    return 0
+
+def export_main(args):
+    """Export the settlement results of saved sessions"""
+    from export import export_session_file
+    
+    status = 0
+    for session in args.sessions:
+        try:
+            written = export_session_file(session, args.output, args.format)
+        except (OSError, ValueError, RuntimeError) as e:
+            print(f"Failed to export {session}: {e}", file=sys.stderr)
+            status = 1
+            continue
+        for path, rows in written:
+            print(f"Wrote {rows} row(s) to {path}")
+    return status
+
+def run_cli(argv):
+    """Run a command-line subcommand instead of the GUI"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(prog="Bet-Splitter", description="DAMA Bet Splitter")
+    parser.add_argument('--profile', nargs='?', const='', metavar='TRACE',
+                        help="Record timings; with a file name, write a Chrome trace there on exit")
+    subparsers = parser.add_subparsers(dest='command')
+    
+    batch_parser = subparsers.add_parser('batch', help="Settle all saved sessions under a directory")
+    batch_parser.add_argument('directory', help="Directory to search for betting_session_*.json files")
+    batch_parser.add_argument('-o', '--ledger', default='bettor_ledger.csv',
+                              help="CSV ledger to write (default: bettor_ledger.csv)")
+    batch_parser.add_argument('-j', '--workers', type=int, default=None,
+                              help="Worker processes (default: one per CPU core)")
+    batch_parser.set_defaults(func=batch_main)
+    
+    convert_parser = subparsers.add_parser('convert', help=f"Convert a session between JSON and {COLUMNAR_SUFFIX}")
+    convert_parser.add_argument('source', help=f"Session file to read (.json or {COLUMNAR_SUFFIX})")
+    convert_parser.add_argument('destination', help="File to write in the other format")
+    convert_parser.set_defaults(func=convert_main)
+    
+    index_parser = subparsers.add_parser('index', help="Update or search the saved-session index")
+    index_parser.add_argument('--db', default=index_path(),
+                              help="Index database (default: session_index.db next to the app)")
+    index_actions = index_parser.add_subparsers(dest='action', required=True)
+    update_parser = index_actions.add_parser('update', help="Index new and changed sessions under a directory")
+    update_parser.add_argument('directory', nargs='?', default=app_dir(),
+                               help="Directory to scan (default: the app folder)")
+    sessions_parser = index_actions.add_parser('sessions', help="List indexed sessions, newest first")
+    sessions_parser.add_argument('--bettor', help="Only sessions this bettor took part in")
+    sessions_parser.add_argument('--event', help="Only events whose name contains this text")
+    totals_parser = index_actions.add_parser('totals', help="Per-bettor totals across indexed sessions")
+    for action_parser in (sessions_parser, totals_parser):
+        action_parser.add_argument('--since', help="Only sessions on or after this date (YYYY-MM-DD)")
+        action_parser.add_argument('--until', help="Only sessions before this date (YYYY-MM-DD)")
+    index_parser.set_defaults(func=index_main)
+    
+    ledger_parser = subparsers.add_parser('ledger', help="Cross-session bettor ledger")
+    ledger_parser.add_argument('--db', default=ledger_path(),
+                               help="Ledger database (default: bettor_ledger.db next to the app)")
+    ledger_actions = ledger_parser.add_subparsers(dest='action', required=True)
+    post_parser = ledger_actions.add_parser('post', help="Post every fully settled session under a directory")
+    post_parser.add_argument('directory', nargs='?', default=app_dir(),
+                             help="Directory to scan (default: the app folder)")
+    balances_parser = ledger_actions.add_parser('balances', help="Per-bettor balances from the rollups")
+    period_group = balances_parser.add_mutually_exclusive_group()
+    period_group.add_argument('--season', help="Only this season (YYYY)")
+    period_group.add_argument('--month', help="Only this month (YYYY-MM)")
+    ledger_actions.add_parser('verify', help="Check the rollups against the posted entries")
+    ledger_parser.set_defaults(func=ledger_main)
+    
+    odds_parser = subparsers.add_parser('odds-server', help="Serve randomly drifting odds for the live odds feed")
+    odds_parser.add_argument('--markets', help='Markets and starting odds, e.g. "Race winner=2.5,Fastest lap=4"')
+    odds_parser.add_argument('--session', help="Serve a market for every pending bet in this session file")
+    odds_parser.add_argument('--host', default='127.0.0.1', help="Address to listen on (default: 127.0.0.1)")
+    odds_parser.add_argument('--port', type=int, default=8765, help="Port to listen on (default: 8765)")
+    odds_parser.add_argument('--drift', type=float, default=0.05,
+                             help="Typical relative move of a price per tick (default: 0.05)")
+    odds_parser.add_argument('--interval', type=float, default=1.0, help="Seconds between price moves (default: 1)")
+    odds_parser.set_defaults(func=odds_server_main)
+    
+    serve_parser = subparsers.add_parser('serve', help="Share a session so several windows can edit it at once")
+    serve_parser.add_argument('session', help="Session file to share; changes are saved back to it")
+    serve_parser.add_argument('--event', help="Start a new session with this event name if the file does not exist")
+    serve_parser.add_argument('--host', default='127.0.0.1', help="Address to listen on (default: 127.0.0.1)")
+    serve_parser.add_argument('--port', type=int, default=8766, help="Port to listen on (default: 8766)")
+    serve_parser.set_defaults(func=serve_main)
+    
+    export_parser = subparsers.add_parser('export', help="Export per-bettor and per-bet results of saved sessions")
+    export_parser.add_argument('sessions', nargs='+', help="Session files to export")
+    export_parser.add_argument('-o', '--output', help="Directory to write to (default: next to each session)")
+    export_parser.add_argument('-f', '--format', choices=('csv', 'parquet'), default='csv',
+                               help="Output format; parquet needs pyarrow (default: csv)")
+    export_parser.set_defaults(func=export_main)
+    
+    args = parser.parse_args(argv)
+    if args.profile is not None:
+        profiler.enabled = True
+    if args.command is None:
+        # Only options were given: run the GUI with them
+        main(args.profile or None)
+        return 0
+        
+    with profiler.span(args.command):
+        status = args.func(args)
+    if args.profile:
+        profiler.export_trace(args.profile)
+    return status
 
 if __name__ == "__main__":
+    import multiprocessing
+    multiprocessing.freeze_support()
+    if len(sys.argv) > 1:
+        sys.exit(run_cli(sys.argv[1:]))
     main()
\ No newline at end of file
@@ -0,0 +1,48 @@
+# -*- mode: python ; coding: utf-8 -*-
+# Folder build for fast launches: nothing is unpacked to a temp dir at startup
+# and UPX is off, so DLLs don't have to be decompressed on every run.
+# Build with: pyinstaller Bet-splitter-onedir.spec  (output in dist/Bet-splitter/)
+
+
+a = Analysis(
+    ['Bet-splitter.py'],
+    pathex=[],
+    binaries=[],
+    datas=[('DAMA-app-icon.ico', '.')],
+    hiddenimports=[],
+    hookspath=[],
+    hooksconfig={},
+    runtime_hooks=[],
+    excludes=[],
+    noarchive=False,
+    optimize=0,
+)
+pyz = PYZ(a.pure)
+
+exe = EXE(
+    pyz,
+    a.scripts,
+    [],
+    exclude_binaries=True,
+    name='Bet-splitter',
+    debug=False,
+    bootloader_ignore_signals=False,
+    strip=False,
+    upx=False,
+    console=False,
+    disable_windowed_traceback=False,
+    argv_emulation=False,
+    target_arch=None,
+    codesign_identity=None,
+    entitlements_file=None,
+    icon=['DAMA-app-icon.ico'],
+)
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.datas,
+    strip=False,
+    upx=False,
+    upx_exclude=[],
+    name='Bet-splitter',
+)
@@ -0,0 +1,107 @@
+"""Run slow file I/O off the Tk event thread.
+
+Work is submitted to a worker thread (or, for very large files, a worker
+process) and the result is handed back on the mainloop by polling with
+``root.after``. Tk widgets are only ever touched from the main thread.
+"""
+
+import tkinter as tk
+from tkinter import ttk
+from concurrent.futures import ThreadPoolExecutor
+
+# Files at least this big are parsed in a separate process so the GIL-bound
+# JSON decoder does not starve the mainloop
+LARGE_FILE_BYTES = 32 * 1024 * 1024
+
+_thread_pool = None
+_process_pool = None
+
+
+def submit(func, *args, use_process=False):
+    """Start func(*args) on a worker and return its Future"""
+    global _thread_pool, _process_pool
+    if use_process:
+        if _process_pool is None:
+            from concurrent.futures import ProcessPoolExecutor  # Pulls in multiprocessing; rarely needed
+            _process_pool = ProcessPoolExecutor(max_workers=1)
+        return _process_pool.submit(func, *args)
+    if _thread_pool is None:
+        _thread_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='bet-splitter-io')
+    return _thread_pool.submit(func, *args)
+
+
+def when_done(root, future, on_done, on_error, on_poll=None, poll_ms=50):
+    """Call on_done(result) or on_error(exception) on the mainloop once future finishes"""
+    def poll():
+        if not future.done():
+            if on_poll:
+                on_poll()
+            root.after(poll_ms, poll)
+            return
+        try:
+            result = future.result()
+        except Exception as e:
+            on_error(e)
+            return
+        on_done(result)
+    root.after(poll_ms, poll)
+
+
+class Progress:
+    """Progress counter written by a worker thread and read by the mainloop"""
+
+    def __init__(self):
+        self.done = 0
+        self.total = 0
+
+    def update(self, done, total):
+        self.done = done
+        self.total = total
+
+    @property
+    def fraction(self):
+        """Completed fraction, or None while the total is unknown"""
+        if not self.total:
+            return None
+        return min(1.0, self.done / self.total)
+
+
+class ProgressDialog:
+    """Small modal window showing the progress of a background task
+
+    The window grabs input so the session cannot be edited while it is
+    being saved or replaced, but the mainloop keeps running and redrawing.
+    """
+
+    def __init__(self, parent, title, message):
+        self.window = tk.Toplevel(parent)
+        self.window.title(title)
+        self.window.geometry("360x110")
+        self.window.resizable(False, False)
+        self.window.transient(parent)
+        self.window.protocol("WM_DELETE_WINDOW", lambda: None)  # Can't cancel half-written I/O
+
+        frame = ttk.Frame(self.window, padding="15")
+        frame.pack(fill=tk.BOTH, expand=True)
+        ttk.Label(frame, text=message).pack(anchor=tk.W, pady=(0, 10))
+        self.bar = ttk.Progressbar(frame, mode='indeterminate', maximum=1000)
+        self.bar.pack(fill=tk.X)
+        self.bar.start(15)
+        self.determinate = False
+        self.window.grab_set()
+
+    def show(self, progress):
+        """Reflect a Progress object in the bar"""
+        fraction = progress.fraction if progress else None
+        if fraction is None:
+            return
+        if not self.determinate:
+            self.bar.stop()
+            self.bar.configure(mode='determinate')
+            self.determinate = True
+        self.bar['value'] = fraction * 1000
+
+    def close(self):
+        self.bar.stop()
+        self.window.grab_release()
+        self.window.destroy()
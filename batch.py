@@ -0,0 +1,98 @@
+"""Batch settlement of saved betting_session_*.json (and .bscol) files.
+
+Sessions are discovered lazily under a directory tree, loaded with their
+journals replayed, settled in a process pool with the same rules as the GUI
+and written to one CSV ledger with a row per bettor per session. Amounts are
+summed in integer cents.
+"""
+
+import csv
+import fnmatch
+import os
+
+from columnar import COLUMNAR_SUFFIX, ColumnarSession
+from money import format_cents, from_cents, to_cents
+from session_journal import journal_path, load_session_file
+from settlement import settle_session
+
+SESSION_PATTERNS = ("betting_session_*.json", "betting_session_*" + COLUMNAR_SUFFIX)
+LEDGER_COLUMNS = ('session_file', 'event', 'date', 'bettor', 'stake',
+                  'final_payout', 'net_profit_loss')
+
+
+def find_session_files(root, patterns=SESSION_PATTERNS):
+    """Yield every saved session file under root, in a stable order"""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if any(fnmatch.fnmatch(filename, pattern) for pattern in patterns):
+                yield os.path.join(dirpath, filename)
+
+
+def settle_file(path):
+    """Settle one session file and its journal; runs inside a worker process
+
+    Amounts in the returned rows are integer cents.
+    """
+    try:
+        if path.endswith(COLUMNAR_SUFFIX) and not os.path.exists(journal_path(path)):
+            # Settled straight from the memory-mapped columns
+            with ColumnarSession(path) as columnar:
+                session = columnar.meta
+                result = columnar.settle()
+        else:
+            session = load_session_file(path)
+            result = settle_session(session)
+    except Exception as e:
+        return path, None, f"{type(e).__name__}: {e}"
+
+    header = {
+        'event': session.get('event', ''),
+        'date': session.get('date', ''),
+        'pending_count': result['pending_count'],
+    }
+    rows = [(payout['name'], to_cents(payout['stake']), to_cents(payout['final_payout']),
+             to_cents(payout['net_profit_loss']))
+            for payout in result['payouts']]
+    return path, (header, rows), None
+
+
+def settle_directory(root, ledger_path, workers=None, chunksize=16):
+    """Settle every session under root and write a consolidated ledger
+
+    Returns (totals, errors) where totals maps bettor name to a dict of
+    summed stake/final_payout/net_profit_loss/sessions, and errors is a list
+    of (path, message) for files that could not be settled.
+    """
+    from multiprocessing import Pool
+
+    totals = {}
+    errors = []
+
+    with open(ledger_path, 'w', newline='') as ledger_file, Pool(processes=workers) as pool:
+        writer = csv.writer(ledger_file)
+        writer.writerow(LEDGER_COLUMNS)
+
+        for path, settled, error in pool.imap(settle_file, find_session_files(root), chunksize):
+            if error:
+                errors.append((path, error))
+                continue
+
+            header, rows = settled
+            session_file = os.path.relpath(path, root)
+            for name, stake, final_payout, net_profit_loss in rows:
+                writer.writerow((session_file, header['event'], header['date'], name,
+                                 format_cents(stake), format_cents(final_payout),
+                                 format_cents(net_profit_loss)))
+
+                bettor_totals = totals.setdefault(name, {
+                    'stake': 0, 'final_payout': 0, 'net_profit_loss': 0, 'sessions': 0})
+                bettor_totals['stake'] += stake
+                bettor_totals['final_payout'] += final_payout
+                bettor_totals['net_profit_loss'] += net_profit_loss
+                bettor_totals['sessions'] += 1
+
+    for bettor_totals in totals.values():
+        for field in ('stake', 'final_payout', 'net_profit_loss'):
+            bettor_totals[field] = from_cents(bettor_totals[field])
+    return totals, errors
@@ -0,0 +1,219 @@
+"""Time loading, settling, saving and displaying synthetic sessions.
+
+Usage::
+
+    python benchmarks/run_benchmarks.py --sizes 10x100,50x10000,200x100000
+    python benchmarks/run_benchmarks.py --json bench.json            # record results
+    python benchmarks/run_benchmarks.py --baseline bench.json        # fail on regressions
+
+Treeview timings need a display. If DISPLAY is unset and Xvfb is installed,
+a virtual display is started for them; otherwise they are skipped.
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from columnar import COLUMNAR_SUFFIX
+from session_journal import read_session, write_snapshot
+from session_model import SessionTotals
+from settlement import np, settle_session
+from synthetic import DEFAULT_STATUS_MIX, generate_session, parse_status_mix
+
+DEFAULT_SIZES = '10x100,50x10000,200x100000'
+
+# Slowdowns smaller than this are treated as timer noise
+NOISE_FLOOR_SECONDS = 0.005
+
+
+def parse_sizes(text):
+    """Parse "BETTORSxBETS,..." into a list of (bettors, bets) tuples"""
+    sizes = []
+    for part in text.split(','):
+        bettors, _, bets = part.strip().lower().partition('x')
+        sizes.append((int(bettors), int(bets)))
+    return sizes
+
+
+def measure(func, repeat):
+    """Median wall time of func() over repeat runs, after one untimed warm-up run
+
+    The warm-up keeps one-off costs such as lazy imports (NumPy on the first
+    vectorized settle) and cold file caches out of the samples.
+    """
+    func()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+@contextlib.contextmanager
+def virtual_display():
+    """Yield True if Tk can open a window, starting Xvfb if there is no display"""
+    if os.environ.get('DISPLAY') or sys.platform in ('win32', 'darwin'):
+        yield True
+        return
+    xvfb = shutil.which('Xvfb')
+    if not xvfb:
+        yield False
+        return
+    display = ':%d' % (90 + os.getpid() % 100)
+    process = subprocess.Popen([xvfb, display, '-screen', '0', '1280x1024x24'],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    os.environ['DISPLAY'] = display
+    try:
+        time.sleep(0.5)  # Give the server a moment to accept connections
+        yield process.poll() is None
+    finally:
+        del os.environ['DISPLAY']
+        process.terminate()
+        process.wait()
+
+
+def load_app_module():
+    """Import Bet-Splitter.py (its name is not a valid module name)"""
+    spec = importlib.util.spec_from_file_location('bet_splitter_app', os.path.join(ROOT, 'Bet-Splitter.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def bench_treeview(app_module, session, path, repeat):
+    """Time the first paint of the betting page and materializing every bet row"""
+    import tkinter as tk
+
+    results = {}
+    root = tk.Tk()
+    try:
+        app = app_module.BetSplitterApp(root)
+        loaded = read_session(path)
+
+        def open_page():
+            app.current_session, app.bet_index, app.totals = loaded
+            app.bettors = app.current_session['bettors']
+            app.bets = app.current_session['bets']
+            app.total_pool = app.current_session['total_pool']
+            app.create_betting_page()
+            root.update_idletasks()
+
+        def show_all():
+            open_page()
+            app.show_more_bets(len(app.bets))
+            root.update_idletasks()
+
+        results['treeview_first_page'] = measure(open_page, repeat)
+        results['treeview_all_rows'] = measure(show_all, repeat)
+    finally:
+        root.destroy()
+    return results
+
+
+def run(sizes, status_mix, repeat, with_gui):
+    """Run every stage for every size; returns {"BxN": {stage: seconds}}"""
+    results = {}
+    app_module = None
+    with tempfile.TemporaryDirectory() as workdir, virtual_display() as display_ok:
+        gui = with_gui and display_ok
+        if with_gui and not display_ok:
+            print("No display available (and no Xvfb); skipping Treeview timings", file=sys.stderr)
+        for bettors, bets in sizes:
+            label = f"{bettors}x{bets}"
+            session = generate_session(bettors, bets, status_mix)
+            json_path = os.path.join(workdir, f"betting_session_{label}.json")
+            columnar_path = os.path.join(workdir, f"betting_session_{label}{COLUMNAR_SUFFIX}")
+
+            stages = {}
+            stages['save_json'] = measure(lambda: write_snapshot(session, json_path), repeat)
+            stages['load_json'] = measure(lambda: read_session(json_path), repeat)
+            stages['save_columnar'] = measure(lambda: write_snapshot(session, columnar_path), repeat)
+            stages['load_columnar'] = measure(lambda: read_session(columnar_path), repeat)
+            stages['settle'] = measure(lambda: settle_session(session), repeat)
+            if np:
+                stages['settle_vectorized'] = measure(lambda: settle_session(session, vectorized=True), repeat)
+            stages['totals_recount'] = measure(lambda: SessionTotals(session['bets']), repeat)
+            if gui:
+                if app_module is None:
+                    app_module = load_app_module()
+                stages.update(bench_treeview(app_module, session, json_path, repeat))
+
+            results[label] = stages
+            print_stages(label, stages)
+    return results
+
+
+def print_stages(label, stages):
+    print(f"{label}")
+    for stage, seconds in stages.items():
+        print(f"  {stage:<22} {seconds * 1000:>10.2f} ms")
+
+
+def compare(results, baseline, tolerance):
+    """Return a list of (size, stage, baseline, current) that got slower than allowed"""
+    regressions = []
+    for label, stages in results.items():
+        for stage, seconds in stages.items():
+            before = baseline.get(label, {}).get(stage)
+            if before is None:
+                continue
+            if seconds > before * (1 + tolerance) and seconds - before > NOISE_FLOOR_SECONDS:
+                regressions.append((label, stage, before, seconds))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bet Splitter benchmarks")
+    parser.add_argument('--sizes', default=DEFAULT_SIZES,
+                        help=f"Comma-separated BETTORSxBETS sizes (default: {DEFAULT_SIZES})")
+    parser.add_argument('--status-mix', default=None,
+                        help="Bet status weights, e.g. Won=0.3,Lost=0.5,Void=0.05,Pending=0.15")
+    parser.add_argument('--repeat', type=int, default=3, help="Timed runs per stage, after one untimed warm-up; the median is reported")
+    parser.add_argument('--no-gui', action='store_true', help="Skip the Treeview timings")
+    parser.add_argument('--json', help="Write the results to this JSON file")
+    parser.add_argument('--baseline', help="Compare against results saved earlier with --json")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="Allowed slowdown over the baseline as a fraction (default: 0.25)")
+    args = parser.parse_args(argv)
+
+    status_mix = parse_status_mix(args.status_mix) if args.status_mix else DEFAULT_STATUS_MIX
+    results = run(parse_sizes(args.sizes), status_mix, args.repeat, not args.no_gui)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'numpy': bool(np),
+                'status_mix': status_mix,
+                'results': results,
+            }, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.tolerance)
+        for label, stage, before, after in regressions:
+            print(f"REGRESSION {label} {stage}: {before * 1000:.2f} ms -> {after * 1000:.2f} ms",
+                  file=sys.stderr)
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.tolerance:.0%} of {args.baseline}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
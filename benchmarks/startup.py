@@ -0,0 +1,80 @@
+"""Measure how long the app takes from launch to a drawn main menu.
+
+Usage::
+
+    python benchmarks/startup.py                      # run Bet-Splitter.py
+    python benchmarks/startup.py --exe dist/Bet-splitter/Bet-splitter.exe
+    python benchmarks/startup.py --target 0.5         # exit 1 if slower
+
+Each run launches a fresh process with BET_SPLITTER_EXIT_AFTER_PAINT set,
+so it quits right after the first paint and the wall time covers
+interpreter (or bootloader) startup, imports and the first frame. Without
+a display (and no Xvfb) only the import time of the app module is measured.
+
+This is an optional benchmark for checking a build by hand. The test suite
+(tests/test_startup.py) checks that heavy modules stay out of startup.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from run_benchmarks import ROOT, virtual_display
+
+# Launch-to-main-menu budget on a typical operator laptop
+STARTUP_TARGET_SECONDS = 0.5
+
+IMPORT_SNIPPET = """
+import importlib.util, sys, time
+start = time.perf_counter()
+spec = importlib.util.spec_from_file_location('bet_splitter_app', sys.argv[1])
+spec.loader.exec_module(importlib.util.module_from_spec(spec))
+print(time.perf_counter() - start)
+"""
+
+
+def time_launch(command, env):
+    start = time.perf_counter()
+    subprocess.run(command, env=env, check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def time_import(script):
+    output = subprocess.run([sys.executable, '-c', IMPORT_SNIPPET, script],
+                            check=True, capture_output=True, text=True).stdout
+    return float(output)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bet Splitter startup time")
+    parser.add_argument('--exe', help="Frozen build to launch instead of Bet-Splitter.py")
+    parser.add_argument('--runs', type=int, default=5, help="Launches to time; the median is reported")
+    parser.add_argument('--target', type=float, default=STARTUP_TARGET_SECONDS,
+                        help=f"Fail if the median is slower than this many seconds (default: {STARTUP_TARGET_SECONDS})")
+    args = parser.parse_args(argv)
+
+    script = os.path.join(ROOT, 'Bet-Splitter.py')
+    command = [args.exe] if args.exe else [sys.executable, script]
+    imports = statistics.median(time_import(script) for _ in range(args.runs))
+    print(f"Import of Bet-Splitter.py: {imports * 1000:.1f} ms")
+
+    with virtual_display() as display_ok:
+        if not display_ok:
+            print("No display available (and no Xvfb); launch-to-main-menu not measured", file=sys.stderr)
+            return 0
+        env = dict(os.environ, BET_SPLITTER_EXIT_AFTER_PAINT='1')
+        time_launch(command, env)  # Warm the OS file cache
+        launch = statistics.median(time_launch(command, env) for _ in range(args.runs))
+
+    print(f"Launch to main menu: {launch * 1000:.1f} ms (target {args.target * 1000:.0f} ms)")
+    if launch > args.target:
+        print("Startup is slower than the target", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,72 @@
+"""Synthetic betting sessions for benchmarks, in the save_session JSON schema."""
+
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from money import add_amounts, from_cents, to_cents
+
+DEFAULT_STATUS_MIX = {'Won': 0.3, 'Lost': 0.5, 'Void': 0.05, 'Pending': 0.15}
+
+DESCRIPTIONS = ('Race winner', 'Podium finish', 'Fastest lap', 'Pole position',
+                'Safety car deployed', 'Top 10 finish', 'Head-to-head', 'First retirement')
+
+
+def parse_status_mix(text):
+    """Parse "Won=0.3,Lost=0.5,..." into a status -> weight dict"""
+    mix = {}
+    for part in text.split(','):
+        status, _, weight = part.partition('=')
+        status = status.strip().capitalize()
+        if status not in DEFAULT_STATUS_MIX:
+            raise ValueError(f"Unknown status {status!r}")
+        mix[status] = float(weight)
+    return mix
+
+
+def generate_session(bettor_count, bet_count, status_mix=None, seed=0):
+    """Build a reproducible session dict with the given numbers of bettors and bets
+
+    Bettor stakes are whole rupees between 100 and 5000; bet stakes are
+    spread so the bets use about 90% of the pool, as in a real session.
+    """
+    rng = random.Random(seed)
+    status_mix = status_mix or DEFAULT_STATUS_MIX
+    statuses = list(status_mix)
+    weights = [status_mix[status] for status in statuses]
+
+    bettors = [{'name': f"Bettor {number}", 'stake': float(rng.randint(100, 5000))}
+               for number in range(1, bettor_count + 1)]
+    total_pool = add_amounts(*(bettor['stake'] for bettor in bettors))
+
+    # Average bet stake in cents, jittered per bet but never past the pool
+    available = to_cents(total_pool)
+    average = max(1, available * 9 // 10 // max(1, bet_count))
+    bets = []
+    for number, status in enumerate(rng.choices(statuses, weights, k=bet_count), start=1):
+        stake = min(available, max(1, int(average * rng.uniform(0.5, 1.5))))
+        if stake <= 0:
+            break
+        available -= stake
+        odds = round(rng.uniform(1.1, 8.0), 2)
+        bets.append({
+            'id': f"{rng.getrandbits(48):012x}",
+            'name': f"Bet {number}",
+            'description': rng.choice(DESCRIPTIONS),
+            'odds': odds,
+            'stake': from_cents(stake),
+            'potential_payout': from_cents(to_cents(from_cents(stake) * odds)),
+            'status': status,
+        })
+
+    date = datetime(2025, 1, 1) + timedelta(days=rng.randint(0, 364), seconds=rng.randint(0, 86399))
+    return {
+        'date': date.strftime("%Y-%m-%d %H:%M:%S"),
+        'event': f"Synthetic {bettor_count}x{bet_count}",
+        'bettors': bettors,
+        'bets': bets,
+        'total_pool': total_pool,
+    }
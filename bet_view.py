@@ -0,0 +1,217 @@
+"""Sort order and filter for the bets table.
+
+Sorting and filtering use the bets' typed values (floats for odds and
+amounts, a fixed order for statuses) instead of the formatted strings shown
+in the table, so "LKR 1000.00" sorts after "LKR 900.00".
+
+Each column's ascending order is worked out once and cached. Added and
+removed bets are slotted into the cached orders by binary search, and a
+change to some field only drops the orders that depend on it (a status
+change leaves the Odds order alone). A filter that narrows the current one,
+such as typing another letter, is checked against the rows already shown
+rather than every bet.
+"""
+
+import bisect
+
+from session_model import remove_bets
+
+STATUS_ORDER = {'Pending': 0, 'Won': 1, 'Lost': 2, 'Void': 3}
+
+# Column heading -> typed sort key
+SORT_KEYS = {
+    'Name': lambda bet: bet['name'].casefold(),
+    'Bet': lambda bet: bet['description'].casefold(),
+    'Odds': lambda bet: bet['odds'],
+    'Stake': lambda bet: bet['stake'],
+    'Potential Payout': lambda bet: bet['potential_payout'],
+    'Status': lambda bet: STATUS_ORDER.get(bet['status'], len(STATUS_ORDER)),
+}
+
+# Bet field -> columns whose order depends on it
+FIELD_COLUMNS = {
+    'name': ('Name',),
+    'description': ('Bet',),
+    'odds': ('Odds',),
+    'stake': ('Stake',),
+    'potential_payout': ('Potential Payout',),
+    'status': ('Status',),
+}
+
+
+class BetFilter:
+    """Which bets to show: a name/bet text match, a set of statuses and an odds range"""
+
+    def __init__(self, text='', statuses=None, min_odds=None, max_odds=None):
+        self.text = text.strip().casefold()
+        self.statuses = frozenset(statuses) if statuses else None
+        self.min_odds = min_odds
+        self.max_odds = max_odds
+
+    @property
+    def active(self):
+        return bool(self.text or self.statuses or self.min_odds is not None or self.max_odds is not None)
+
+    def fields(self):
+        """Bet fields the filter looks at"""
+        fields = set()
+        if self.text:
+            fields.update(('name', 'description'))
+        if self.statuses:
+            fields.add('status')
+        if self.min_odds is not None or self.max_odds is not None:
+            fields.add('odds')
+        return fields
+
+    def matches(self, bet):
+        if self.statuses and bet['status'] not in self.statuses:
+            return False
+        if self.min_odds is not None and bet['odds'] < self.min_odds:
+            return False
+        if self.max_odds is not None and bet['odds'] > self.max_odds:
+            return False
+        if self.text and self.text not in bet['name'].casefold() and self.text not in bet['description'].casefold():
+            return False
+        return True
+
+    def narrows(self, other):
+        """True if every bet this filter shows is also shown by other"""
+        if other.text not in self.text:
+            return False
+        if other.statuses and not (self.statuses and self.statuses <= other.statuses):
+            return False
+        if other.min_odds is not None and (self.min_odds is None or self.min_odds < other.min_odds):
+            return False
+        if other.max_odds is not None and (self.max_odds is None or self.max_odds > other.max_odds):
+            return False
+        return True
+
+
+class BetsView:
+    """The bets to show, in display order, kept up to date change by change
+
+    rows is the filtered, sorted list of bet dicts; bets is the session's
+    own list, in the order bets were added.
+    """
+
+    def __init__(self, bets):
+        self.bets = bets
+        self.sort_column = None
+        self.descending = False
+        self.filter = BetFilter()
+        self._orders = {}  # column -> (ascending keys, bets in that order)
+        self.rows = list(bets)
+
+    def _order(self, column):
+        order = self._orders.get(column)
+        if order is None:
+            key = SORT_KEYS[column]
+            decorated = sorted(((key(bet), index) for index, bet in enumerate(self.bets)))
+            order = self._orders[column] = ([k for k, _ in decorated], [self.bets[i] for _, i in decorated])
+        return order
+
+    def reset(self):
+        """Forget the cached orders and rebuild rows, after the bets changed in unknown ways"""
+        self._orders.clear()
+        self.refresh()
+
+    def refresh(self):
+        """Rebuild rows from every bet"""
+        if self.sort_column:
+            ordered = self._order(self.sort_column)[1]
+            ordered = reversed(ordered) if self.descending else ordered
+        else:
+            ordered = self.bets
+        if self.filter.active:
+            self.rows = [bet for bet in ordered if self.filter.matches(bet)]
+        else:
+            self.rows = list(ordered)
+
+    def sort_by(self, column):
+        """Sort on a column; sorting on the same column again reverses the order"""
+        if column == self.sort_column:
+            self.descending = not self.descending
+        else:
+            self.sort_column = column
+            self.descending = False
+        self.refresh()
+
+    def set_filter(self, bet_filter):
+        """Show only bets matching bet_filter, keeping the sort order"""
+        narrowed = bet_filter.narrows(self.filter)
+        self.filter = bet_filter
+        if narrowed:
+            self.rows = [bet for bet in self.rows if bet_filter.matches(bet)]
+        else:
+            self.refresh()
+
+    def add(self, bets):
+        """Account for bets just appended to the session; returns their row indexes (None if filtered out)"""
+        for column, (keys, ordered) in self._orders.items():
+            key = SORT_KEYS[column]
+            for bet in bets:
+                k = key(bet)
+                index = bisect.bisect_right(keys, k)
+                keys.insert(index, k)
+                ordered.insert(index, bet)
+        positions = []
+        for bet in bets:
+            if self.filter.active and not self.filter.matches(bet):
+                positions.append(None)
+                continue
+            index = self._row_index(bet) if self.sort_column else len(self.rows)
+            self.rows.insert(index, bet)
+            positions.append(index)
+        return positions
+
+    def _row_index(self, bet, before_equal=None):
+        """Where a bet's key goes in the sorted rows
+
+        By default that is where a stable sort puts a new bet: after bets
+        with an equal key, or before them when the order is reversed.
+        """
+        key = SORT_KEYS[self.sort_column]
+        k = key(bet)
+        if before_equal is None:
+            before_equal = self.descending
+        lo, hi = 0, len(self.rows)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            mid_key = key(self.rows[mid])
+            if self.descending:
+                goes_before = mid_key < k or (before_equal and mid_key == k)
+            else:
+                goes_before = mid_key > k or (before_equal and mid_key == k)
+            if goes_before:
+                hi = mid
+            else:
+                lo = mid + 1
+        return lo
+
+    def remove(self, bet):
+        """Account for a bet just removed from the session"""
+        for column, (keys, ordered) in self._orders.items():
+            k = SORT_KEYS[column](bet)
+            index = bisect.bisect_left(keys, k)
+            while ordered[index] is not bet:
+                index += 1
+            del keys[index]
+            del ordered[index]
+        if not self.filter.active or self.filter.matches(bet):
+            if self.sort_column:
+                index = self._row_index(bet, before_equal=True)
+                while self.rows[index] is not bet:  # Step over bets with an equal key
+                    index += 1
+                del self.rows[index]
+            else:
+                remove_bets(self.rows, [bet])
+
+    def update(self, fields):
+        """Account for bets whose fields changed; returns True if rows were rebuilt"""
+        columns = {column for field in fields for column in FIELD_COLUMNS.get(field, ())}
+        for column in columns:
+            self._orders.pop(column, None)
+        if self.sort_column in columns or self.filter.fields() & set(fields):
+            self.refresh()
+            return True
+        return False
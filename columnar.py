@@ -0,0 +1,324 @@
+"""Compact columnar session format (``.bscol``).
+
+A ``.bscol`` file holds the same data as a saved session JSON file, but
+bettors and bets are stored as typed little-endian columns (float64 stakes,
+odds and payouts, int8 status codes, uint32 indexes into an interned string
+table). Files are memory-mapped on read, so columns can be aggregated
+without parsing or allocating a dict per row.
+
+Layout::
+
+    magic "BSCOL\\0", uint16 version, uint32 header length
+    header JSON (top-level session fields, column offsets, per-row extras)
+    padding to 8 bytes, then each column padded to 8 bytes
+
+Conversion to and from JSON is lossless: fields the columns do not cover
+(unknown keys, non-float numbers, custom statuses, key order) are kept in
+the header as per-row extras.
+"""
+
+import array
+import json
+import mmap
+import os
+import struct
+import sys
+
+from settlement import STATUS_CODES, STATUS_NAMES, SessionArrays, np, settle_session
+
+COLUMNAR_SUFFIX = '.bscol'
+MAGIC = b'BSCOL\x00'
+VERSION = 1
+PREAMBLE = struct.Struct('<6sHI')  # magic, version, header length
+NO_STRING = 0xFFFFFFFF
+NO_STATUS = -1
+
+# array typecode for 32-bit unsigned ints on this platform
+U32 = 'I' if array.array('I').itemsize == 4 else 'L'
+
+# Column name -> array typecode
+COLUMNS = {
+    'bettor_name': U32,
+    'bettor_stake': 'd',
+    'bet_id': U32,
+    'bet_name': U32,
+    'bet_description': U32,
+    'bet_odds': 'd',
+    'bet_stake': 'd',
+    'bet_payout': 'd',
+    'bet_status': 'b',
+    'string_offsets': U32,
+    'string_data': 'B',
+}
+
+BETTOR_FIELDS = ('name', 'stake')
+BET_FIELDS = ('id', 'name', 'description', 'odds', 'stake', 'potential_payout', 'status')
+BET_STRING_COLUMNS = (('id', 'bet_id'), ('name', 'bet_name'), ('description', 'bet_description'))
+BET_FLOAT_COLUMNS = (('odds', 'bet_odds'), ('stake', 'bet_stake'), ('potential_payout', 'bet_payout'))
+
+
+def _align(offset):
+    return (offset + 7) & ~7
+
+
+def _little_endian_bytes(column):
+    if sys.byteorder != 'little' and column.itemsize > 1:
+        column = array.array(column.typecode, column)
+        column.byteswap()
+    return column.tobytes()
+
+
+def write_columnar(session, path):
+    """Write a session dict to a .bscol file (atomically)"""
+    strings = {}
+    columns = {name: array.array(code) for name, code in COLUMNS.items()}
+    bettor_extras = {}
+    bet_extras = {}
+    # False if any value settlement needs had to go into the extras
+    complete = True
+
+    def intern(value):
+        if not isinstance(value, str):
+            return None
+        index = strings.get(value)
+        if index is None:
+            index = strings[value] = len(strings)
+        return index
+
+    def extras_for(row, fields, stored):
+        # Anything the columns cannot reproduce exactly goes into the header
+        extra = {key: value for key, value in row.items() if key not in stored}
+        present = [key for key in fields if key in row]
+        if list(row) != present + [key for key in row if key not in fields]:
+            extra['__keys__'] = list(row)
+        return extra
+
+    for number, bettor in enumerate(session.get('bettors', [])):
+        stored = set()
+        index = intern(bettor.get('name'))
+        columns['bettor_name'].append(NO_STRING if index is None else index)
+        if index is not None:
+            stored.add('name')
+        stake = bettor.get('stake')
+        columns['bettor_stake'].append(stake if type(stake) is float else 0.0)
+        if type(stake) is float:
+            stored.add('stake')
+        else:
+            complete = False
+        extra = extras_for(bettor, BETTOR_FIELDS, stored)
+        if extra:
+            bettor_extras[str(number)] = extra
+
+    for number, bet in enumerate(session.get('bets', [])):
+        stored = set()
+        for field, column in BET_STRING_COLUMNS:
+            index = intern(bet.get(field))
+            columns[column].append(NO_STRING if index is None else index)
+            if index is not None:
+                stored.add(field)
+        for field, column in BET_FLOAT_COLUMNS:
+            value = bet.get(field)
+            columns[column].append(value if type(value) is float else 0.0)
+            if type(value) is float:
+                stored.add(field)
+            elif field != 'odds':
+                complete = False
+        code = STATUS_CODES.get(bet.get('status'), NO_STATUS)
+        columns['bet_status'].append(code)
+        if code != NO_STATUS:
+            stored.add('status')
+        else:
+            complete = False
+        extra = extras_for(bet, BET_FIELDS, stored)
+        if extra:
+            bet_extras[str(number)] = extra
+
+    offset = 0
+    for value in strings:
+        columns['string_offsets'].append(offset)
+        encoded = value.encode('utf-8')
+        columns['string_data'].frombytes(encoded)
+        offset += len(encoded)
+    columns['string_offsets'].append(offset)
+
+    # Lay out the columns, each starting on an 8-byte boundary
+    layout = {}
+    blobs = []
+    position = 0
+    for name in COLUMNS:
+        blob = _little_endian_bytes(columns[name])
+        layout[name] = [position, len(columns[name])]
+        blobs.append((position, blob))
+        position = _align(position + len(blob))
+
+    header = json.dumps({
+        'meta': {key: value for key, value in session.items() if key not in ('bettors', 'bets')},
+        'key_order': list(session),
+        'counts': {'bettors': len(columns['bettor_stake']), 'bets': len(columns['bet_stake']),
+                   'strings': len(strings)},
+        'columns': layout,
+        'complete': complete,
+        'bettor_extras': bettor_extras,
+        'bet_extras': bet_extras,
+    }, separators=(',', ':')).encode('utf-8')
+
+    data_start = _align(PREAMBLE.size + len(header))
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(PREAMBLE.pack(MAGIC, VERSION, len(header)))
+        f.write(header)
+        for column_offset, blob in blobs:
+            f.seek(data_start + column_offset)
+            f.write(blob)
+        f.truncate(data_start + position)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class ColumnarSession:
+    """Memory-mapped, read-only view of a .bscol file"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # Empty file
+            self._file.close()
+            raise ValueError(f"{path} is not a columnar session file")
+        self._views = []
+        self._strings = None
+
+        try:
+            magic, version, header_length = PREAMBLE.unpack_from(self._map, 0)
+        except struct.error:
+            magic = version = header_length = None
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a columnar session file")
+        if version != VERSION:
+            self.close()
+            raise ValueError(f"Unsupported columnar session version {version}")
+        self.header = json.loads(self._map[PREAMBLE.size:PREAMBLE.size + header_length])
+        self._data_start = _align(PREAMBLE.size + header_length)
+        self.meta = self.header['meta']
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Release the memory map; columns returned earlier become invalid"""
+        try:
+            for view in self._views:
+                view.release()
+            if not self._map.closed:
+                self._map.close()
+        except BufferError:
+            pass  # A caller still holds a column (e.g. a NumPy array); the map closes when it is freed
+        self._views = []
+        self._file.close()
+
+    def column(self, name):
+        """Return a column as a zero-copy memoryview of native values"""
+        offset, count = self.header['columns'][name]
+        typecode = COLUMNS[name]
+        itemsize = array.array(typecode).itemsize
+        start = self._data_start + offset
+        raw = memoryview(self._map)[start:start + count * itemsize]
+        self._views.append(raw)
+        if sys.byteorder != 'little' and itemsize > 1:
+            column = array.array(typecode, raw.tobytes())
+            column.byteswap()
+            return column
+        view = raw.cast(typecode)
+        self._views.append(view)
+        return view
+
+    def strings(self):
+        """Return the decoded string table"""
+        if self._strings is None:
+            offsets = self.column('string_offsets')
+            data = self.column('string_data')
+            self._strings = [str(data[offsets[i]:offsets[i + 1]], 'utf-8')
+                             for i in range(len(offsets) - 1)]
+        return self._strings
+
+    def _lookup(self, column):
+        strings = self.strings()
+        return [None if index == NO_STRING else strings[index] for index in self.column(column)]
+
+    def bettor_names(self):
+        return self._lookup('bettor_name')
+
+    def to_session(self):
+        """Rebuild the session dict exactly as it was written"""
+        strings = self.strings()
+        bettor_extras = self.header['bettor_extras']
+        bet_extras = self.header['bet_extras']
+
+        bettors = []
+        for number, (name, stake) in enumerate(zip(self.column('bettor_name'), self.column('bettor_stake'))):
+            row = {}
+            if name != NO_STRING:
+                row['name'] = strings[name]
+            row['stake'] = stake
+            bettors.append(self._merge(row, bettor_extras.get(str(number))))
+
+        bets = []
+        columns = [self.column(name) for name in
+                   ('bet_id', 'bet_name', 'bet_description', 'bet_odds', 'bet_stake', 'bet_payout', 'bet_status')]
+        for number, (bet_id, name, description, odds, stake, payout, status) in enumerate(zip(*columns)):
+            row = {}
+            for field, index in (('id', bet_id), ('name', name), ('description', description)):
+                if index != NO_STRING:
+                    row[field] = strings[index]
+            row['odds'] = odds
+            row['stake'] = stake
+            row['potential_payout'] = payout
+            if status != NO_STATUS:
+                row['status'] = STATUS_NAMES[status]
+            bets.append(self._merge(row, bet_extras.get(str(number))))
+
+        parts = dict(self.meta, bettors=bettors, bets=bets)
+        return {key: parts[key] for key in self.header['key_order']}
+
+    @staticmethod
+    def _merge(row, extra):
+        if not extra:
+            return row
+        extra = dict(extra)
+        keys = extra.pop('__keys__', None)
+        row.update(extra)
+        if keys:
+            row = {key: row[key] for key in keys}
+        return row
+
+    def settle(self):
+        """Settle straight from the columns when possible"""
+        if not np or not self.header['complete']:
+            return settle_session(self.to_session())
+
+        arrays = SessionArrays.from_columns(
+            self.bettor_names(), self.column('bettor_stake'), self.column('bet_stake'),
+            self.column('bet_odds'), self.column('bet_payout'), self.column('bet_status'),
+            self.meta.get('total_pool', 0))
+        return arrays.settle().to_result()
+
+
+def json_to_columnar(src, dst):
+    """Convert a saved session JSON file to .bscol"""
+    with open(src, 'r') as f:
+        session = json.load(f)
+    write_columnar(session, dst)
+
+
+def columnar_to_json(src, dst):
+    """Convert a .bscol file back to the indented session JSON format"""
+    with ColumnarSession(src) as columnar:
+        session = columnar.to_session()
+    with open(dst, 'w') as f:
+        json.dump(session, f, indent=2)
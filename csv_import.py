@@ -0,0 +1,130 @@
+"""Bulk import of bettors and bets from CSV files.
+
+Rows are streamed from the file and validated a batch at a time with the
+same rules as the Add Bettor / Add Bet forms (validate_bettors and
+validate_bets), so a roster of thousands of rows is checked in one pass and
+every problem is reported together, by line number.
+
+Files saved from spreadsheets are accepted as they come: the delimiter
+(comma, semicolon or tab) is detected, a UTF-8 byte order mark is ignored,
+column headers are matched case-insensitively, and amounts may carry an
+"LKR" prefix and thousands separators.
+"""
+
+import csv
+import itertools
+
+from money import to_cents
+from session_model import bettor_key, validate_bets, validate_bettors
+
+BATCH_ROWS = 1000
+
+# Column -> accepted header names
+BETTOR_COLUMNS = {
+    'name': ('name', 'bettor', 'bettor name'),
+    'stake': ('stake', 'amount'),
+}
+BET_COLUMNS = {
+    'name': ('name', 'bet name'),
+    'description': ('bet', 'description'),
+    'odds': ('odds', 'price'),
+    'stake': ('stake', 'amount'),
+    'status': ('status', 'result'),
+}
+
+
+def clean_amount(text):
+    """Strip a currency prefix and thousands separators from a spreadsheet amount"""
+    text = text.strip()
+    if text.upper().startswith('LKR'):
+        text = text[3:]
+    return text.replace(',', '').strip()
+
+
+def iter_rows(path, columns, required):
+    """Yield (line_number, {column: text}) for every non-blank data row
+
+    Raises ValueError if a required column has no header.
+    """
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        sample = f.read(64 * 1024)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+        except csv.Error:
+            # Amounts like "1,000.50" in a semicolon file confuse the sniffer; go by the header
+            header_line = sample.splitlines()[0] if sample else ''
+            dialect = csv.excel
+            delimiter = max(',;\t', key=header_line.count)
+        else:
+            delimiter = dialect.delimiter
+        reader = csv.reader(f, dialect, delimiter=delimiter)
+        header = next(reader, None)
+        if header is None:
+            raise ValueError("The file is empty")
+
+        names = [cell.strip().casefold() for cell in header]
+        positions = {}
+        for column, aliases in columns.items():
+            for alias in aliases:
+                if alias in names:
+                    positions[column] = names.index(alias)
+                    break
+        missing = [column for column in required if column not in positions]
+        if missing:
+            raise ValueError(f"Missing column(s): {', '.join(missing)}")
+
+        for row in reader:
+            if not any(cell.strip() for cell in row):
+                continue
+            yield reader.line_num, {column: row[index] if index < len(row) else ''
+                                    for column, index in positions.items()}
+
+
+def batches(rows, size=BATCH_ROWS):
+    rows = iter(rows)
+    while True:
+        batch = list(itertools.islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def read_bettors(path, taken_names=()):
+    """Validate a bettor roster file; returns (bettors, errors)
+
+    taken_names holds bettor_key() of names already in the session. Errors
+    are (line_number, message) tuples.
+    """
+    seen = set(taken_names)
+    bettors = []
+    errors = []
+    for batch in batches(iter_rows(path, BETTOR_COLUMNS, ('name', 'stake'))):
+        valid, batch_errors = validate_bettors(
+            [(row['name'], clean_amount(row['stake'])) for _, row in batch], seen)
+        bettors.extend(valid)
+        seen.update(bettor_key(bettor['name']) for bettor in valid)
+        errors.extend((batch[number - 1][0], message) for number, message in batch_errors)
+    return bettors, errors
+
+
+def read_bets(path, available_cents):
+    """Validate a bets file against the available pool; returns (bets, errors)"""
+    bets = []
+    errors = []
+    for batch in batches(iter_rows(path, BET_COLUMNS, ('name', 'description', 'odds', 'stake'))):
+        entries = [(row['name'], row['description'], clean_amount(row['odds']), clean_amount(row['stake']),
+                    row.get('status', '')) for _, row in batch]
+        valid, batch_errors = validate_bets(entries, available_cents)
+        bets.extend(valid)
+        available_cents -= sum(to_cents(bet['stake']) for bet in valid)
+        errors.extend((batch[number - 1][0], message) for number, message in batch_errors)
+    return bets, errors
+
+
+def format_errors(errors, limit=15):
+    """Describe import errors for a message box, listing at most limit of them"""
+    lines = [f"Line {line}: {message}" for line, message in errors[:limit]]
+    if len(errors) > limit:
+        lines.append(f"... and {len(errors) - limit} more")
+    return '\n'.join(lines)
@@ -0,0 +1,195 @@
+"""Export settlement results for spreadsheets and analysis tools.
+
+Two tables are written per session: one row per bettor (the payout table
+of the results window) and one row per bet with what it returned. Rows are
+produced by generators and written as they come, so exporting never builds
+the whole table in memory; a large saved JSON session is even read bet by
+bet (see session_stream) instead of being loaded.
+
+Files ending in ``.csv`` are written as CSV; ``.parquet`` files are written
+with pyarrow, one row group per ROW_GROUP_SIZE rows. pyarrow is optional and
+only imported for Parquet exports.
+"""
+
+import csv
+import itertools
+import os
+
+from lazy_imports import lazy_module
+
+pyarrow = lazy_module('pyarrow', optional=True)
+
+from session_journal import journal_path, read_session
+from session_stream import iter_session
+from settlement import settle
+
+ROW_GROUP_SIZE = 65536
+FORMATS = ('csv', 'parquet')
+
+BETTOR_COLUMNS = ('event', 'date', 'bettor', 'stake', 'share_percent', 'share_of_winnings',
+                  'share_of_leftover', 'final_payout', 'net_profit_loss')
+BET_COLUMNS = ('event', 'date', 'bet_id', 'name', 'description', 'odds', 'stake',
+               'potential_payout', 'status', 'returned', 'profit_loss')
+
+# Parquet column types; everything else is a string
+FLOAT_COLUMNS = {'stake', 'share_percent', 'share_of_winnings', 'share_of_leftover', 'final_payout',
+                 'net_profit_loss', 'odds', 'potential_payout', 'returned', 'profit_loss'}
+
+
+class SessionSource:
+    """A session to export: its top-level fields plus a way to go over its bets
+
+    bets() may be called more than once; each call starts a new pass.
+    """
+
+    def __init__(self, fields, bets):
+        self.fields = fields
+        self._bets = bets
+
+    @classmethod
+    def from_session(cls, session):
+        fields = {key: value for key, value in session.items() if key != 'bets'}
+        return cls(fields, lambda: iter(session['bets']))
+
+    @classmethod
+    def from_file(cls, path):
+        """Open a saved session, streaming the bets of plain JSON files"""
+        if not path.endswith('.json') or os.path.exists(journal_path(path)):
+            # Journals must be replayed on a loaded session; .bscol files are memory-mapped anyway
+            return cls.from_session(read_session(path)[0])
+        fields = {key: value for kind, key, value in iter_session(path) if kind == 'field'}
+        fields.setdefault('bettors', [])
+        return cls(fields, lambda: (bet for kind, _, bet in iter_session(path) if kind == 'bet'))
+
+    def bets(self):
+        return self._bets()
+
+    def settle(self):
+        bettors = self.fields.get('bettors', [])
+        total_pool = self.fields.get('total_pool')
+        if total_pool is None:
+            total_pool = sum(bettor['stake'] for bettor in bettors)
+        return settle(bettors, self.bets(), total_pool)
+
+
+def bettor_rows(fields, result):
+    """Yield one BETTOR_COLUMNS row per bettor"""
+    event = fields.get('event', '')
+    date = fields.get('date', '')
+    for payout in result['payouts']:
+        yield (event, date, payout['name'], payout['stake'], round(payout['percentage'] * 100, 4),
+               payout['share_of_winnings'], payout['share_of_leftover'], payout['final_payout'],
+               payout['net_profit_loss'])
+
+
+def bet_rows(fields, bets):
+    """Yield one BET_COLUMNS row per bet; pending bets have no return yet"""
+    event = fields.get('event', '')
+    date = fields.get('date', '')
+    for bet in bets:
+        status = bet['status']
+        if status == 'Won':
+            returned = bet['potential_payout']
+        elif status == 'Void':
+            returned = bet['stake']
+        elif status == 'Lost':
+            returned = 0.0
+        else:
+            returned = None
+        profit_loss = None if returned is None else round(returned - bet['stake'], 2)
+        yield (event, date, bet.get('id', ''), bet['name'], bet['description'], bet['odds'], bet['stake'],
+               bet['potential_payout'], status, returned, profit_loss)
+
+
+def write_csv(path, columns, rows):
+    """Write rows to a CSV file, amounts to the cent; returns the row count"""
+    count = 0
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        float_positions = [i for i, column in enumerate(columns) if column in FLOAT_COLUMNS]
+        for row in rows:
+            row = list(row)
+            for i in float_positions:
+                if row[i] is not None:
+                    row[i] = f"{row[i]:.4f}" if columns[i] == 'share_percent' else f"{row[i]:.2f}"
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+def write_parquet(path, columns, rows, row_group_size=ROW_GROUP_SIZE):
+    """Write rows to a Parquet file a row group at a time; returns the row count"""
+    if not pyarrow:
+        raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)")
+    from pyarrow import parquet
+
+    schema = pyarrow.schema([(column, pyarrow.float64() if column in FLOAT_COLUMNS else pyarrow.string())
+                             for column in columns])
+    count = 0
+    rows = iter(rows)
+    with parquet.ParquetWriter(path, schema) as writer:
+        while True:
+            group = list(itertools.islice(rows, row_group_size))
+            if not group and count:
+                break
+            arrays = [pyarrow.array([row[i] for row in group], type=field.type) for i, field in enumerate(schema)]
+            writer.write_table(pyarrow.Table.from_arrays(arrays, schema=schema))
+            count += len(group)
+            if not group:
+                break  # An empty table still records the schema
+    return count
+
+
+def write_rows(path, columns, rows):
+    """Write rows in the format given by the file extension, replacing the file atomically"""
+    fmt = export_format(path)
+    root, ext = os.path.splitext(path)
+    tmp_path = f"{root}.tmp{ext}"
+    try:
+        if fmt == 'parquet':
+            count = write_parquet(tmp_path, columns, rows)
+        else:
+            count = write_csv(tmp_path, columns, rows)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return count
+
+
+def export_format(path):
+    """'csv' or 'parquet' from a file name; ValueError for anything else"""
+    ext = os.path.splitext(path)[1].lower().lstrip('.')
+    if ext not in FORMATS:
+        raise ValueError(f"Unsupported export format: {path} (use .csv or .parquet)")
+    return ext
+
+
+def bets_path_for(bettors_path):
+    """Path of the per-bet file written next to a per-bettor results file"""
+    root, ext = os.path.splitext(bettors_path)
+    return f"{root}_bets{ext}"
+
+
+def export_results(source, bettors_path, result=None):
+    """Write per-bettor results to bettors_path and per-bet results beside it
+
+    result is settled from the source when not given. Returns
+    [(path, row_count)] for the files written.
+    """
+    if result is None:
+        result = source.settle()
+    bets_path = bets_path_for(bettors_path)
+    return [
+        (bettors_path, write_rows(bettors_path, BETTOR_COLUMNS, bettor_rows(source.fields, result))),
+        (bets_path, write_rows(bets_path, BET_COLUMNS, bet_rows(source.fields, source.bets()))),
+    ]
+
+
+def export_session_file(session_path, output_dir=None, fmt='csv'):
+    """Export a saved session to <name>_results.<fmt> and <name>_results_bets.<fmt>"""
+    stem = os.path.splitext(os.path.basename(session_path))[0]
+    output_dir = output_dir or os.path.dirname(os.path.abspath(session_path))
+    return export_results(SessionSource.from_file(session_path),
+                          os.path.join(output_dir, f"{stem}_results.{fmt}"))
@@ -0,0 +1,165 @@
+"""Opt-in timing and counters for finding out where the app spends its time.
+
+Profiling is off unless BET_SPLITTER_PROFILE is set (to 1, or to a trace
+file path written on exit) or the app is started with ``--profile``. While
+off, instrumented functions cost one attribute check per call.
+
+Recorded data:
+
+* a span per call of every ``@timed`` function (handlers, load/save),
+* counters such as JSON bytes read and written,
+* the number of Tk widgets after each top-level handler on the Tk thread.
+
+``export_trace`` writes it all in the Chrome trace event format, which
+chrome://tracing, Perfetto and speedscope can open.
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+
+PROFILE_ENV = 'BET_SPLITTER_PROFILE'
+
+
+class Profiler:
+    """Collects spans and counters from any thread"""
+
+    def __init__(self):
+        self.enabled = False
+        self.widget_root = None  # Tk root whose widgets are counted
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._origin = time.perf_counter()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.events = []
+            self.stats = {}  # span name -> [calls, total seconds, max seconds]
+            self.counters = {}
+
+    def _now_us(self):
+        return (time.perf_counter() - self._origin) * 1e6
+
+    def span(self, name, **args):
+        """Context manager timing one block as a trace span"""
+        return _Span(self, name, args)
+
+    def _finish(self, name, start, end, args, depth):
+        seconds = (end - start) / 1e6
+        event = {'name': name, 'ph': 'X', 'ts': start, 'dur': end - start,
+                 'pid': os.getpid(), 'tid': threading.get_ident()}
+        if args:
+            event['args'] = args
+        with self._lock:
+            self.events.append(event)
+            stats = self.stats.setdefault(name, [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2] = max(stats[2], seconds)
+        # Widget counts are sampled after outermost spans on the Tk thread only
+        if depth == 0 and self.widget_root is not None and threading.current_thread() is threading.main_thread():
+            try:
+                self.set_counter('widgets', count_widgets(self.widget_root))
+            except Exception:
+                pass  # The window is being torn down
+
+    def count(self, name, amount=1):
+        """Add to a cumulative counter (e.g. bytes written)"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+            value = self.counters[name]
+        self._counter_event(name, value)
+
+    def set_counter(self, name, value):
+        """Record the current value of a gauge (e.g. widget count)"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = value
+        self._counter_event(name, value)
+
+    def _counter_event(self, name, value):
+        with self._lock:
+            self.events.append({'name': name, 'ph': 'C', 'ts': self._now_us(),
+                                'pid': os.getpid(), 'tid': threading.get_ident(),
+                                'args': {name: value}})
+
+    def summary(self):
+        """Return [(name, calls, total_seconds, max_seconds)] by total time, and the counters"""
+        with self._lock:
+            rows = sorted(((name, calls, total, longest) for name, (calls, total, longest) in self.stats.items()),
+                          key=lambda row: -row[2])
+            return rows, dict(self.counters)
+
+    def export_trace(self, path):
+        """Write everything recorded so far as a Chrome trace JSON file"""
+        with self._lock:
+            events = list(self.events)
+        threads = {event['tid'] for event in events}
+        metadata = [{'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': tid,
+                     'args': {'name': 'tk-main' if tid == threading.main_thread().ident else f"worker-{tid}"}}
+                    for tid in threads]
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': metadata + events, 'displayTimeUnit': 'ms'}, f)
+
+
+class _Span:
+    __slots__ = ('profiler', 'name', 'args', 'start', 'depth')
+
+    def __init__(self, profiler, name, args):
+        self.profiler = profiler
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        local = self.profiler._local
+        self.depth = getattr(local, 'depth', 0)
+        local.depth = self.depth + 1
+        self.start = self.profiler._now_us()
+        return self
+
+    def __exit__(self, *exc_info):
+        end = self.profiler._now_us()
+        self.profiler._local.depth = self.depth
+        self.profiler._finish(self.name, self.start, end, self.args, self.depth)
+
+
+profiler = Profiler()
+
+
+def timed(func):
+    """Record a span for every call of func while profiling is enabled"""
+    name = func.__qualname__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not profiler.enabled:
+            return func(*args, **kwargs)
+        with profiler.span(name):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def count_widgets(widget):
+    """Number of Tk widgets under (and including) widget"""
+    total = 1
+    stack = list(widget.winfo_children())
+    while stack:
+        child = stack.pop()
+        total += 1
+        stack.extend(child.winfo_children())
+    return total
+
+
+def enable_from_env():
+    """Turn profiling on if BET_SPLITTER_PROFILE is set; returns the trace path to write, if any"""
+    value = os.environ.get(PROFILE_ENV, '')
+    if not value or value == '0':
+        return None
+    profiler.enabled = True
+    return None if value == '1' else value
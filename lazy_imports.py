@@ -0,0 +1,55 @@
+"""Deferred module imports to keep startup fast.
+
+``lazy_module('tkinter.filedialog')`` returns a stand-in that imports the
+real module the first time one of its attributes is used, so modules only
+needed by dialogs or optional fast paths cost nothing until then.
+"""
+
+import importlib
+import importlib.util
+
+
+class LazyModule:
+    """Stand-in for a module that is imported on first attribute access
+
+    With optional=True a missing module is allowed: the stand-in is falsy
+    (checked without importing it) and attribute access raises ImportError.
+    """
+
+    def __init__(self, name, optional=False):
+        self.__dict__['_name'] = name
+        self.__dict__['_optional'] = optional
+        self.__dict__['_module'] = None
+        self.__dict__['_available'] = None
+
+    def _load(self):
+        module = self.__dict__['_module']
+        if module is None:
+            module = self.__dict__['_module'] = importlib.import_module(self._name)
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __bool__(self):
+        if not self._optional:
+            return True
+        if self.__dict__['_available'] is None:
+            try:
+                found = importlib.util.find_spec(self._name) is not None
+            except (ImportError, ValueError):
+                found = False
+            self.__dict__['_available'] = found
+        return self.__dict__['_available']
+
+    def __repr__(self):
+        state = 'loaded' if self.__dict__['_module'] is not None else 'not loaded'
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+def lazy_module(name, optional=False):
+    """Return a LazyModule for name"""
+    return LazyModule(name, optional)
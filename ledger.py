@@ -0,0 +1,210 @@
+"""Persistent cross-session bettor ledger.
+
+Each fully settled session is posted once per bettor into ``ledger_entries``
+and folded into ``ledger_rollups``, which keeps running per-bettor totals
+for all time, per season (calendar year of the session date) and per month.
+Reports read the rollups directly instead of re-settling old sessions.
+
+Posting is idempotent per session file: re-posting a session (for example
+after a result was corrected) first backs its previous entries out of the
+rollups, so totals never count a session twice. Amounts are stored as
+integer cents (see money), so backing entries out and in leaves the rollups
+exactly equal to a fresh sum of the entries.
+"""
+
+import os
+import sqlite3
+
+from batch import find_session_files
+from money import to_cents
+from session_journal import load_session_file
+from session_model import bettor_key
+from settlement import settle_session
+
+LEDGER_FILENAME = 'bettor_ledger.db'
+
+AMOUNT_COLUMNS = ('stake_cents', 'final_payout_cents', 'net_profit_loss_cents')
+
+# Rollup period kind -> period key taken from a "YYYY-MM-DD HH:MM:SS" session date
+PERIODS = {
+    'all': lambda date: '',
+    'season': lambda date: date[:4],
+    'month': lambda date: date[:7],
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ledger_entries (
+    session_path TEXT NOT NULL,
+    event TEXT NOT NULL,
+    date TEXT NOT NULL,
+    name TEXT NOT NULL,
+    name_key TEXT NOT NULL,
+    stake_cents INTEGER NOT NULL,
+    final_payout_cents INTEGER NOT NULL,
+    net_profit_loss_cents INTEGER NOT NULL,
+    PRIMARY KEY (session_path, name_key)
+);
+CREATE TABLE IF NOT EXISTS ledger_rollups (
+    name_key TEXT NOT NULL,
+    period_kind TEXT NOT NULL,
+    period TEXT NOT NULL,
+    name TEXT NOT NULL,
+    sessions INTEGER NOT NULL,
+    stake_cents INTEGER NOT NULL,
+    final_payout_cents INTEGER NOT NULL,
+    net_profit_loss_cents INTEGER NOT NULL,
+    PRIMARY KEY (name_key, period_kind, period)
+);
+"""
+
+ROLLUP_UPSERT = """
+INSERT INTO ledger_rollups VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (name_key, period_kind, period) DO UPDATE SET
+    name = excluded.name,
+    sessions = sessions + excluded.sessions,
+    stake_cents = stake_cents + excluded.stake_cents,
+    final_payout_cents = final_payout_cents + excluded.final_payout_cents,
+    net_profit_loss_cents = net_profit_loss_cents + excluded.net_profit_loss_cents
+"""
+
+
+class NotSettledError(ValueError):
+    """Raised when posting a session that still has pending bets"""
+
+
+class Ledger:
+    """Connection to the ledger database; open one per thread"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def _fold(self, entries, sign):
+        # Add (sign=1) or back out (sign=-1) entries from every rollup period
+        rows = []
+        for entry in entries:
+            for kind, period_of in PERIODS.items():
+                rows.append((entry['name_key'], kind, period_of(entry['date']), entry['name'], sign,
+                             sign * entry['stake_cents'], sign * entry['final_payout_cents'],
+                             sign * entry['net_profit_loss_cents']))
+        self.conn.executemany(ROLLUP_UPSERT, rows)
+
+    def post(self, session_path, session, result=None):
+        """Record a settled session's per-bettor results, replacing any earlier posting"""
+        if result is None:
+            result = settle_session(session)
+        if result['pending_count']:
+            raise NotSettledError(f"{result['pending_count']} bet(s) are still pending")
+        session_path = os.path.abspath(session_path)
+        event = session.get('event', '')
+        date = session.get('date', '')
+        entries = [{'session_path': session_path, 'event': event, 'date': date,
+                    'name': payout['name'], 'name_key': bettor_key(payout['name']),
+                    'stake_cents': to_cents(payout['stake']), 'final_payout_cents': to_cents(payout['final_payout']),
+                    'net_profit_loss_cents': to_cents(payout['net_profit_loss'])}
+                   for payout in result['payouts']]
+
+        with self.conn:
+            self._unpost(session_path)
+            self.conn.executemany(
+                "INSERT INTO ledger_entries VALUES (:session_path, :event, :date, :name, :name_key, "
+                ":stake_cents, :final_payout_cents, :net_profit_loss_cents)", entries)
+            self._fold(entries, 1)
+            self.conn.execute("DELETE FROM ledger_rollups WHERE sessions = 0")
+
+    def unpost(self, session_path):
+        """Remove a session from the ledger; returns True if it had been posted"""
+        with self.conn:
+            removed = self._unpost(os.path.abspath(session_path))
+            self.conn.execute("DELETE FROM ledger_rollups WHERE sessions = 0")
+        return removed
+
+    def _unpost(self, session_path):
+        previous = self.conn.execute("SELECT * FROM ledger_entries WHERE session_path = ?",
+                                     (session_path,)).fetchall()
+        if previous:
+            self._fold(previous, -1)
+            self.conn.execute("DELETE FROM ledger_entries WHERE session_path = ?", (session_path,))
+        return bool(previous)
+
+    def is_posted(self, session_path):
+        return self.conn.execute("SELECT 1 FROM ledger_entries WHERE session_path = ? LIMIT 1",
+                                 (os.path.abspath(session_path),)).fetchone() is not None
+
+    def balances(self, period_kind='all', period=None):
+        """Precomputed per-bettor totals in cents, by net P/L
+
+        With period None every period of that kind is returned (e.g. one row
+        per bettor per month).
+        """
+        if period_kind not in PERIODS:
+            raise ValueError(f"Unknown period kind {period_kind!r}")
+        query = "SELECT * FROM ledger_rollups WHERE period_kind = ?"
+        params = [period_kind]
+        if period is not None:
+            query += " AND period = ?"
+            params.append(period)
+        query += " ORDER BY period, net_profit_loss_cents DESC, name"
+        return self.conn.execute(query, params).fetchall()
+
+    def periods(self, period_kind):
+        """Every period of a kind that has postings, oldest first"""
+        return [row['period'] for row in self.conn.execute(
+            "SELECT DISTINCT period FROM ledger_rollups WHERE period_kind = ? ORDER BY period",
+            (period_kind,))]
+
+    def verify(self):
+        """Recompute the rollups from the entries and raise AssertionError unless they match exactly"""
+        expected = {}
+        for entry in self.conn.execute("SELECT * FROM ledger_entries"):
+            for kind, period_of in PERIODS.items():
+                totals = expected.setdefault((entry['name_key'], kind, period_of(entry['date'])), [0, 0, 0, 0])
+                totals[0] += 1
+                for i, column in enumerate(AMOUNT_COLUMNS, start=1):
+                    totals[i] += entry[column]
+
+        actual = {(row['name_key'], row['period_kind'], row['period']):
+                  [row['sessions']] + [row[column] for column in AMOUNT_COLUMNS]
+                  for row in self.conn.execute("SELECT * FROM ledger_rollups")}
+        if expected.keys() != actual.keys():
+            raise AssertionError("Ledger rollups cover different bettors/periods than the entries")
+        for key, totals in expected.items():
+            if actual[key] != totals:
+                raise AssertionError(f"Ledger rollup {key} drifted: {actual[key]} != {totals}")
+
+    def post_directory(self, root):
+        """Post (or re-post) every fully settled session under root
+
+        Returns (posted, skipped, errors); skipped counts sessions with pending bets.
+        """
+        posted = skipped = 0
+        errors = []
+        for path in find_session_files(root):
+            try:
+                session = load_session_file(path)
+                self.post(path, session)
+            except NotSettledError:
+                skipped += 1
+                continue
+            except Exception as e:
+                errors.append((path, f"{type(e).__name__}: {e}"))
+                continue
+            posted += 1
+        return posted, skipped, errors
+
+
+def post_session(db_path, session_path, session, result):
+    """Post one settled session; runs on a worker thread"""
+    with Ledger(db_path) as ledger:
+        ledger.post(session_path, session, result)
@@ -0,0 +1,104 @@
+"""Exact money arithmetic in integer cents (LKR minor units).
+
+Session files keep amounts as rupee floats for compatibility, but every
+sum and split is done on integer cents so totals never drift and shares
+always add back up to the amount being split. Splits use the largest
+remainder method: each share is first rounded down, then the cents left
+over go one at a time to the shares with the largest dropped fractions
+(earliest share first on ties), so the result is deterministic.
+
+Decimal is only used to parse amounts typed by the user; allocation runs
+on plain ints, or on int64 NumPy arrays for large batches.
+"""
+
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+
+from lazy_imports import lazy_module
+
+np = lazy_module('numpy', optional=True)  # Only needed by allocate_array
+
+CENTS = 100
+
+# Largest |amount * weight| the int64 array path handles without overflow
+_INT64_SAFE = 2 ** 62
+
+
+def to_cents(amount):
+    """Convert a rupee amount (float or int) to integer cents, rounding to the nearest cent"""
+    return int(round(amount * CENTS))
+
+
+def from_cents(cents):
+    """Convert integer cents back to a rupee float for storage or display"""
+    return cents / CENTS
+
+
+def parse_cents(text):
+    """Parse an amount typed by the user into cents; raises ValueError if it is not a number"""
+    try:
+        amount = Decimal(str(text).strip().replace(',', ''))
+    except InvalidOperation:
+        raise ValueError(f"Invalid amount: {text!r}")
+    if not amount.is_finite():
+        raise ValueError(f"Invalid amount: {text!r}")
+    try:
+        return int((amount * CENTS).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+    except InvalidOperation:  # More digits than the decimal context holds
+        raise ValueError(f"Amount too large: {text!r}")
+
+
+def add_amounts(*amounts):
+    """Sum rupee amounts exactly, returning a rupee float"""
+    return from_cents(sum(to_cents(amount) for amount in amounts))
+
+
+def format_cents(cents):
+    """Format cents as a rupee amount with two decimals, e.g. -1234 -> '-12.34'"""
+    sign = '-' if cents < 0 else ''
+    whole, fraction = divmod(abs(cents), CENTS)
+    return f"{sign}{whole}.{fraction:02d}"
+
+
+def allocate(total, weights):
+    """Split total cents in proportion to integer weights; the shares sum exactly to total
+
+    Returns a list of ints. If every weight is zero, every share is zero.
+    """
+    weight_sum = sum(weights)
+    if weight_sum <= 0:
+        return [0] * len(weights)
+
+    shares = []
+    remainders = []
+    for weight in weights:
+        share, remainder = divmod(total * weight, weight_sum)
+        shares.append(share)
+        remainders.append(remainder)
+
+    # Floor division leaves 0 <= missing < len(weights) cents to hand out
+    missing = total - sum(shares)
+    if missing:
+        order = sorted(range(len(weights)), key=remainders.__getitem__, reverse=True)
+        for i in order[:missing]:
+            shares[i] += 1
+    return shares
+
+
+def allocate_array(total, weights):
+    """Array version of allocate() for int64 NumPy weights; returns an int64 array"""
+    weights = np.asarray(weights, dtype=np.int64)
+    weight_sum = int(weights.sum())
+    if weight_sum <= 0:
+        return np.zeros(len(weights), dtype=np.int64)
+    if len(weights) and abs(total) * int(weights.max()) >= _INT64_SAFE:
+        return np.array(allocate(total, weights.tolist()), dtype=np.int64)
+
+    products = total * weights
+    shares = products // weight_sum
+    remainders = products - shares * weight_sum
+    missing = total - int(shares.sum())
+    if missing:
+        # Stable sort keeps the earliest share first among equal remainders
+        order = np.argsort(-remainders, kind='stable')
+        shares[order[:missing]] += 1
+    return shares
@@ -0,0 +1,328 @@
+"""Live market odds from an HTTP feed, used to re-price pending bets.
+
+A feed is any HTTP endpoint answering ``GET <url>?since=N&wait=S`` with
+JSON ``{"version": 12, "markets": {"Race winner": 2.5, ...}}``: the markets
+whose price changed after version N, held open for up to S seconds until
+something changes (a plain endpoint that ignores the parameters and always
+returns every market also works). ``serve_stand_in`` is such a server with
+randomly drifting prices, for trying the feed out without a bookmaker.
+
+OddsFeed polls on an asyncio loop in a daemon thread and keeps the latest
+prices in a PriceCache; only prices that actually moved are handed to its
+callback. The GUI queues those and re-prices in one batch per Tk tick, so
+a burst of market moves during a race costs one table update.
+"""
+
+import asyncio
+import json
+import math
+import random
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+from money import from_cents, to_cents
+
+DEFAULT_FEED_URL = 'http://127.0.0.1:8765/odds'
+PRICE_TTL = 300.0  # Seconds a price is trusted without the feed repeating it
+MAX_MARKETS = 5000
+LONG_POLL_SECONDS = 20.0
+MIN_POLL_INTERVAL = 0.5  # Lets bursts of market moves arrive as one update
+MAX_RETRY_DELAY = 30.0
+REQUEST_TIMEOUT = 10.0
+MIN_ODDS = 1.01
+
+
+def market_key(name):
+    """Key a bet name or market name is matched on: case and spacing ignored"""
+    return ' '.join(name.split()).casefold()
+
+
+class PriceCache:
+    """Latest odds per market, expiring after ttl seconds and capped at max_entries
+
+    When full, the least recently updated market is dropped first. Safe to
+    use from the feed thread and the Tk thread at once.
+    """
+
+    def __init__(self, ttl=PRICE_TTL, max_entries=MAX_MARKETS, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self._prices = OrderedDict()  # market_key -> (odds, updated_at)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._prices)
+
+    def update(self, markets):
+        """Store a {market: odds} batch; returns {market_key: odds} for prices that changed"""
+        now = self.clock()
+        changed = {}
+        with self._lock:
+            for market, odds in markets.items():
+                key = market_key(market)
+                previous = self._prices.pop(key, None)
+                self._prices[key] = (odds, now)
+                if previous is None or previous[0] != odds or now - previous[1] > self.ttl:
+                    changed[key] = odds
+            while len(self._prices) > self.max_entries:
+                self._prices.popitem(last=False)
+        return changed
+
+    def get(self, market):
+        """Current odds for a market, or None if unknown or expired"""
+        key = market_key(market)
+        with self._lock:
+            entry = self._prices.get(key)
+            if entry is None:
+                return None
+            if self.clock() - entry[1] > self.ttl:
+                del self._prices[key]
+                return None
+            return entry[0]
+
+    def fresh(self):
+        """Return {market_key: odds} for every unexpired price"""
+        now = self.clock()
+        with self._lock:
+            return {key: odds for key, (odds, updated_at) in self._prices.items() if now - updated_at <= self.ttl}
+
+
+def parse_markets(payload):
+    """Validate a feed response; returns (version, {market: odds})"""
+    if not isinstance(payload, dict) or not isinstance(payload.get('markets'), dict):
+        raise ValueError("Feed response has no 'markets' object")
+    markets = {}
+    for market, odds in payload['markets'].items():
+        try:
+            odds = float(odds)
+        except (TypeError, ValueError):
+            continue  # One bad price should not drop the whole update
+        if odds >= MIN_ODDS and math.isfinite(odds):
+            markets[str(market)] = round(odds, 2)
+    return int(payload.get('version', 0)), markets
+
+
+def repricing_plan(bets, prices):
+    """[(bet, odds, potential_payout)] for pending bets whose market price moved
+
+    prices maps market_key() to odds; bets are matched on their name.
+    Payouts are worked out to the cent exactly as add_bet does.
+    """
+    plan = []
+    for bet in bets:
+        if bet['status'] != 'Pending':
+            continue
+        odds = prices.get(market_key(bet['name']))
+        if odds is None or odds == bet['odds'] or not math.isfinite(bet['stake'] * odds):
+            continue
+        plan.append((bet, odds, from_cents(to_cents(bet['stake'] * odds))))
+    return plan
+
+
+async def fetch_json(url, params=None, timeout=REQUEST_TIMEOUT):
+    """GET url (http or https) and decode its JSON body"""
+    parts = urlsplit(url)
+    if parts.scheme not in ('http', 'https'):
+        raise ValueError(f"Unsupported feed URL: {url}")
+    port = parts.port or (443 if parts.scheme == 'https' else 80)
+    target = parts.path or '/'
+    query = '&'.join(part for part in (parts.query, urlencode(params or {})) if part)
+    if query:
+        target += '?' + query
+
+    reader, writer = await asyncio.wait_for(
+        asyncio.open_connection(parts.hostname, port, ssl=parts.scheme == 'https'), timeout)
+    try:
+        writer.write((f"GET {target} HTTP/1.1\r\nHost: {parts.netloc}\r\n"
+                      f"Accept: application/json\r\nConnection: close\r\n\r\n").encode('ascii'))
+        await writer.drain()
+        response = await asyncio.wait_for(reader.read(), timeout)
+    finally:
+        writer.close()
+
+    head, _, body = response.partition(b'\r\n\r\n')
+    status_line = head.split(b'\r\n', 1)[0].decode('latin-1')
+    fields = status_line.split(' ', 2)
+    if len(fields) < 2 or fields[1] != '200':
+        raise ValueError(f"Feed answered: {status_line or 'nothing'}")
+    if b'transfer-encoding: chunked' in head.lower():
+        body = _unchunk(body)
+    return json.loads(body.decode('utf-8'))
+
+
+def _unchunk(body):
+    data = bytearray()
+    while body:
+        size_line, _, body = body.partition(b'\r\n')
+        size = int(size_line.split(b';', 1)[0], 16)
+        if size == 0:
+            break
+        data += body[:size]
+        body = body[size + 2:]
+    return bytes(data)
+
+
+class OddsFeed:
+    """Polls an odds feed on a background asyncio loop
+
+    on_prices({market_key: odds}) and on_error(message) are called on the
+    feed thread; the GUI passes callbacks that only put onto a queue.
+    """
+
+    def __init__(self, url, on_prices, on_error=None, cache=None, long_poll=LONG_POLL_SECONDS):
+        self.url = url
+        self.on_prices = on_prices
+        self.on_error = on_error
+        self.cache = cache if cache is not None else PriceCache()
+        self.long_poll = long_poll
+        self.version = 0
+        self._loop = None
+        self._stopped = None
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='odds-feed', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Ask the feed thread to finish; returns without waiting for it"""
+        if self._loop is not None and self._stopped is not None:
+            self._loop.call_soon_threadsafe(self._stopped.set)
+
+    def _run(self):
+        asyncio.run(self._poll_forever())
+
+    async def _poll_forever(self):
+        self._loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        delay = 1.0
+        failing = False
+        while not self._stopped.is_set():
+            started = time.monotonic()
+            try:
+                payload = await self._wait_or_stop(fetch_json(
+                    self.url, {'since': self.version, 'wait': self.long_poll},
+                    timeout=self.long_poll + REQUEST_TIMEOUT))
+                if payload is None:
+                    break
+                version, markets = parse_markets(payload)
+            except (OSError, ValueError, asyncio.TimeoutError) as e:
+                if not failing and self.on_error:
+                    self.on_error(str(e) or type(e).__name__)
+                failing = True
+                await self._sleep(delay)
+                delay = min(delay * 2, MAX_RETRY_DELAY)
+                continue
+
+            failing = False
+            delay = 1.0
+            # A restarted feed starts counting again; ask it for everything next time
+            self.version = version if version >= self.version else 0
+            changed = self.cache.update(markets)
+            if changed:
+                self.on_prices(changed)
+            await self._sleep(max(0.0, MIN_POLL_INTERVAL - (time.monotonic() - started)))
+
+    async def _wait_or_stop(self, coroutine):
+        """Await coroutine, or return None as soon as stop() is called"""
+        task = asyncio.ensure_future(coroutine)
+        stopper = asyncio.ensure_future(self._stopped.wait())
+        await asyncio.wait((task, stopper), return_when=asyncio.FIRST_COMPLETED)
+        stopper.cancel()
+        if not task.done():
+            task.cancel()
+            return None
+        return task.result()
+
+    async def _sleep(self, seconds):
+        try:
+            await asyncio.wait_for(self._stopped.wait(), seconds)
+        except asyncio.TimeoutError:
+            pass
+
+
+class StandInFeed:
+    """Local odds feed whose prices drift randomly, for development and demos"""
+
+    def __init__(self, markets, drift=0.05, interval=1.0, moves=0.3, seed=None):
+        self.prices = {market: round(float(odds), 2) for market, odds in markets.items()}
+        self.changed_at = dict.fromkeys(self.prices, 1)  # market -> version of its last move
+        self.version = 1
+        self.drift = drift
+        self.interval = interval
+        self.moves = moves  # Share of markets that move per tick
+        self.rng = random.Random(seed)
+        self._changed = None
+
+    def tick(self):
+        """Move a random share of the markets by up to about +-drift"""
+        self.version += 1
+        for market in self.prices:
+            if self.rng.random() < self.moves:
+                odds = self.prices[market] * (1 + self.rng.gauss(0, self.drift))
+                self.prices[market] = max(MIN_ODDS, round(odds, 2))
+                self.changed_at[market] = self.version
+        # Wake every long-polling client
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def since(self, version):
+        return {market: odds for market, odds in self.prices.items() if self.changed_at[market] > version}
+
+    async def handle(self, reader, writer):
+        try:
+            request = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), REQUEST_TIMEOUT)
+            method, target = request.split(b'\r\n', 1)[0].decode('latin-1').split(' ')[:2]
+            parts = urlsplit(target)
+            if method != 'GET' or parts.path.rstrip('/') != '/odds':
+                await self._reply(writer, '404 Not Found', {'error': 'not found'})
+                return
+            query = parse_qs(parts.query)
+            since = int(query.get('since', ['0'])[0])
+            wait = min(float(query.get('wait', ['0'])[0]), 60.0)
+            if since >= self.version and wait > 0:
+                try:
+                    await asyncio.wait_for(self._changed.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+            await self._reply(writer, '200 OK', {'version': self.version, 'markets': self.since(since)})
+        except (ValueError, asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _reply(self, writer, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        writer.write(f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode('ascii') + body)
+        await writer.drain()
+
+    async def serve(self, host, port, ready=None):
+        self._changed = asyncio.Event()
+        server = await asyncio.start_server(self.handle, host, port)
+        if ready:
+            ready(server)
+        async with server:
+            while True:
+                await asyncio.sleep(self.interval)
+                self.tick()
+
+
+def serve_stand_in(markets, host='127.0.0.1', port=8765, drift=0.05, interval=1.0, seed=None):
+    """Run a StandInFeed until interrupted"""
+    feed = StandInFeed(markets, drift=drift, interval=interval, seed=seed)
+
+    def ready(server):
+        print(f"Serving {len(markets)} market(s) at http://{host}:{port}/odds (Ctrl+C to stop)")
+
+    try:
+        asyncio.run(feed.serve(host, port, ready))
+    except KeyboardInterrupt:
+        pass
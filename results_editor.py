@@ -0,0 +1,159 @@
+"""Virtualized bet results editor used by the Set Bet Results dialog.
+
+Only enough row widgets to fill the visible area are created; scrolling
+rebinds those rows to different bets. The chosen results live in a compact
+bytearray of status codes (see settlement.STATUS_CODES) instead of one
+tk.StringVar per bet.
+"""
+
+import tkinter as tk
+from tkinter import ttk
+
+from settlement import STATUS_CODES, STATUS_LOST, STATUS_VOID, STATUS_WON
+
+# Widths of the columns shared by the header and every row
+COLUMNS = (('Bet Name', 15), ('Description', 20), ('Odds', 8), ('Stake', 12), ('Potential Win', 12))
+
+
+class ResultRow:
+    """One recycled row of widgets, bound to whichever bet is shown in its slot"""
+
+    def __init__(self, parent, on_change):
+        self.index = None
+        self.on_change = on_change
+        self.frame = ttk.Frame(parent)
+        self.labels = []
+        for position, (heading, width) in enumerate(COLUMNS):
+            label = ttk.Label(self.frame, width=width)
+            if position == 0:
+                label.configure(font=('Arial', 9, 'bold'))
+            elif position == len(COLUMNS) - 1:
+                label.configure(foreground='#27ae60')
+            label.pack(side=tk.LEFT, padx=(0, 20 if position == len(COLUMNS) - 1 else 10))
+            self.labels.append(label)
+
+        self.result_var = tk.IntVar(value=STATUS_WON)
+        ttk.Radiobutton(self.frame, text="Won", variable=self.result_var, value=STATUS_WON,
+                        style="Success.TRadiobutton", command=self.changed).pack(side=tk.LEFT, padx=(0, 15))
+        ttk.Radiobutton(self.frame, text="Lost", variable=self.result_var, value=STATUS_LOST,
+                        style="Danger.TRadiobutton", command=self.changed).pack(side=tk.LEFT, padx=(0, 15))
+        ttk.Radiobutton(self.frame, text="Void", variable=self.result_var, value=STATUS_VOID,
+                        command=self.changed).pack(side=tk.LEFT)
+
+    def bind(self, index, bet, code):
+        """Show the given bet in this row"""
+        self.index = index
+        texts = (bet['name'][:15], bet['description'][:20], f"{bet['odds']:.2f}",
+                 f"LKR {bet['stake']:.2f}", f"LKR {bet['potential_payout']:.2f}")
+        for label, text in zip(self.labels, texts):
+            label.configure(text=text)
+        self.result_var.set(code)
+
+    def changed(self):
+        self.on_change(self.index, self.result_var.get())
+
+
+class VirtualResultsList(ttk.Frame):
+    """Scrollable list of bets with a Won/Lost/Void choice per bet"""
+
+    def __init__(self, parent, bets):
+        super().__init__(parent)
+        # A copy, so bets added or deleted while the dialog is open cannot shift the codes
+        self.bets = list(bets)
+        # Pending bets default to Won, as in the original editor
+        self.codes = bytearray(STATUS_CODES[bet['status']] if bet['status'] != 'Pending' else STATUS_WON
+                               for bet in bets)
+        self.first = 0
+        self.visible = 1
+        self.rows = []
+        self.row_height = None
+
+        header_row = ttk.Frame(self)
+        header_row.pack(fill=tk.X, padx=5, pady=(0, 10))
+        for heading, width in COLUMNS:
+            ttk.Label(header_row, text=heading, font=('Arial', 10, 'bold'),
+                      width=width).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Label(header_row, text="Result", font=('Arial', 10, 'bold'), width=15).pack(side=tk.LEFT, padx=(10, 0))
+        ttk.Separator(self, orient='horizontal').pack(fill=tk.X, padx=5, pady=(0, 10))
+
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.yview)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.body = ttk.Frame(self)
+        self.body.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=5)
+        # The body's size comes from the dialog, never from the rows inside it
+        self.body.grid_propagate(False)
+        self.body.grid_columnconfigure(0, weight=1)
+        self.body.bind('<Configure>', self.on_resize)
+
+        for widget in (self, self.body):
+            widget.bind('<MouseWheel>', self.on_mousewheel)
+            widget.bind('<Button-4>', lambda event: self.scroll(-1))
+            widget.bind('<Button-5>', lambda event: self.scroll(1))
+
+    def set_code(self, index, code):
+        """Record the result chosen for one bet"""
+        if index is not None:
+            self.codes[index] = code
+
+    def results(self):
+        """Return {bet id: chosen status code} for every bet in the list"""
+        return {bet['id']: code for bet, code in zip(self.bets, self.codes)}
+
+    def set_all(self, code):
+        """Set every bet to the same result"""
+        self.codes[:] = bytes([code]) * len(self.codes)
+        self.refresh()
+
+    def ensure_rows(self, count):
+        """Grow the row pool to count rows; rows are never destroyed, only reused"""
+        while len(self.rows) < count:
+            row = ResultRow(self.body, self.set_code)
+            row.frame.grid(row=len(self.rows), column=0, sticky='ew', pady=2)
+            for widget in [row.frame] + row.frame.winfo_children():
+                widget.bind('<MouseWheel>', self.on_mousewheel)
+                widget.bind('<Button-4>', lambda event: self.scroll(-1))
+                widget.bind('<Button-5>', lambda event: self.scroll(1))
+            self.rows.append(row)
+
+    def on_resize(self, event):
+        if self.row_height is None:
+            self.ensure_rows(1)
+            self.body.update_idletasks()
+            self.row_height = max(1, self.rows[0].frame.winfo_reqheight() + 4)
+        self.visible = max(1, event.height // self.row_height)
+        self.ensure_rows(min(self.visible, len(self.bets)))
+        self.refresh()
+
+    def refresh(self):
+        """Rebind the visible rows to the bets at the current scroll offset"""
+        total = len(self.bets)
+        self.first = max(0, min(self.first, total - self.visible))
+        for slot, row in enumerate(self.rows):
+            index = self.first + slot
+            if slot < self.visible and index < total:
+                row.bind(index, self.bets[index], self.codes[index])
+                row.frame.grid()
+            else:
+                row.index = None
+                row.frame.grid_remove()
+
+        if total:
+            self.scrollbar.set(self.first / total, min(1.0, (self.first + self.visible) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def scroll(self, amount):
+        self.first += amount
+        self.refresh()
+
+    def yview(self, *args):
+        """Scrollbar callback implementing the standard moveto/scroll protocol"""
+        if args[0] == 'moveto':
+            self.first = int(float(args[1]) * len(self.bets))
+        elif args[0] == 'scroll':
+            step = self.visible if args[2] == 'pages' else 1
+            self.first += int(args[1]) * step
+        self.refresh()
+
+    def on_mousewheel(self, event):
+        self.scroll(int(-1*(event.delta/120)) or (-1 if event.delta > 0 else 1))
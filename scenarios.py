@@ -0,0 +1,229 @@
+"""What-if payouts over the outcomes of a session's pending bets.
+
+Only the total paid out by winning bets depends on how pending bets end,
+and every bettor receives a stake-weighted share of the resulting final
+amount (see settlement.settle). So instead of settling all 2^n Won/Lost
+combinations, the engine works out the distribution of the final amount:
+
+* up to EXACT_BET_LIMIT pending bets, exactly, by adding one bet at a time
+  and merging combinations that pay the same total (many collapse, so the
+  work is bounded by the number of distinct totals, not 2^n);
+* beyond that, or when the distinct totals explode, by Monte Carlo
+  sampling with each bet winning with its implied probability 1/odds,
+  spread over worker threads.
+
+Per-bettor figures are then the allocation of a few final amounts
+(worst, percentiles, best) plus the expected value. Results are cached
+on the pending bets' payouts and odds, so reopening the preview without
+changes is instant.
+"""
+
+import functools
+import os
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+from money import allocate, from_cents, to_cents
+from settlement import np
+
+EXACT_BET_LIMIT = 24
+MAX_EXACT_STATES = 200000
+MONTE_CARLO_SAMPLES = 200000
+# Samples x pending bets drawn per run; fewer samples are taken for big sessions
+MONTE_CARLO_WORK = 200000000
+PURE_PYTHON_WORK = 5000000  # Without NumPy every draw is a Python loop step
+MIN_SAMPLES = 2000
+PERCENTILES = (5, 50, 95)
+HISTOGRAM_BINS = 30
+
+
+class ScenarioResult:
+    """Distribution of the final amount and what it means for each bettor
+
+    Amounts are in cents. outcomes is a list of (final_amount, probability)
+    sorted by amount; for Monte Carlo results it holds the histogram bins.
+    """
+
+    def __init__(self, method, outcomes, expected, percentiles, worst, best, samples=None):
+        self.method = method  # 'exact' or 'monte_carlo'
+        self.outcomes = outcomes
+        self.expected = expected
+        self.percentiles = percentiles  # percentile -> final amount
+        self.worst = worst
+        self.best = best
+        self.samples = samples
+
+
+def implied_probability(odds):
+    """Chance of a bet winning implied by its decimal odds"""
+    return min(1.0, 1.0 / odds) if odds > 0 else 0.0
+
+
+class ScenarioEngine:
+    """What-if analysis for one session's bettors and bets"""
+
+    def __init__(self, bettors, bets, total_pool):
+        self.bettor_names = [bettor['name'] for bettor in bettors]
+        self.stakes = [to_cents(bettor['stake']) for bettor in bettors]
+        self.pending = [bet for bet in bets if bet['status'] == 'Pending']
+
+        # Final amount if every pending bet lost; each win adds its payout
+        pool = to_cents(total_pool)
+        settled = 0
+        for bet in bets:
+            stake = to_cents(bet['stake'])
+            settled -= stake
+            if bet['status'] == 'Won':
+                settled += to_cents(bet['potential_payout'])
+            elif bet['status'] == 'Void':
+                settled += stake
+        self.base_amount = pool + settled
+        self.pool = pool
+        self.payouts = tuple(to_cents(bet['potential_payout']) for bet in self.pending)
+        self.probabilities = tuple(implied_probability(bet['odds']) for bet in self.pending)
+
+    def analyse(self):
+        """Return the ScenarioResult for the current pending bets (cached)"""
+        return _analyse(self.base_amount, self.payouts, self.probabilities)
+
+    def shares(self, final_amount):
+        """Each bettor's payout in cents for a given final amount"""
+        if self.pool <= 0:
+            return [0] * len(self.stakes)
+        return allocate(final_amount, self.stakes)
+
+    def scenario(self, won_ids):
+        """Per-bettor payouts in cents if exactly the pending bets in won_ids win"""
+        won = self.base_amount + sum(payout for bet, payout in zip(self.pending, self.payouts)
+                                     if bet['id'] in won_ids)
+        return self.shares(won)
+
+    def bettor_table(self, result):
+        """Rows of (name, stake, worst, P5, P50, expected, P95, best) in rupees"""
+        # Shares grow with the final amount, so percentiles carry over bettor by bettor
+        columns = [self.shares(result.worst)]
+        columns += [self.shares(result.percentiles[p]) for p in PERCENTILES]
+        columns.append(self.shares(result.best))
+        stake_sum = sum(self.stakes)
+        rows = []
+        for i, name in enumerate(self.bettor_names):
+            expected = result.expected * self.stakes[i] / stake_sum if stake_sum and self.pool > 0 else 0.0
+            worst, p5, p50, p95, best = (from_cents(column[i]) for column in columns)
+            rows.append((name, from_cents(self.stakes[i]), worst, p5, p50, from_cents(round(expected)), p95, best))
+        return rows
+
+
+@functools.lru_cache(maxsize=32)
+def _analyse(base_amount, payouts, probabilities):
+    if len(payouts) <= EXACT_BET_LIMIT:
+        outcomes = _exact_outcomes(payouts, probabilities)
+        if outcomes is not None:
+            return _summarise_exact(base_amount, outcomes)
+    return _monte_carlo(base_amount, payouts, probabilities)
+
+
+def _exact_outcomes(payouts, probabilities):
+    """[(winnings, probability)] over every combination, or None if too many distinct totals"""
+    if np:
+        sums = np.zeros(1, dtype=np.int64)
+        probs = np.ones(1)
+        for payout, p in zip(payouts, probabilities):
+            # Every combination so far either loses or wins this bet ...
+            sums = np.concatenate((sums, sums + payout))
+            probs = np.concatenate((probs * (1 - p), probs * p))
+            # ... then combinations with the same total are merged
+            sums, inverse = np.unique(sums, return_inverse=True)
+            probs = np.bincount(inverse.ravel(), weights=probs, minlength=len(sums))
+            if len(sums) > MAX_EXACT_STATES:
+                return None
+        return list(zip(sums.tolist(), probs.tolist()))
+
+    outcomes = {0: 1.0}
+    for payout, p in zip(payouts, probabilities):
+        merged = {}
+        for total, probability in outcomes.items():
+            merged[total] = merged.get(total, 0.0) + probability * (1 - p)
+            merged[total + payout] = merged.get(total + payout, 0.0) + probability * p
+        outcomes = merged
+        if len(outcomes) > MAX_EXACT_STATES:
+            return None
+    return sorted(outcomes.items())
+
+
+def _summarise_exact(base_amount, outcomes):
+    outcomes = [(base_amount + winnings, probability) for winnings, probability in outcomes]
+    expected = sum(amount * probability for amount, probability in outcomes)
+    percentiles = {}
+    cumulative = 0.0
+    targets = list(PERCENTILES)
+    for amount, probability in outcomes:
+        cumulative += probability
+        while targets and cumulative * 100 >= targets[0] - 1e-9:
+            percentiles[targets.pop(0)] = amount
+    for target in targets:  # Rounding left the top percentiles unfilled
+        percentiles[target] = outcomes[-1][0]
+    return ScenarioResult('exact', outcomes, expected, percentiles, outcomes[0][0], outcomes[-1][0])
+
+
+def _sample_chunk(payouts, probabilities, count, seed):
+    """Winnings totals for count random scenarios"""
+    if np:
+        rng = np.random.default_rng(seed)
+        # float64 keeps cents exact up to 2**53 and uses the BLAS matrix product
+        payouts = np.asarray(payouts, dtype=np.float64)
+        probabilities = np.asarray(probabilities)
+        totals = np.empty(count, dtype=np.int64)
+        # Rows of scenarios at a time keep the won/lost matrix small
+        step = max(1, 4000000 // max(1, len(payouts)))
+        for start in range(0, count, step):
+            won = rng.random((min(step, count - start), len(payouts))) < probabilities
+            totals[start:start + len(won)] = np.rint(won.astype(np.float64) @ payouts)
+        return totals
+    rng = random.Random(seed)
+    bets = list(zip(payouts, probabilities))
+    return [sum(payout for payout, p in bets if rng.random() < p) for _ in range(count)]
+
+
+def _monte_carlo(base_amount, payouts, probabilities, seed=0):
+    work = MONTE_CARLO_WORK if np else PURE_PYTHON_WORK
+    samples = max(MIN_SAMPLES, min(MONTE_CARLO_SAMPLES, work // max(1, len(payouts))))
+    workers = min(8, os.cpu_count() or 1) if np else 1
+    chunk = -(-samples // workers)
+    # NumPy releases the GIL in the sampling and matrix product, so threads run in parallel
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        parts = list(pool.map(lambda worker: _sample_chunk(payouts, probabilities, chunk, seed + worker),
+                              range(workers)))
+
+    if np:
+        totals = np.sort(np.concatenate(parts)) + base_amount
+        expected = base_amount + sum(payout * p for payout, p in zip(payouts, probabilities))
+        percentiles = {p: int(np.percentile(totals, p, method='nearest')) for p in PERCENTILES}
+        counts, edges = np.histogram(totals, bins=HISTOGRAM_BINS)
+        outcomes = [(int((edges[i] + edges[i + 1]) / 2), count / len(totals))
+                    for i, count in enumerate(counts.tolist())]
+    else:
+        totals = sorted(total + base_amount for part in parts for total in part)
+        expected = base_amount + sum(payout * p for payout, p in zip(payouts, probabilities))
+        percentiles = {p: totals[min(len(totals) - 1, len(totals) * p // 100)] for p in PERCENTILES}
+        low, high = totals[0], totals[-1]
+        width = max(1, -(-(high - low + 1) // HISTOGRAM_BINS))
+        counts = [0] * HISTOGRAM_BINS
+        for total in totals:
+            counts[min(HISTOGRAM_BINS - 1, (total - low) // width)] += 1
+        outcomes = [(low + width * i + width // 2, count / len(totals)) for i, count in enumerate(counts)]
+
+    # Sampling rarely hits the extremes, so report the true worst and best cases
+    worst = base_amount
+    best = base_amount + sum(payouts)
+    return ScenarioResult('monte_carlo', outcomes, expected, percentiles, worst, best, samples=len(totals))
+
+
+def histogram(result, bins=HISTOGRAM_BINS):
+    """Group a result's outcomes into equal-width bins of (low, high, probability), in cents"""
+    low = result.outcomes[0][0]
+    high = result.outcomes[-1][0]
+    width = max(1, -(-(high - low + 1) // bins))
+    probabilities = [0.0] * bins
+    for amount, probability in result.outcomes:
+        probabilities[min(bins - 1, (amount - low) // width)] += probability
+    return [(low + width * i, low + width * (i + 1), probability) for i, probability in enumerate(probabilities)]
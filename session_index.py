@@ -0,0 +1,195 @@
+"""SQLite index of saved sessions.
+
+Every saved session gets one row in ``sessions`` (event, date, totals and
+settlement summary) and one row per bettor in ``session_bettors``, so
+questions like "which sessions did Menath bet in" or "net P/L per bettor
+since March" are answered from the index instead of by opening every file.
+The index is only a cache: it can always be rebuilt from the session files.
+Amounts are stored as integer cents (see money) so sums over many sessions
+are exact.
+"""
+
+import os
+import sqlite3
+
+from batch import find_session_files
+from money import to_cents
+from session_journal import journal_path, load_session_file
+from session_model import bettor_key
+from settlement import settle_session
+
+INDEX_FILENAME = 'session_index.db'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    path TEXT PRIMARY KEY,
+    event TEXT NOT NULL,
+    date TEXT NOT NULL,
+    total_pool_cents INTEGER NOT NULL,
+    total_stake_cents INTEGER NOT NULL,
+    total_won_cents INTEGER NOT NULL,
+    total_lost_cents INTEGER NOT NULL,
+    total_void_cents INTEGER NOT NULL,
+    total_profit_cents INTEGER NOT NULL,
+    bet_count INTEGER NOT NULL,
+    pending_count INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    journal_mtime REAL NOT NULL,
+    journal_size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS session_bettors (
+    path TEXT NOT NULL REFERENCES sessions(path) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    name_key TEXT NOT NULL,
+    stake_cents INTEGER NOT NULL,
+    final_payout_cents INTEGER NOT NULL,
+    net_profit_loss_cents INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS session_bettors_name ON session_bettors(name_key);
+CREATE INDEX IF NOT EXISTS session_bettors_path ON session_bettors(path);
+CREATE INDEX IF NOT EXISTS sessions_date ON sessions(date);
+"""
+
+
+def _file_stamp(path):
+    """(mtime, size) of a session file and of its journal; (0, 0) for a missing journal
+
+    A session edited since its last compaction only changes its journal.
+    """
+    stat = os.stat(path)
+    try:
+        journal = os.stat(journal_path(path))
+    except FileNotFoundError:
+        return stat.st_mtime, stat.st_size, 0.0, 0
+    return stat.st_mtime, stat.st_size, journal.st_mtime, journal.st_size
+
+
+def _date_filters(since, until, column='s.date'):
+    # Session dates are "YYYY-MM-DD HH:MM:SS", so prefixes compare correctly as text
+    clauses, params = [], []
+    if since:
+        clauses.append(f"{column} >= ?")
+        params.append(since)
+    if until:
+        clauses.append(f"{column} < ?")
+        params.append(until)
+    return clauses, params
+
+
+class SessionIndex:
+    """Connection to the session index database
+
+    Open one per thread; sqlite3 connections are not shared across threads.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def add(self, path, session, result=None):
+        """Index (or re-index) one session file; result is its settle() output if known"""
+        path = os.path.abspath(path)
+        if result is None:
+            result = settle_session(session)
+        stamp = _file_stamp(path)
+
+        with self.conn:
+            self.conn.execute("DELETE FROM sessions WHERE path = ?", (path,))
+            self.conn.execute(
+                "INSERT INTO sessions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (path, session.get('event', ''), session.get('date', ''), to_cents(result['total_pool']),
+                 to_cents(result['total_stake']), to_cents(result['total_won']), to_cents(result['total_lost']),
+                 to_cents(result['total_void']), to_cents(result['total_profit']),
+                 len(session.get('bets', [])), result['pending_count'], *stamp))
+            self.conn.executemany(
+                "INSERT INTO session_bettors VALUES (?, ?, ?, ?, ?, ?)",
+                [(path, payout['name'], bettor_key(payout['name']), to_cents(payout['stake']),
+                  to_cents(payout['final_payout']), to_cents(payout['net_profit_loss']))
+                 for payout in result['payouts']])
+
+    def remove(self, path):
+        with self.conn:
+            self.conn.execute("DELETE FROM sessions WHERE path = ?", (os.path.abspath(path),))
+
+    def is_current(self, path):
+        """True if path is indexed and neither it nor its journal has changed on disk since"""
+        row = self.conn.execute("SELECT mtime, size, journal_mtime, journal_size FROM sessions WHERE path = ?",
+                                (os.path.abspath(path),)).fetchone()
+        return row is not None and tuple(row) == _file_stamp(path)
+
+    def update_directory(self, root):
+        """Index new or changed sessions under root and drop ones that no longer exist
+
+        Returns (indexed, removed, errors) where errors is a list of (path, message).
+        """
+        indexed = 0
+        errors = []
+        for path in find_session_files(root):
+            if self.is_current(path):
+                continue
+            try:
+                self.add(path, load_session_file(path))
+            except Exception as e:
+                errors.append((path, f"{type(e).__name__}: {e}"))
+                continue
+            indexed += 1
+
+        stale = [row['path'] for row in self.conn.execute("SELECT path FROM sessions")
+                 if not os.path.exists(row['path'])]
+        for path in stale:
+            self.remove(path)
+        return indexed, len(stale), errors
+
+    def sessions(self, bettor=None, event=None, since=None, until=None):
+        """Indexed sessions matching every given filter, newest first
+
+        bettor matches names case-insensitively; event matches any part of the event name.
+        """
+        clauses, params = _date_filters(since, until)
+        if bettor:
+            clauses.append("s.path IN (SELECT path FROM session_bettors WHERE name_key = ?)")
+            params.append(bettor_key(bettor))
+        if event:
+            clauses.append("s.event LIKE ? ESCAPE '\\'")
+            params.append('%' + event.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%')
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return self.conn.execute(
+            f"""SELECT s.*, (SELECT group_concat(name, ', ') FROM session_bettors b
+                             WHERE b.path = s.path) AS bettors
+                FROM sessions s {where} ORDER BY s.date DESC, s.path""", params).fetchall()
+
+    def bettor_totals(self, since=None, until=None):
+        """Per-bettor sums over the indexed sessions in a date range, by net P/L"""
+        clauses, params = _date_filters(since, until)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return self.conn.execute(
+            f"""SELECT min(b.name) AS name, count(*) AS sessions, sum(b.stake_cents) AS stake_cents,
+                       sum(b.final_payout_cents) AS final_payout_cents,
+                       sum(b.net_profit_loss_cents) AS net_profit_loss_cents
+                FROM session_bettors b JOIN sessions s ON s.path = b.path {where}
+                GROUP BY b.name_key ORDER BY net_profit_loss_cents DESC, name""", params).fetchall()
+
+
+def index_saved_session(db_path, path, session, result):
+    """Record a just-saved session; runs on a worker thread"""
+    with SessionIndex(db_path) as index:
+        index.add(path, session, result)
+
+
+def update_index(db_path, root):
+    """Bring the index up to date with the sessions under root; runs on a worker"""
+    with SessionIndex(db_path) as index:
+        return index.update_directory(root)
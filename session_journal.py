@@ -0,0 +1,203 @@
+"""Append-only journal of session changes.
+
+Every change made in the GUI is appended to ``<snapshot>.journal`` as one
+compact JSON line, so a crash loses at most the last unsynced batch instead
+of everything since the last save. Compaction writes the full session to the
+regular snapshot JSON (the save_session format) and empties the journal.
+
+Each record carries an increasing ``seq``; the snapshot stores the last seq
+it includes as ``journal_seq``, so replaying a journal that survived a crash
+during compaction never applies a change twice.
+"""
+
+import json
+import os
+import time
+
+from columnar import COLUMNAR_SUFFIX, ColumnarSession, write_columnar
+from instrumentation import profiler, timed
+from session_model import SessionTotals, apply_op, index_bets
+
+JOURNAL_SUFFIX = '.journal'
+
+
+def journal_path(snapshot_path):
+    """Return the journal file that belongs to a snapshot file"""
+    return snapshot_path + JOURNAL_SUFFIX
+
+
+@timed
+def write_snapshot(session, path):
+    """Atomically write the full session in the save_session JSON format
+
+    Paths ending in .bscol are written in the compact columnar format instead.
+    """
+    if path.endswith(COLUMNAR_SUFFIX):
+        write_columnar(session, path)
+        profiler.count('columnar_bytes_written', os.path.getsize(path))
+        return
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(session, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    profiler.count('json_bytes_written', os.path.getsize(path))
+
+
+def read_journal(path):
+    """Yield the records in a journal, ignoring a torn final line"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.endswith('\n'):
+                break  # The process died mid-write; this change was never acknowledged
+            yield json.loads(line)
+
+
+def trim_torn_line(path, block_size=4096):
+    """Cut a journal back to its last complete line, so appends don't follow a fragment"""
+    with open(path, 'rb+') as f:
+        end = f.seek(0, os.SEEK_END)
+        keep = end
+        while keep > 0:
+            start = max(0, keep - block_size)
+            f.seek(start)
+            newline = f.read(keep - start).rfind(b'\n')
+            if newline >= 0:
+                keep = start + newline + 1
+                break
+            keep = start
+        if keep < end:
+            f.truncate(keep)
+
+
+def read_json(path, progress=None, chunk_size=1024 * 1024):
+    """Read and parse a JSON file, reporting bytes read to progress.update(done, total)"""
+    total = os.path.getsize(path)
+    chunks = []
+    done = 0
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            done += len(chunk)
+            if progress:
+                progress.update(done, total)
+    profiler.count('json_bytes_read', done)
+    return json.loads(b''.join(chunks))
+
+
+def load_session_file(snapshot_path, progress=None):
+    """Load a snapshot and replay its journal on top, if there is one
+
+    Either file may be missing (but not both): a session that was never
+    compacted is rebuilt from its journal alone.
+    """
+    if os.path.exists(snapshot_path) and snapshot_path.endswith(COLUMNAR_SUFFIX):
+        with ColumnarSession(snapshot_path) as columnar:
+            session = columnar.to_session()
+        profiler.count('columnar_bytes_read', os.path.getsize(snapshot_path))
+    elif os.path.exists(snapshot_path):
+        session = read_json(snapshot_path, progress)
+    else:
+        session = {}
+    session.setdefault('bettors', [])
+    session.setdefault('bets', [])
+    session.setdefault('total_pool', 0)
+
+    path = journal_path(snapshot_path)
+    if os.path.exists(path):
+        replay(session, read_journal(path))
+    elif not os.path.exists(snapshot_path):
+        raise FileNotFoundError(snapshot_path)
+    return session
+
+
+@timed
+def read_session(snapshot_path, progress=None):
+    """Load a session and build its bet index and running totals
+
+    Meant to run on a worker thread or process, so the event thread only
+    has to swap the results in.
+    """
+    session = load_session_file(snapshot_path, progress)
+    return session, index_bets(session['bets']), SessionTotals(session['bets'])
+
+
+def replay(session, records):
+    """Apply journal records newer than the snapshot to the session dict"""
+    bet_index = index_bets(session['bets'])
+    last_seq = session.get('journal_seq', 0)
+    for record in records:
+        if record['seq'] <= last_seq:
+            continue
+        apply_op(session, record, bet_index)
+        last_seq = record['seq']
+    session['journal_seq'] = last_seq
+
+
+class SessionJournal:
+    """Append-only change log for one session snapshot
+
+    Records are flushed to the OS on every append; fsync is batched to every
+    fsync_every records or fsync_interval seconds, whichever comes first.
+    A journal started at last_seq 0 replaces any file already at its path.
+    """
+
+    def __init__(self, snapshot_path, last_seq=0, fsync_every=32, fsync_interval=1.0):
+        self.snapshot_path = snapshot_path
+        self.path = journal_path(snapshot_path)
+        self.seq = last_seq
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.unsynced = 0
+        self.last_sync = time.monotonic()
+        self.records_since_compaction = 0
+        # A journal left at this path by some other session must not be replayed over this one
+        if last_seq and os.path.exists(self.path):
+            trim_torn_line(self.path)  # read_journal skipped it; new records must start on a fresh line
+        self.file = open(self.path, 'a' if last_seq else 'w', encoding='utf-8')
+
+    def append(self, op):
+        """Record one change"""
+        self.seq += 1
+        record = dict(op, seq=self.seq)
+        line = json.dumps(record, separators=(',', ':')) + '\n'
+        self.file.write(line)
+        profiler.count('journal_bytes_written', len(line))
+        self.file.flush()
+        self.unsynced += 1
+        self.records_since_compaction += 1
+        if (self.unsynced >= self.fsync_every
+                or time.monotonic() - self.last_sync >= self.fsync_interval):
+            self.sync()
+
+    def sync(self):
+        """Force everything appended so far to disk"""
+        if self.unsynced:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.unsynced = 0
+        self.last_sync = time.monotonic()
+
+    def compact(self, session):
+        """Write the full session to the snapshot file and empty the journal"""
+        session['journal_seq'] = self.seq
+        write_snapshot(session, self.snapshot_path)
+        self.file.seek(0)
+        self.file.truncate()
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.unsynced = 0
+        self.records_since_compaction = 0
+
+    def close(self, remove=False):
+        """Sync and close the journal, optionally deleting it"""
+        if self.file.closed:
+            return
+        self.sync()
+        self.file.close()
+        if remove and os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,315 @@
+"""In-memory bookkeeping for the session being edited in the GUI."""
+
+import hashlib
+import json
+import math
+import uuid
+
+from money import add_amounts, from_cents, parse_cents, to_cents
+
+
+def new_bet_id():
+    """Return a new unique bet ID"""
+    return uuid.uuid4().hex[:12]
+
+
+def derived_bet_id(bet, position):
+    """Return an ID for a bet saved without one, the same every time the file is loaded
+
+    Journal records written after the load refer to this ID, so it must not
+    change when the session is reopened after a crash.
+    """
+    content = {key: value for key, value in bet.items() if key != 'id'}
+    digest = hashlib.sha1(json.dumps([position, content], sort_keys=True).encode('utf-8'))
+    return digest.hexdigest()[:12]
+
+
+def index_bets(bets):
+    """Return an id -> bet dict, giving bets from older session files an ID
+
+    Bets saved before IDs existed (or with a duplicated ID) get one derived
+    from their position and content, so every bet in the session can be
+    addressed by ID.
+    """
+    index = {}
+    for position, bet in enumerate(bets):
+        index_bet(bet, index, position)
+    return index
+
+
+def index_bet(bet, index, position=None):
+    """Add one bet to an id -> bet index, giving it an ID if needed
+
+    position is the bet's place in the loaded file; without it a missing ID
+    is replaced by a random one.
+    """
+    bet_id = bet.get('id')
+    if not bet_id or bet_id in index:
+        bet_id = bet['id'] = new_bet_id() if position is None else derived_bet_id(bet, position)
+        while bet_id in index:
+            bet_id = bet['id'] = new_bet_id()
+    index[bet_id] = bet
+
+
+def remove_bets(bets, removed):
+    """Delete the given bet dicts from a bets list in place
+
+    Bets are matched by identity, scanning back from the newest bet and
+    stopping once every one is found, so deleting recent bets stays cheap
+    however long the session is. Bets not in the list are ignored.
+    """
+    pending = {id(bet) for bet in removed}
+    for index in range(len(bets) - 1, -1, -1):
+        if not pending:
+            break
+        if id(bets[index]) in pending:
+            pending.discard(id(bets[index]))
+            del bets[index]
+
+
+def bettor_key(name):
+    """Key used to compare bettor names: case-insensitive, surrounding spaces ignored"""
+    return name.strip().casefold()
+
+
+def validate_bettors(entries, taken_names=()):
+    """Validate a whole roster of (name, stake) entries in one pass
+
+    Applies the same rules as add_bettor: a non-empty name, a stake greater
+    than 0 and a name not already used (case-insensitively) either in
+    taken_names or earlier in the roster. Stakes are rounded to the cent.
+    Returns (bettors, errors) where
+    bettors are ready-to-store dicts and errors is a list of
+    (entry_number, message) tuples, numbered from 1.
+    """
+    seen = set(taken_names)
+    bettors = []
+    errors = []
+    for number, (name, stake) in enumerate(entries, start=1):
+        name = str(name).strip()
+        try:
+            cents = parse_cents(stake)
+        except ValueError:
+            errors.append((number, "Please enter a valid stake amount"))
+            continue
+        if not name:
+            errors.append((number, "Please enter a name"))
+            continue
+        if not cents > 0:
+            errors.append((number, "Stake must be greater than 0"))
+            continue
+        key = bettor_key(name)
+        if key in seen:
+            errors.append((number, f"Bettor name '{name}' already exists"))
+            continue
+        seen.add(key)
+        bettors.append({'name': name, 'stake': from_cents(cents)})
+    return bettors, errors
+
+
+BET_STATUSES = ('Pending', 'Won', 'Lost', 'Void')
+
+
+def validate_bets(entries, available_cents):
+    """Validate a batch of (name, description, odds, stake, status) entries in one pass
+
+    Applies the same rules as add_bet: name and bet filled in, odds and
+    stake greater than 0, and stakes within the available pool, counting
+    the entries accepted before. A blank status means Pending. Returns
+    (bets, errors) like validate_bettors.
+    """
+    bets = []
+    errors = []
+    for number, (name, description, odds, stake, status) in enumerate(entries, start=1):
+        name = str(name).strip()
+        description = str(description).strip()
+        status = str(status or 'Pending').strip().capitalize()
+        try:
+            odds = float(odds)
+            cents = parse_cents(stake)
+            if not math.isfinite(odds) or not math.isfinite(from_cents(cents) * odds):
+                raise ValueError(odds)  # inf, or a payout too large to hold
+        except (TypeError, ValueError):
+            errors.append((number, "Please enter valid odds and stake values"))
+            continue
+        if not name or not description:
+            errors.append((number, "Please fill in all fields"))
+            continue
+        if not cents > 0 or not odds > 0:
+            errors.append((number, "Odds and stake must be greater than 0"))
+            continue
+        if status not in BET_STATUSES:
+            errors.append((number, f"Unknown status '{status}'"))
+            continue
+        if cents > available_cents:
+            errors.append((number, f"Not enough funds. Available: LKR {from_cents(available_cents):.2f}"))
+            continue
+        available_cents -= cents
+        bets.append({
+            'id': new_bet_id(),
+            'name': name,
+            'description': description,
+            'odds': odds,
+            'stake': from_cents(cents),
+            'potential_payout': from_cents(to_cents(from_cents(cents) * odds)),  # Paid out to the cent
+            'status': status
+        })
+    return bets, errors
+
+
+def apply_op(session, op, bet_index):
+    """Apply one recorded change (see session_journal) to a session dict
+
+    bet_index must map bet IDs to the bet dicts in session['bets'] and is
+    kept up to date.
+    """
+    kind = op['op']
+    if kind == 'session':
+        session.setdefault('date', op.get('date'))
+        session.setdefault('event', op.get('event'))
+    elif kind == 'add_bettors':
+        for bettor in op['bettors']:
+            session['bettors'].append(bettor)
+            session['total_pool'] = add_amounts(session['total_pool'], bettor['stake'])
+    elif kind == 'add_bet':
+        bet = op['bet']
+        session['bets'].append(bet)
+        bet_index[bet['id']] = bet
+    elif kind == 'add_bets':
+        for bet in op['bets']:
+            session['bets'].append(bet)
+            bet_index[bet['id']] = bet
+    elif kind in ('delete_bet', 'delete_bets'):
+        ids = op['ids'] if kind == 'delete_bets' else [op['id']]
+        deleted = [bet_index.pop(bet_id) for bet_id in ids if bet_id in bet_index]
+        remove_bets(session['bets'], deleted)
+    elif kind == 'set_status':
+        for bet_id in op['ids']:
+            if bet_id in bet_index:
+                bet_index[bet_id]['status'] = op['status']
+    elif kind == 'reprice':
+        for bet_id, odds, payout in op['prices']:
+            # Only open bets follow the market; a price that arrives after settling is stale
+            if bet_id in bet_index and bet_index[bet_id]['status'] == 'Pending':
+                bet_index[bet_id]['odds'] = odds
+                bet_index[bet_id]['potential_payout'] = payout
+    else:
+        raise ValueError(f"Unknown session operation: {kind}")
+
+
+def apply_tracked_op(session, op, bet_index, totals):
+    """apply_op that also keeps a SessionTotals for the session in step
+
+    Adding a bet whose ID is already present is ignored, so an op that
+    arrives twice is harmless.
+    """
+    kind = op['op']
+    if kind == 'add_bet':
+        if op['bet']['id'] in bet_index:
+            return
+        apply_op(session, op, bet_index)
+        totals.add_bet(op['bet'])
+        return
+    if kind == 'add_bets':
+        bets = [bet for bet in op['bets'] if bet['id'] not in bet_index]
+        apply_op(session, dict(op, bets=bets), bet_index)
+        for bet in bets:
+            totals.add_bet(bet)
+        return
+    if kind in ('delete_bet', 'delete_bets'):
+        ids = dict.fromkeys(op['ids']) if kind == 'delete_bets' else [op['id']]
+        touched = [bet_index[bet_id] for bet_id in ids if bet_id in bet_index]
+    elif kind == 'set_status':
+        touched = [bet_index[bet_id] for bet_id in op['ids'] if bet_id in bet_index]
+    elif kind == 'reprice':
+        touched = [bet_index[bet_id] for bet_id, _, _ in op['prices']
+                   if bet_id in bet_index and bet_index[bet_id]['status'] == 'Pending']
+    else:
+        touched = []
+    for bet in touched:
+        totals.remove_bet(bet)
+    apply_op(session, op, bet_index)
+    for bet in touched:
+        if bet['id'] in bet_index:
+            totals.add_bet(bet)
+
+
+class SessionTotals:
+    """Running totals over a session's bets, kept up to date in O(1) per change
+
+    Every add, delete or status change must go through add_bet, remove_bet
+    or set_status so the totals never need a full recount. Amounts are
+    kept in integer cents, so adding and removing bets never drifts; the
+    rupee properties are for display and comparisons.
+    """
+
+    FIELDS = ('bet_count', 'used_stake_cents', 'won_payout_cents', 'lost_stake_cents',
+              'void_stake_cents', 'pending_count')
+
+    def __init__(self, bets=()):
+        self.bet_count = 0
+        self.used_stake_cents = 0
+        self.won_payout_cents = 0
+        self.lost_stake_cents = 0
+        self.void_stake_cents = 0
+        self.pending_count = 0
+        for bet in bets:
+            self.add_bet(bet)
+
+    @property
+    def used_stake(self):
+        return from_cents(self.used_stake_cents)
+
+    @property
+    def won_payout(self):
+        return from_cents(self.won_payout_cents)
+
+    @property
+    def lost_stake(self):
+        return from_cents(self.lost_stake_cents)
+
+    @property
+    def void_stake(self):
+        return from_cents(self.void_stake_cents)
+
+    def add_bet(self, bet):
+        """Account for a newly added bet"""
+        self.bet_count += 1
+        self.used_stake_cents += to_cents(bet['stake'])
+        self._count_status(bet, bet['status'], 1)
+
+    def remove_bet(self, bet):
+        """Account for a deleted bet"""
+        self.bet_count -= 1
+        self.used_stake_cents -= to_cents(bet['stake'])
+        self._count_status(bet, bet['status'], -1)
+
+    def set_status(self, bet, status):
+        """Change a bet's status and move it between the status totals"""
+        if bet['status'] == status:
+            return
+        self._count_status(bet, bet['status'], -1)
+        bet['status'] = status
+        self._count_status(bet, status, 1)
+
+    def _count_status(self, bet, status, sign):
+        if status == 'Won':
+            self.won_payout_cents += sign * to_cents(bet['potential_payout'])
+        elif status == 'Lost':
+            self.lost_stake_cents += sign * to_cents(bet['stake'])
+        elif status == 'Void':
+            self.void_stake_cents += sign * to_cents(bet['stake'])
+        elif status == 'Pending':
+            self.pending_count += sign
+
+    def verify(self, bets):
+        """Debug check: compare the running totals against a full recount"""
+        expected = SessionTotals(bets)
+        mismatched = []
+        for field in self.FIELDS:
+            actual_value = getattr(self, field)
+            expected_value = getattr(expected, field)
+            if actual_value != expected_value:
+                mismatched.append(f"{field}: running {actual_value!r}, recount {expected_value!r}")
+        if mismatched:
+            raise AssertionError("Session totals out of sync - " + "; ".join(mismatched))
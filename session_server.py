@@ -0,0 +1,315 @@
+"""Share one betting session between several Bet Splitter windows.
+
+SessionServer is a single asyncio process that owns the session. Clients
+connect over TCP and exchange newline-delimited JSON messages:
+
+* ``{"type": "hello", "client": id}`` from a client is answered with a
+  ``snapshot`` of the whole session and its version;
+* ``{"type": "op", "id": n, "op": {...}}`` sends one change, in the same
+  format as the session journal (add_bet, set_status, ...);
+* the server checks each op against the current session (names unique,
+  stakes within the available pool, ...), applies it, bumps the version
+  and pushes ``{"type": "op", "version": v, "origin": client, ...}`` to
+  every client, the sender included as its acknowledgement;
+* an op that no longer fits (say, two operators spending the same last
+  rupees) is answered with ``reject`` and a fresh ``snapshot``;
+* a line that is not a JSON object, or a message with an unknown type or
+  no valid op, is answered with ``reject`` alone; the connection stays open.
+
+Because every change goes through the server in one order, all clients end
+up with the same session; nobody overwrites anyone else's file. Each client
+applies its own edits at once and keeps them as pending until they come
+back. Status changes still pending are re-applied over remote ones, so each
+client shows what the server will end up with. The server journals every
+accepted op next to its session file, exactly as the GUI does.
+"""
+
+import asyncio
+import json
+import math
+import queue
+import threading
+import uuid
+from collections import OrderedDict
+
+from money import from_cents, to_cents
+from session_journal import SessionJournal
+from session_model import BET_STATUSES, SessionTotals, apply_tracked_op, bettor_key, index_bets, validate_bettors
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8766
+COMPACT_EVERY = 1000
+MAX_LINE_BYTES = 16 * 1024 * 1024
+
+# Ops that overwrite fields, so replaying them after a remote op restores their effect
+OVERWRITE_OPS = ('set_status', 'reprice')
+
+
+def encode(message):
+    return (json.dumps(message, separators=(',', ':')) + '\n').encode('utf-8')
+
+
+def parse_address(text):
+    """Split "host:port" (either part optional) into (host, port)"""
+    host, _, port = text.strip().rpartition(':')
+    if not host and not port.isdigit():
+        return port or DEFAULT_HOST, DEFAULT_PORT
+    return host or DEFAULT_HOST, int(port) if port else DEFAULT_PORT
+
+
+def is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+def check_bet(bet):
+    """Return why a bet sent by a client is malformed, or None"""
+    if not isinstance(bet, dict) or not isinstance(bet.get('id'), str):
+        return "Malformed operation: bet has no ID"
+    if not isinstance(bet.get('name'), str) or not isinstance(bet.get('description'), str):
+        return "Bet name and description must be text"
+    if not all(is_number(bet.get(field)) for field in ('odds', 'stake', 'potential_payout')):
+        return "Odds, stake and payout must be numbers"
+    return None
+
+
+def check_ids(ids):
+    if not isinstance(ids, list) or not all(isinstance(bet_id, str) for bet_id in ids):
+        return "Malformed operation: bet IDs must be a list of text"
+    return None
+
+
+def check_op(session, bet_index, totals, op):
+    """Return why op cannot be applied to the session, or None if it can"""
+    kind = op.get('op')
+    names = {bettor_key(bettor['name']) for bettor in session['bettors']}
+    available = to_cents(session['total_pool']) - totals.used_stake_cents
+    if kind == 'add_bettors':
+        _, errors = validate_bettors([(bettor.get('name', ''), bettor.get('stake'))
+                                      for bettor in op.get('bettors', [])], names)
+        return errors[0][1] if errors else None
+    if kind in ('add_bet', 'add_bets'):
+        bets = op['bets'] if kind == 'add_bets' else [op['bet']]
+        if not isinstance(bets, list):
+            return "Malformed operation: bets must be a list"
+        for bet in bets:
+            reason = check_bet(bet)
+            if reason:
+                return reason
+            if bet['id'] in bet_index:
+                return "Bet is already in the session"
+            if not bet['odds'] > 0 or not to_cents(bet['stake']) > 0:
+                return "Odds and stake must be greater than 0"
+            if bet['status'] not in BET_STATUSES:
+                return f"Unknown status {bet['status']!r}"
+        if sum(to_cents(bet['stake']) for bet in bets) > available:
+            return f"Not enough funds. Available: LKR {from_cents(available):.2f}"
+        return None
+    if kind == 'set_status':
+        if op['status'] not in BET_STATUSES:
+            return f"Unknown status {op['status']!r}"
+        return check_ids(op['ids'])
+    if kind == 'delete_bet':
+        return None if isinstance(op['id'], str) else "Malformed operation: bet ID must be text"
+    if kind == 'delete_bets':
+        return check_ids(op['ids'])
+    if kind == 'reprice':
+        prices = op['prices']
+        if not isinstance(prices, list) or not all(
+                isinstance(price, list) and len(price) == 3 and isinstance(price[0], str)
+                and is_number(price[1]) and is_number(price[2]) for price in prices):
+            return "Malformed operation: prices must be [bet ID, odds, payout] entries"
+        for bet_id, _, _ in prices:
+            if bet_id in bet_index and bet_index[bet_id]['status'] != 'Pending':
+                return "Bet was settled before its new price arrived"
+        return None
+    return f"Operation {kind!r} cannot be shared"
+
+
+class SessionServer:
+    """Owns a shared session and orders every client's changes"""
+
+    def __init__(self, session, snapshot_path=None):
+        self.session = session
+        self.bet_index = index_bets(session['bets'])
+        self.totals = SessionTotals(session['bets'])
+        self.version = 0
+        self.clients = {}  # writer -> client ID
+        self.journal = None
+        if snapshot_path:
+            self.journal = SessionJournal(snapshot_path, session.get('journal_seq', 0))
+            self.journal.compact(session)  # Start from a snapshot that holds everything so far
+
+    def submit(self, op):
+        """Check and apply one op; returns (version, None) or (None, reason)"""
+        if not isinstance(op, dict):
+            return None, "Malformed operation: not an object"
+        try:
+            reason = check_op(self.session, self.bet_index, self.totals, op)
+        except (KeyError, TypeError, ValueError, AttributeError) as e:
+            reason = f"Malformed operation: {e}"
+        if reason:
+            return None, reason
+        apply_tracked_op(self.session, op, self.bet_index, self.totals)
+        self.version += 1
+        if self.journal:
+            self.journal.append(op)
+            if self.journal.records_since_compaction >= COMPACT_EVERY:
+                self.journal.compact(self.session)
+        return self.version, None
+
+    def snapshot_message(self):
+        return {'type': 'snapshot', 'version': self.version, 'session': self.session}
+
+    async def handle(self, reader, writer):
+        client = None
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    message = None
+                if not isinstance(message, dict):
+                    writer.write(encode({'type': 'reject', 'id': None, 'reason': "Malformed message: not a JSON object"}))
+                    await writer.drain()
+                    continue
+                kind = message.get('type')
+                if kind == 'hello':
+                    client = str(message.get('client') or uuid.uuid4().hex)
+                    self.clients[writer] = client
+                    writer.write(encode(self.snapshot_message()))
+                elif kind == 'op' and client is not None:
+                    version, reason = self.submit(message.get('op'))
+                    if reason:
+                        # The snapshot lets the sender drop its own copy of the change
+                        writer.write(encode({'type': 'reject', 'id': message.get('id'), 'reason': reason}))
+                        writer.write(encode(self.snapshot_message()))
+                    else:
+                        self.broadcast({'type': 'op', 'version': version, 'origin': client,
+                                        'id': message.get('id'), 'op': message['op']})
+                else:
+                    reason = "Say hello first" if kind == 'op' else f"Unknown message type {kind!r}"
+                    writer.write(encode({'type': 'reject', 'id': message.get('id'), 'reason': reason}))
+                await writer.drain()
+        except (ConnectionError, ValueError, asyncio.LimitOverrunError):
+            pass  # A broken or misbehaving client only loses its own connection
+        finally:
+            self.clients.pop(writer, None)
+            writer.close()
+
+    def broadcast(self, message):
+        data = encode(message)
+        for writer in list(self.clients):
+            if writer.is_closing():
+                self.clients.pop(writer, None)
+            else:
+                writer.write(data)
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT, ready=None):
+        server = await asyncio.start_server(self.handle, host, port, limit=MAX_LINE_BYTES)
+        if ready:
+            ready(server)
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        """Write the final snapshot and close the journal"""
+        if self.journal:
+            self.journal.compact(self.session)
+            self.journal.close(remove=True)
+            self.journal = None
+
+
+def serve_session(session, snapshot_path, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """Run a SessionServer until interrupted"""
+    server = SessionServer(session, snapshot_path)
+
+    def ready(_):
+        print(f"Sharing '{session.get('event', 'Unknown')}' on {host}:{port} (Ctrl+C to stop)")
+
+    try:
+        asyncio.run(server.serve(host, port, ready))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+class SessionClient:
+    """Connection to a SessionServer, run on an asyncio loop in a daemon thread
+
+    Server messages are put on the messages queue for the Tk thread to
+    drain; a final {"type": "closed"} is queued when the connection ends.
+    """
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.client_id = uuid.uuid4().hex
+        self.messages = queue.Queue()
+        self.pending = OrderedDict()  # op ID -> op applied locally but not yet confirmed
+        self.version = 0
+        self._next_id = 0
+        self._loop = None
+        self._writer = None
+        self._thread = threading.Thread(target=self._run, name='session-client', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        asyncio.run(self._connect())
+
+    async def _connect(self):
+        self._loop = asyncio.get_running_loop()
+        reason = "Connection closed by the server"
+        try:
+            reader, self._writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port, limit=MAX_LINE_BYTES), 10)
+            self._writer.write(encode({'type': 'hello', 'client': self.client_id}))
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                self.messages.put(json.loads(line))
+        except (OSError, ValueError, asyncio.TimeoutError, asyncio.LimitOverrunError) as e:
+            reason = str(e) or type(e).__name__
+        finally:
+            if self._writer:
+                self._writer.close()
+            self.messages.put({'type': 'closed', 'reason': reason})
+
+    def send(self, op):
+        """Send an op already applied locally; it stays pending until the server echoes it"""
+        self._next_id += 1
+        self.pending[self._next_id] = op
+        data = encode({'type': 'op', 'id': self._next_id, 'op': op})
+        if self._loop is not None and self._writer is not None:
+            self._loop.call_soon_threadsafe(self._writer.write, data)
+
+    def close(self):
+        if self._loop is not None and self._writer is not None:
+            self._loop.call_soon_threadsafe(self._writer.close)
+
+    def receive(self, message, session, bet_index, totals):
+        """Fold one server message into the local session (on the Tk thread)
+
+        Returns the message type, or None for an echo of a local change.
+        """
+        kind = message['type']
+        if kind == 'snapshot':
+            self.pending.clear()  # The snapshot already reflects everything the server accepted
+            self.version = message['version']
+        elif kind == 'op':
+            self.version = message['version']
+            if message['origin'] == self.client_id and self.pending.pop(message['id'], None) is not None:
+                return None  # Ours, and already applied when it was made
+            apply_tracked_op(session, message['op'], bet_index, totals)
+            # Local changes the server has not ordered yet come after this one
+            for op in self.pending.values():
+                if op['op'] in OVERWRITE_OPS:
+                    apply_tracked_op(session, op, bet_index, totals)
+        return kind
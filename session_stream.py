@@ -0,0 +1,171 @@
+"""Incremental reader for very large session JSON files.
+
+The top-level session object is parsed field by field and the ``bets``
+array element by element, so the header and the first bets are available
+long before the whole file has been read.
+"""
+
+import codecs
+import json
+import os
+import threading
+
+from instrumentation import profiler
+
+WHITESPACE = ' \t\n\r'
+NUMBER_CHARS = '0123456789.eE+-'
+
+_decoder = json.JSONDecoder()
+
+
+class _Buffer:
+    """Decoded text read from a file in chunks, consumed from the front"""
+
+    def __init__(self, f, chunk_size):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.text = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self, size=None):
+        """Read one more chunk; returns False at end of file"""
+        if self.eof:
+            return False
+        data = self.f.read(size or self.chunk_size)
+        if not data:
+            self.eof = True
+            self.text = self.text[self.pos:] + self.decoder.decode(b'', final=True)
+            self.pos = 0
+            return False
+        # Drop what has been consumed so the buffer stays about one chunk long
+        self.text = self.text[self.pos:] + self.decoder.decode(data)
+        self.pos = 0
+        return True
+
+    def skip(self, chars=WHITESPACE):
+        """Skip the given characters and return the next one ('' at end of file)"""
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in chars:
+                self.pos += 1
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.fill():
+                return ''
+
+    def expect(self, char):
+        if self.skip() != char:
+            raise json.JSONDecodeError(f"Expecting '{char}'", self.text, self.pos)
+        self.pos += 1
+
+    def value(self):
+        """Decode the next complete JSON value"""
+        self.skip()
+        # Values bigger than a chunk (e.g. a long bettors list) are retried with
+        # doubling reads so re-parsing the partial value stays linear overall
+        size = self.chunk_size
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError:
+                if self.fill(size):
+                    size *= 2
+                    continue
+                raise
+            # A number that runs up to the buffer end may be cut short, even
+            # if what was read so far already parses ("12." or "1e" gives 12, 1)
+            stop = end
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                while stop < len(self.text) and self.text[stop] in NUMBER_CHARS:
+                    stop += 1
+            if stop == len(self.text) and self.fill(size):
+                size *= 2
+                continue
+            self.pos = end
+            return value
+
+
+def iter_session(path, chunk_size=256 * 1024):
+    """Yield ('field', key, value) for top-level fields and ('bet', None, bet) per bet
+
+    Fields and bets come out in file order; with files written by
+    save_session that means date, event and bettors before any bet.
+    """
+    with open(path, 'rb') as f:
+        buf = _Buffer(f, chunk_size)
+        buf.expect('{')
+        if buf.skip() == '}':
+            return
+        while True:
+            key = buf.value()
+            buf.expect(':')
+            if key == 'bets' and buf.skip() == '[':
+                buf.pos += 1
+                if buf.skip() == ']':
+                    buf.pos += 1
+                else:
+                    while True:
+                        yield 'bet', None, buf.value()
+                        separator = buf.skip()
+                        buf.pos += 1
+                        if separator == ']':
+                            break
+                        if separator != ',':
+                            raise json.JSONDecodeError("Expecting ',' delimiter", buf.text, buf.pos - 1)
+            else:
+                yield 'field', key, buf.value()
+
+            separator = buf.skip()
+            buf.pos += 1
+            if separator == '}':
+                return
+            if separator != ',':
+                raise json.JSONDecodeError("Expecting ',' delimiter", buf.text, buf.pos - 1)
+
+
+class StreamedSession:
+    """Session being read on a worker thread and drained by the mainloop"""
+
+    def __init__(self, path):
+        self.path = path
+        self.fields = {}
+        self.done = False
+        self.error = None
+        self._bets = []
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name='bet-splitter-stream', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        try:
+            for kind, key, value in iter_session(self.path):
+                if kind == 'bet':
+                    with self._lock:
+                        self._bets.append(value)
+                else:
+                    with self._lock:
+                        self.fields[key] = value
+            profiler.count('json_bytes_read', os.path.getsize(self.path))
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
+
+    def header(self, key, default=None):
+        with self._lock:
+            return self.fields.get(key, default)
+
+    def header_fields(self):
+        """Return a copy of the top-level fields read so far"""
+        with self._lock:
+            return dict(self.fields)
+
+    def take_bets(self):
+        """Return the bets parsed since the last call"""
+        with self._lock:
+            bets, self._bets = self._bets, []
+        return bets
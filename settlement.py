@@ -0,0 +1,228 @@
+"""Tk-free settlement engine for Bet Splitter sessions.
+
+The functions here take the same data the GUI keeps in ``self.bettors``,
+``self.bets`` and ``self.total_pool`` (or a whole session dict as written by
+``save_session``) and return the payout figures shown in the results window.
+
+Large pools can be settled through the optional NumPy-backed path
+(``SessionArrays``), which uses the same formulas on columnar arrays.
+"""
+
+from lazy_imports import lazy_module
+
+# NumPy is optional (the pure-Python path always works) and slow to import,
+# so it is only loaded when the vectorized path runs; `not np` if missing
+np = lazy_module('numpy', optional=True)
+
+from money import CENTS, allocate, allocate_array, from_cents, to_cents
+
+# Integer codes used wherever bet statuses are held in arrays
+STATUS_PENDING = 0
+STATUS_WON = 1
+STATUS_LOST = 2
+STATUS_VOID = 3
+STATUS_NAMES = ('Pending', 'Won', 'Lost', 'Void')
+STATUS_CODES = {name: code for code, name in enumerate(STATUS_NAMES)}
+
+
+def settle(bettors, bets, total_pool, vectorized=False):
+    """Settle one session and return totals plus per-bettor payouts
+
+    Amounts are accumulated and split in integer cents (see money.py), so
+    the final payouts add up exactly to the final amount and the leftover
+    shares to the leftover money; the returned figures are rupee floats.
+
+    With vectorized=True the math runs on NumPy arrays (see SessionArrays);
+    callers that only need aggregates should keep the SettlementArrays
+    instead of converting back to per-bettor dicts.
+    """
+    if vectorized:
+        return SessionArrays(bettors, bets, total_pool).settle().to_result()
+
+    # Single pass over the bets for every total we need
+    total_stake = 0
+    total_won = 0
+    total_lost = 0
+    total_void = 0
+    pending_count = 0
+    for bet in bets:
+        stake = to_cents(bet['stake'])
+        status = bet['status']
+        total_stake += stake
+        if status == 'Won':
+            total_won += to_cents(bet['potential_payout'])
+        elif status == 'Lost':
+            total_lost += stake
+        elif status == 'Void':
+            total_void += stake
+        elif status == 'Pending':
+            pending_count += 1
+
+    pool = to_cents(total_pool)
+    # Void bets hand their stake back
+    total_profit = total_won + total_void - total_stake
+
+    # Money not used in bets is handed back proportionally
+    leftover_money = pool - total_stake
+    final_amount = pool + total_profit
+
+    stakes = [to_cents(bettor['stake']) for bettor in bettors]
+    if pool > 0:
+        final_payouts = allocate(final_amount, stakes)
+        leftover_shares = allocate(leftover_money, stakes)
+    else:
+        final_payouts = leftover_shares = [0] * len(stakes)
+
+    payouts = []
+    for bettor, stake, final_payout, share_of_leftover in zip(bettors, stakes, final_payouts, leftover_shares):
+        payouts.append({
+            'name': bettor['name'],
+            'stake': from_cents(stake),
+            'percentage': stake / pool if pool > 0 else 0,
+            'share_of_winnings': from_cents(final_payout - share_of_leftover),
+            'share_of_leftover': from_cents(share_of_leftover),
+            'final_payout': from_cents(final_payout),
+            'net_profit_loss': from_cents(final_payout - stake),
+        })
+
+    return {
+        'total_pool': from_cents(pool),
+        'total_stake': from_cents(total_stake),
+        'total_won': from_cents(total_won),
+        'total_lost': from_cents(total_lost),
+        'total_void': from_cents(total_void),
+        'total_profit': from_cents(total_profit),
+        'pending_count': pending_count,
+        'leftover_money': from_cents(leftover_money),
+        'final_amount': from_cents(final_amount),
+        'payouts': payouts,
+    }
+
+
+def _cents_array(values):
+    # Rupee floats -> int64 cents, rounded like money.to_cents
+    return np.rint(np.asarray(values, dtype=np.float64) * CENTS).astype(np.int64)
+
+
+class SessionArrays:
+    """Columnar NumPy view of a session's bettors and bets
+
+    Stakes, payouts and the pool are held as int64 cents.
+    """
+
+    def __init__(self, bettors, bets, total_pool):
+        if not np:
+            raise RuntimeError("NumPy is required for vectorized settlement")
+        self.total_pool = to_cents(total_pool)
+        self.bettor_names = [bettor['name'] for bettor in bettors]
+        self.bettor_stakes = _cents_array(np.fromiter((bettor['stake'] for bettor in bettors),
+                                                      dtype=np.float64, count=len(bettors)))
+        self.bet_stakes = _cents_array(np.fromiter((bet['stake'] for bet in bets),
+                                                   dtype=np.float64, count=len(bets)))
+        self.bet_odds = np.fromiter((bet['odds'] for bet in bets),
+                                    dtype=np.float64, count=len(bets))
+        self.bet_payouts = _cents_array(np.fromiter((bet['potential_payout'] for bet in bets),
+                                                    dtype=np.float64, count=len(bets)))
+        self.bet_status = np.fromiter((STATUS_CODES[bet['status']] for bet in bets),
+                                      dtype=np.int8, count=len(bets))
+
+    @classmethod
+    def from_columns(cls, bettor_names, bettor_stakes, bet_stakes, bet_odds, bet_payouts,
+                     bet_status, total_pool):
+        """Wrap existing rupee column buffers (e.g. a memory-mapped file)
+
+        Odds and statuses are used without copying; amounts are converted to cents.
+        """
+        if not np:
+            raise RuntimeError("NumPy is required for vectorized settlement")
+        arrays = cls.__new__(cls)
+        arrays.total_pool = to_cents(total_pool)
+        arrays.bettor_names = bettor_names
+        arrays.bettor_stakes = _cents_array(bettor_stakes)
+        arrays.bet_stakes = _cents_array(bet_stakes)
+        arrays.bet_odds = np.asarray(bet_odds, dtype=np.float64)
+        arrays.bet_payouts = _cents_array(bet_payouts)
+        arrays.bet_status = np.asarray(bet_status, dtype=np.int8)
+        return arrays
+
+    @property
+    def bettor_weights(self):
+        """Each bettor's fraction of the total pool"""
+        if self.total_pool > 0:
+            return self.bettor_stakes / self.total_pool
+        return np.zeros(len(self.bettor_stakes))
+
+    def settle(self):
+        """Compute every total and payout in one vectorized pass"""
+        return SettlementArrays(self)
+
+
+class SettlementArrays:
+    """Settlement results held as arrays, one element per bettor
+
+    Amounts are int64 cents (totals are Python ints); to_result() converts
+    them to the rupee floats settle() returns.
+    """
+
+    def __init__(self, arrays):
+        won = arrays.bet_status == STATUS_WON
+        lost = arrays.bet_status == STATUS_LOST
+
+        self.names = arrays.bettor_names
+        self.stakes = arrays.bettor_stakes
+        self.total_pool = arrays.total_pool
+        self.total_stake = int(arrays.bet_stakes.sum())
+        self.total_won = int(arrays.bet_payouts[won].sum())
+        self.total_lost = int(arrays.bet_stakes[lost].sum())
+        self.total_void = int(arrays.bet_stakes[arrays.bet_status == STATUS_VOID].sum())
+        self.total_profit = self.total_won + self.total_void - self.total_stake
+        self.pending_count = int(np.count_nonzero(arrays.bet_status == STATUS_PENDING))
+        self.leftover_money = self.total_pool - self.total_stake
+        self.final_amount = self.total_pool + self.total_profit
+
+        self.percentage = arrays.bettor_weights
+        if self.total_pool > 0:
+            self.final_payout = allocate_array(self.final_amount, self.stakes)
+            self.share_of_leftover = allocate_array(self.leftover_money, self.stakes)
+        else:
+            self.final_payout = np.zeros(len(self.stakes), dtype=np.int64)
+            self.share_of_leftover = np.zeros(len(self.stakes), dtype=np.int64)
+        self.share_of_winnings = self.final_payout - self.share_of_leftover
+        self.net_profit_loss = self.final_payout - self.stakes
+
+    def to_result(self):
+        """Return the same dict structure as settle()"""
+        columns = zip(self.names, (self.stakes / CENTS).tolist(), self.percentage.tolist(),
+                      (self.share_of_winnings / CENTS).tolist(), (self.share_of_leftover / CENTS).tolist(),
+                      (self.final_payout / CENTS).tolist(), (self.net_profit_loss / CENTS).tolist())
+        payouts = [{
+            'name': name,
+            'stake': stake,
+            'percentage': percentage,
+            'share_of_winnings': share_of_winnings,
+            'share_of_leftover': share_of_leftover,
+            'final_payout': final_payout,
+            'net_profit_loss': net_profit_loss,
+        } for name, stake, percentage, share_of_winnings, share_of_leftover,
+              final_payout, net_profit_loss in columns]
+
+        return {
+            'total_pool': from_cents(self.total_pool),
+            'total_stake': from_cents(self.total_stake),
+            'total_won': from_cents(self.total_won),
+            'total_lost': from_cents(self.total_lost),
+            'total_void': from_cents(self.total_void),
+            'total_profit': from_cents(self.total_profit),
+            'pending_count': self.pending_count,
+            'leftover_money': from_cents(self.leftover_money),
+            'final_amount': from_cents(self.final_amount),
+            'payouts': payouts,
+        }
+
+
+def settle_session(session, vectorized=False):
+    """Settle a session dict in the format written by save_session"""
+    return settle(session.get('bettors', []),
+                  session.get('bets', []),
+                  session.get('total_pool', 0),
+                  vectorized=vectorized)
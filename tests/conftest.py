@@ -0,0 +1,49 @@
+import os
+import random
+import sys
+
+import pytest
+
+# The modules live flat at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from session_model import new_bet_id
+
+STATUSES = ('Pending', 'Won', 'Lost', 'Void')
+
+
+def make_bet(rng, name=None, status=None):
+    """A bet dict as add_bet builds it, with awkward amounts"""
+    stake_cents = rng.randint(1, 500000)
+    odds = round(rng.uniform(1.01, 12.0), 2)
+    return {
+        'id': new_bet_id(),
+        'name': name or rng.choice(('Verstappen', 'Norris', 'Leclerc', 'Piastri', 'Hamilton')),
+        'description': rng.choice(('Race winner', 'Podium', 'Fastest lap', 'Pole')),
+        'odds': odds,
+        'stake': stake_cents / 100,
+        'potential_payout': round(stake_cents * odds) / 100,
+        'status': status or rng.choice(STATUSES),
+    }
+
+
+def make_session(rng, bettor_count, bet_count, settled=False):
+    """A session dict whose bets fit inside the pool"""
+    bettors = [{'name': f"Bettor {i}", 'stake': rng.randint(1, 1000000) / 100} for i in range(bettor_count)]
+    pool_cents = sum(round(bettor['stake'] * 100) for bettor in bettors)
+    bets = []
+    used = 0
+    for _ in range(bet_count):
+        bet = make_bet(rng, status=rng.choice(STATUSES[1:]) if settled else None)
+        stake = round(bet['stake'] * 100)
+        if used + stake > pool_cents:
+            break
+        used += stake
+        bets.append(bet)
+    return {'date': '2025-09-21 23:27:54', 'event': 'Test GP', 'bettors': bettors, 'bets': bets,
+            'total_pool': pool_cents / 100}
+
+
+@pytest.fixture
+def rng():
+    return random.Random(1234)
@@ -0,0 +1,35 @@
+import csv
+
+from batch import settle_directory
+from session_journal import SessionJournal, write_snapshot
+
+
+def write_session(path, stake, status='Pending'):
+    bet = {'id': 'a', 'name': 'a', 'description': 'd', 'odds': 3.0, 'stake': stake,
+           'potential_payout': round(stake * 3, 2), 'status': status}
+    write_snapshot({'event': 'E', 'date': 'D', 'bettors': [{'name': 'Kasun', 'stake': stake}],
+                    'bets': [bet], 'total_pool': stake}, path)
+    return bet
+
+
+def test_settles_the_journal_and_sums_in_cents(tmp_path):
+    sessions = tmp_path / 'sessions'
+    sessions.mkdir()
+    write_session(str(sessions / 'betting_session_1.json'), 0.1, 'Won')
+    path = str(sessions / 'betting_session_2.json')
+    write_session(path, 0.2, 'Won')
+    journal = SessionJournal(path)
+    journal.append({'op': 'set_status', 'ids': ['a'], 'status': 'Lost'})  # Not compacted into the snapshot yet
+    journal.close()
+
+    ledger_path = str(tmp_path / 'ledger.csv')
+    totals, errors = settle_directory(str(sessions), ledger_path, workers=1)
+    assert errors == []
+    assert totals['Kasun']['stake'] == 0.3
+    assert totals['Kasun']['sessions'] == 2
+
+    with open(ledger_path, newline='') as f:
+        rows = {row['session_file']: row for row in csv.DictReader(f)}
+    assert rows['betting_session_1.json']['final_payout'] == '0.30'
+    assert rows['betting_session_2.json']['final_payout'] == '0.00'
+    assert rows['betting_session_2.json']['net_profit_loss'] == '-0.20'
@@ -0,0 +1,121 @@
+import pytest
+
+from bet_view import SORT_KEYS, BetFilter, BetsView
+from conftest import STATUSES, make_bet
+
+
+def expected_rows(view):
+    """Rows worked out from scratch: a stable sort, reversed when descending"""
+    bets = list(view.bets)
+    if view.sort_column:
+        bets.sort(key=SORT_KEYS[view.sort_column])
+        if view.descending:
+            bets.reverse()
+    return [bet for bet in bets if not view.filter.active or view.filter.matches(bet)]
+
+
+def assert_rows(view):
+    assert [bet['id'] for bet in view.rows] == [bet['id'] for bet in expected_rows(view)]
+
+
+def test_sort_uses_typed_values(rng):
+    bets = [make_bet(rng) for _ in range(3)]
+    bets[0]['stake'], bets[1]['stake'], bets[2]['stake'] = 900.0, 1000.0, 95.5
+    view = BetsView(bets)
+    view.sort_by('Stake')
+    assert [bet['stake'] for bet in view.rows] == [95.5, 900.0, 1000.0]
+    view.sort_by('Stake')
+    assert [bet['stake'] for bet in view.rows] == [1000.0, 900.0, 95.5]
+
+
+def test_status_sorts_in_fixed_order(rng):
+    bets = [make_bet(rng, status=status) for status in ('Void', 'Lost', 'Won', 'Pending')]
+    view = BetsView(bets)
+    view.sort_by('Status')
+    assert [bet['status'] for bet in view.rows] == list(STATUSES)
+
+
+@pytest.mark.parametrize('column, descending', [(None, False)] + [(column, descending)
+                                                                  for column in SORT_KEYS
+                                                                  for descending in (False, True)])
+def test_order_after_adds_and_removes(rng, column, descending):
+    bets = []
+    view = BetsView(bets)
+    if column:
+        view.sort_by(column)
+        if descending:
+            view.sort_by(column)
+    # Few distinct names and odds so there are plenty of equal keys
+    view.set_filter(BetFilter('', {'Pending', 'Won'}) if rng.random() < 0.5 else BetFilter())
+    for _ in range(400):
+        if rng.random() < 0.65 or not bets:
+            new = [make_bet(rng) for _ in range(rng.randint(1, 3))]
+            for bet in new:
+                bet['odds'] = rng.choice((1.5, 2.0, 3.0))
+            bets.extend(new)
+            positions = view.add(new)
+            if len(new) == 1:  # Later bets of a batch can shift the rows of earlier ones
+                if positions[0] is None:
+                    assert not view.filter.matches(new[0])
+                else:
+                    assert view.rows[positions[0]] is new[0]
+        else:
+            bet = bets.pop(rng.randrange(len(bets)))
+            view.remove(bet)
+        assert_rows(view)
+
+
+def test_cached_orders_survive_sort_changes(rng):
+    bets = [make_bet(rng) for _ in range(200)]
+    view = BetsView(bets)
+    for column in ('Odds', 'Name', 'Odds', 'Stake'):
+        view.sort_by(column)
+        new = make_bet(rng)
+        bets.append(new)
+        view.add([new])
+        removed = bets.pop(rng.randrange(len(bets)))
+        view.remove(removed)
+        assert_rows(view)
+
+
+def test_narrowing_filter_matches_full_refilter(rng):
+    bets = [make_bet(rng) for _ in range(500)]
+    view = BetsView(bets)
+    view.sort_by('Odds')
+    for text in ('n', 'no', 'nor', 'norr'):
+        view.set_filter(BetFilter(text))
+        assert_rows(view)
+    view.set_filter(BetFilter('o', None, 2.0, 6.0))  # Wider text, so rebuilt from every bet
+    assert_rows(view)
+    view.set_filter(BetFilter('o', {'Won'}, 2.5, 6.0))
+    assert_rows(view)
+
+
+def test_update_rebuilds_only_when_order_depends_on_field(rng):
+    bets = [make_bet(rng) for _ in range(100)]
+    view = BetsView(bets)
+    view.sort_by('Odds')
+    for bet in bets[:30]:
+        bet['status'] = 'Won'
+    assert view.update(('status',)) is False
+    assert_rows(view)
+
+    for bet in bets[:30]:
+        bet['odds'] = round(rng.uniform(1.01, 12.0), 2)
+    assert view.update(('odds', 'potential_payout')) is True
+    assert_rows(view)
+
+    view.set_filter(BetFilter('', {'Lost'}))
+    for bet in bets[30:60]:
+        bet['status'] = 'Lost'
+    assert view.update(('status',)) is True
+    assert_rows(view)
+
+
+def test_filter_narrows():
+    assert BetFilter('nor').narrows(BetFilter('no'))
+    assert not BetFilter('no').narrows(BetFilter('nor'))
+    assert BetFilter('', {'Won'}).narrows(BetFilter('', {'Won', 'Lost'}))
+    assert not BetFilter('', {'Won', 'Void'}).narrows(BetFilter('', {'Won'}))
+    assert BetFilter('', None, 2.0, 3.0).narrows(BetFilter('', None, 1.5))
+    assert not BetFilter('', None, None, 3.0).narrows(BetFilter('', None, 1.5))
@@ -0,0 +1,73 @@
+import pytest
+
+from csv_import import format_errors, read_bets, read_bettors
+
+
+def write(tmp_path, text, name='import.csv', encoding='utf-8'):
+    path = tmp_path / name
+    path.write_text(text, encoding=encoding)
+    return str(path)
+
+
+def test_roster_from_a_spreadsheet_export(tmp_path):
+    path = write(tmp_path, "Bettor Name\tAmount\r\nKasun\tLKR 1,000.50\r\n\t\r\nNimal\t250\r\n",
+                 encoding='utf-8-sig')
+    bettors, errors = read_bettors(path)
+    assert errors == []
+    assert bettors == [{'name': 'Kasun', 'stake': 1000.5}, {'name': 'Nimal', 'stake': 250.0}]
+
+
+def test_every_roster_error_is_reported_by_line(tmp_path):
+    path = write(tmp_path, "name,stake\nKasun,100\nkasun ,50\nNimal,abc\nSaman,1e30\n,10\n")
+    bettors, errors = read_bettors(path, taken_names={'amal'})
+    assert [bettor['name'] for bettor in bettors] == ['Kasun']
+    assert [line for line, _ in errors] == [3, 4, 5, 6]
+
+
+def test_names_already_in_the_session_are_refused(tmp_path):
+    path = write(tmp_path, "name,stake\nAmal,100\n")
+    bettors, errors = read_bettors(path, taken_names={'amal'})
+    assert bettors == [] and errors[0][0] == 2
+
+
+def test_bets_are_checked_against_the_pool_across_batches(tmp_path, monkeypatch):
+    import csv_import
+    monkeypatch.setattr(csv_import, 'BATCH_ROWS', 2)
+    rows = ''.join(f"Bet {i},Winner,2.0,30,\n" for i in range(5))
+    path = write(tmp_path, "name,bet,odds,stake,status\n" + rows)
+    bets, errors = read_bets(path, available_cents=10000)
+    assert len(bets) == 3
+    assert all(bet['status'] == 'Pending' and bet['potential_payout'] == 60.0 for bet in bets)
+    assert [line for line, _ in errors] == [5, 6]
+
+
+def test_bad_bet_rows_are_errors_not_exceptions(tmp_path):
+    path = write(tmp_path, "name,bet,odds,stake,status\n"
+                           "A,Win,inf,10,\n"
+                           "B,Win,1e400,10,\n"
+                           "C,Win,1e308,10,\n"
+                           "D,Win,2,10,Maybe\n"
+                           "E,Win,0,10,\n"
+                           "F,Win,2.5,10,won\n")
+    bets, errors = read_bets(path, available_cents=100000)
+    assert [(bet['name'], bet['status']) for bet in bets] == [('F', 'Won')]
+    assert [line for line, _ in errors] == [2, 3, 4, 5, 6]
+
+
+def test_missing_columns_and_empty_files(tmp_path):
+    with pytest.raises(ValueError, match='stake'):
+        read_bettors(write(tmp_path, "name\nKasun\n"))
+    with pytest.raises(ValueError):
+        read_bettors(write(tmp_path, "", name='empty.csv'))
+
+
+def test_format_errors_truncates_long_lists():
+    text = format_errors([(line, "bad") for line in range(2, 22)], limit=3)
+    assert text.splitlines() == ["Line 2: bad", "Line 3: bad", "Line 4: bad", "... and 17 more"]
+
+
+def test_semicolon_file_with_thousands_separators(tmp_path):
+    path = write(tmp_path, "Bettor Name;Amount\r\nKasun;LKR 1,000.50\r\n;;\r\nNimal;250\r\n")
+    bettors, errors = read_bettors(path)
+    assert errors == []
+    assert bettors == [{'name': 'Kasun', 'stake': 1000.5}, {'name': 'Nimal', 'stake': 250.0}]
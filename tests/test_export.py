@@ -0,0 +1,86 @@
+import csv
+import os
+
+import pytest
+
+from conftest import make_session
+from export import (BET_COLUMNS, BETTOR_COLUMNS, SessionSource, export_format, export_results,
+                    export_session_file, write_rows)
+from session_journal import SessionJournal, read_session, write_snapshot
+from settlement import settle
+
+
+def read_csv(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.reader(f))
+
+
+@pytest.fixture
+def session_path(rng, tmp_path):
+    path = str(tmp_path / 'betting_session_test.json')
+    write_snapshot(make_session(rng, 4, 30), path)
+    return path
+
+
+def test_streamed_export_matches_the_loaded_session(session_path, tmp_path):
+    written = export_session_file(session_path, str(tmp_path))
+    assert [os.path.basename(path) for path, _ in written] == [
+        'betting_session_test_results.csv', 'betting_session_test_results_bets.csv']
+
+    session = read_session(session_path)[0]
+    result = settle(session['bettors'], session['bets'], session['total_pool'])
+    bettors = read_csv(written[0][0])
+    assert bettors[0] == list(BETTOR_COLUMNS)
+    assert [row[2:4] for row in bettors[1:]] == [[payout['name'], f"{payout['stake']:.2f}"]
+                                                 for payout in result['payouts']]
+    assert [row[7] for row in bettors[1:]] == [f"{payout['final_payout']:.2f}" for payout in result['payouts']]
+
+    bets = read_csv(written[1][0])
+    assert bets[0] == list(BET_COLUMNS)
+    assert [row[2] for row in bets[1:]] == [bet['id'] for bet in session['bets']]
+    assert written[1][1] == len(session['bets'])
+
+
+def test_bet_rows_show_what_each_bet_returned(tmp_path):
+    bet = {'id': 'a', 'name': 'n', 'description': 'd', 'odds': 2.5, 'stake': 10.0, 'potential_payout': 25.0}
+    session = {'event': 'E', 'date': 'D', 'bettors': [{'name': 'K', 'stake': 100.0}], 'total_pool': 100.0,
+               'bets': [dict(bet, id=status, status=status) for status in ('Won', 'Lost', 'Void', 'Pending')]}
+    path = str(tmp_path / 'out.csv')
+    export_results(SessionSource.from_session(session), path)
+    rows = read_csv(str(tmp_path / 'out_bets.csv'))[1:]
+    assert [(row[8], row[9], row[10]) for row in rows] == [
+        ('Won', '25.00', '15.00'), ('Lost', '0.00', '-10.00'), ('Void', '10.00', '0.00'), ('Pending', '', '')]
+
+
+def test_journaled_changes_are_exported(session_path, tmp_path):
+    bet_id = read_session(session_path)[0]['bets'][0]['id']
+    journal = SessionJournal(session_path, 0)
+    journal.append({'op': 'set_status', 'ids': [bet_id], 'status': 'Void'})
+    journal.close()
+
+    path, _ = export_session_file(session_path, str(tmp_path))[1]
+    rows = read_csv(path)[1:]
+    assert rows[0][2] == bet_id and rows[0][8] == 'Void'
+
+
+def test_parquet_export(session_path, tmp_path):
+    parquet = pytest.importorskip('pyarrow.parquet')
+    written = export_session_file(session_path, str(tmp_path), fmt='parquet')
+    table = parquet.read_table(written[0][0])
+    assert table.column_names == list(BETTOR_COLUMNS)
+    assert table.num_rows == written[0][1] == 4
+    assert table.schema.field('final_payout').type == 'double'
+
+
+def test_unknown_format_and_failed_writes_leave_no_files(tmp_path):
+    with pytest.raises(ValueError):
+        export_format('results.xlsx')
+
+    def rows():
+        yield ('E', 'D', 'K', 1.0, 100.0, 0.0, 0.0, 1.0, 0.0)
+        raise RuntimeError("disk full")
+
+    path = str(tmp_path / 'results.csv')
+    with pytest.raises(RuntimeError):
+        write_rows(path, BETTOR_COLUMNS, rows())
+    assert os.listdir(tmp_path) == []
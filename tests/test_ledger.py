@@ -0,0 +1,35 @@
+from conftest import make_session
+from ledger import Ledger
+from money import to_cents
+from settlement import settle_session
+
+
+def test_reposting_keeps_rollups_exact(tmp_path, rng):
+    sessions = [make_session(rng, 6, 30, settled=True) for _ in range(20)]
+    with Ledger(str(tmp_path / 'ledger.db')) as ledger:
+        for round_number in range(5):
+            for number, session in enumerate(sessions):
+                if round_number:
+                    # Correct a result and post the same file again
+                    bet = rng.choice(session['bets'])
+                    bet['status'] = 'Lost' if bet['status'] == 'Won' else 'Won'
+                ledger.post(str(tmp_path / f"s{number}.json"), session)
+            ledger.verify()
+
+        expected = {}
+        for session in sessions:
+            for payout in settle_session(session)['payouts']:
+                expected[payout['name'].casefold()] = (expected.get(payout['name'].casefold(), 0)
+                                                       + to_cents(payout['net_profit_loss']))
+        balances = {row['name_key']: row['net_profit_loss_cents'] for row in ledger.balances('all', '')}
+        assert balances == expected
+        assert all(row['sessions'] == len(sessions) for row in ledger.balances('all', ''))
+
+
+def test_unpost_removes_rollups(tmp_path, rng):
+    session = make_session(rng, 3, 5, settled=True)
+    with Ledger(str(tmp_path / 'ledger.db')) as ledger:
+        ledger.post(str(tmp_path / 's.json'), session)
+        assert ledger.unpost(str(tmp_path / 's.json'))
+        ledger.verify()
+        assert ledger.balances() == []
@@ -0,0 +1,72 @@
+import random
+
+import pytest
+
+from money import add_amounts, allocate, allocate_array, format_cents, parse_cents, to_cents
+
+
+def test_allocate_shares_add_up_to_total():
+    rng = random.Random(1)
+    for _ in range(2000):
+        weights = [rng.randint(0, 10 ** rng.randint(1, 9)) for _ in range(rng.randint(1, 30))]
+        if not any(weights):
+            weights[0] = 1
+        total = rng.randint(-10 ** 9, 10 ** 9)
+        shares = allocate(total, weights)
+        assert sum(shares) == total
+        weight_sum = sum(weights)
+        for share, weight in zip(shares, weights):
+            # Every share is its exact proportion rounded down or up
+            assert abs(share * weight_sum - total * weight) < weight_sum
+
+
+def test_allocate_gives_leftover_cents_to_earliest_share_on_ties():
+    assert allocate(100, [1, 1, 1]) == [34, 33, 33]
+    assert allocate(2, [1, 1, 1]) == [1, 1, 0]
+
+
+def test_allocate_with_zero_weights():
+    assert allocate(500, [0, 0]) == [0, 0]
+    assert allocate(500, []) == []
+    assert allocate(500, [0, 3]) == [0, 500]
+
+
+def test_allocate_array_matches_allocate():
+    np = pytest.importorskip('numpy')
+    rng = random.Random(2)
+    for _ in range(500):
+        weights = [rng.randint(0, 10 ** 8) for _ in range(rng.randint(1, 50))]
+        total = rng.randint(-10 ** 10, 10 ** 10)
+        shares = allocate_array(total, np.array(weights, dtype=np.int64))
+        assert shares.dtype == np.int64
+        assert shares.tolist() == allocate(total, weights)
+        assert int(shares.sum()) == (total if any(weights) else 0)
+
+
+def test_allocate_array_falls_back_before_int64_overflow():
+    np = pytest.importorskip('numpy')
+    weights = [2 ** 40, 3, 2 ** 41]
+    total = 2 ** 30 + 7
+    assert allocate_array(total, np.array(weights, dtype=np.int64)).tolist() == allocate(total, weights)
+
+
+def test_parse_cents_rounds_half_up():
+    assert parse_cents('1,234.565') == 123457
+    assert parse_cents(' 0.1 ') == 10
+    assert parse_cents('-2.005') == -201
+    for text in ('', 'abc', 'nan', 'inf', '1e30', '-9' * 40):
+        with pytest.raises(ValueError):
+            parse_cents(text)
+
+
+def test_huge_bettor_stake_is_a_validation_error():
+    from session_model import validate_bettors
+    valid, errors = validate_bettors([('a', '1e30')])
+    assert valid == [] and len(errors) == 1
+
+
+def test_amount_helpers_are_exact():
+    assert add_amounts(0.1, 0.2) == 0.3
+    assert to_cents(sum([0.1] * 10)) == 100
+    assert format_cents(-1234) == '-12.34'
+    assert format_cents(5) == '0.05'
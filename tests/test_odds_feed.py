@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+from odds_feed import PriceCache, StandInFeed, fetch_json, market_key, parse_markets, repricing_plan
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_cache_reports_only_moved_prices():
+    cache = PriceCache(clock=Clock())
+    assert cache.update({'Race Winner': 2.5, 'Podium': 1.5}) == {'race winner': 2.5, 'podium': 1.5}
+    assert cache.update({'race  winner': 2.5, 'Podium': 1.6}) == {'podium': 1.6}
+    assert cache.get(' RACE winner ') == 2.5
+
+
+def test_cache_expires_prices_after_the_ttl():
+    clock = Clock()
+    cache = PriceCache(ttl=10, clock=clock)
+    cache.update({'a': 2.0})
+    clock.now = 5
+    cache.update({'b': 3.0})
+    clock.now = 12
+    assert cache.get('a') is None
+    assert cache.fresh() == {'b': 3.0}
+    # A repeated price that had expired counts as a change again
+    assert cache.update({'b': 3.0}) == {}
+    clock.now = 30
+    assert cache.update({'b': 3.0}) == {'b': 3.0}
+
+
+def test_cache_drops_the_least_recently_updated_market():
+    cache = PriceCache(max_entries=2, clock=Clock())
+    cache.update({'a': 2.0, 'b': 3.0})
+    cache.update({'a': 2.1})
+    cache.update({'c': 4.0})
+    assert len(cache) == 2
+    assert cache.get('b') is None
+    assert (cache.get('a'), cache.get('c')) == (2.1, 4.0)
+
+
+def test_parse_markets_skips_bad_prices():
+    version, markets = parse_markets({'version': '7', 'markets': {
+        'Winner': '2.456', 'Podium': 'evens', 'Pole': None, 'Lap': 1.0, 'Top 10': 1.01,
+        'Sprint': 'inf', 'Quali': 1e400}})
+    assert version == 7
+    assert markets == {'Winner': 2.46, 'Top 10': 1.01}
+    for payload in ([], {}, {'markets': [1, 2]}):
+        with pytest.raises(ValueError):
+            parse_markets(payload)
+
+
+def test_repricing_plan_only_moves_pending_bets():
+    bets = [
+        {'name': 'Race Winner', 'status': 'Pending', 'odds': 2.0, 'stake': 33.33},
+        {'name': 'race winner', 'status': 'Won', 'odds': 2.0, 'stake': 10.0},
+        {'name': 'Podium', 'status': 'Pending', 'odds': 1.5, 'stake': 10.0},
+        {'name': 'Pole', 'status': 'Pending', 'odds': 4.0, 'stake': 10.0},
+    ]
+    plan = repricing_plan(bets, {market_key('Race Winner'): 2.35, 'podium': 1.5})
+    assert plan == [(bets[0], 2.35, 78.33)]
+    assert repricing_plan(bets, {'podium': 1e308}) == []  # The payout would not fit a float
+
+
+def test_stand_in_feed_answers_changes_since_a_version():
+    feed = StandInFeed({'Winner': 2.0, 'Podium': 1.5}, drift=0.5, moves=1.0, seed=3)
+
+    async def run():
+        server = await asyncio.start_server(feed.handle, '127.0.0.1', 0)
+        feed._changed = asyncio.Event()
+        url = f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}/odds"
+        first = await fetch_json(url, {'since': 0, 'wait': 0})
+        feed.tick()
+        second = await fetch_json(url, {'since': first['version'], 'wait': 0})
+        third = await fetch_json(url, {'since': second['version'], 'wait': 0})
+        server.close()
+        await server.wait_closed()
+        return first, second, third
+
+    first, second, third = asyncio.run(run())
+    assert parse_markets(first) == (1, {'Winner': 2.0, 'Podium': 1.5})
+    assert second['version'] == 2 and set(second['markets']) == {'Winner', 'Podium'}
+    assert third['markets'] == {}
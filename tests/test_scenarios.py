@@ -0,0 +1,99 @@
+import itertools
+
+import pytest
+
+import scenarios
+from conftest import make_session
+from money import to_cents
+from scenarios import ScenarioEngine, histogram
+from settlement import settle
+
+
+def settle_as(session, won_ids):
+    """settle() with every pending bet marked Won (if in won_ids) or Lost"""
+    bets = [dict(bet, status=('Won' if bet['id'] in won_ids else 'Lost') if bet['status'] == 'Pending'
+                 else bet['status']) for bet in session['bets']]
+    return settle(session['bettors'], bets, session['total_pool'])
+
+
+@pytest.fixture
+def session(rng):
+    session = make_session(rng, 30, 12)
+    assert len(session['bets']) == 12
+    for bet in session['bets'][:4]:
+        bet['status'] = rng.choice(('Won', 'Lost', 'Void'))
+    for bet in session['bets'][4:]:
+        bet['status'] = 'Pending'
+    return session
+
+
+def test_scenario_matches_settling_that_outcome(session, rng):
+    engine = ScenarioEngine(session['bettors'], session['bets'], session['total_pool'])
+    pending = [bet['id'] for bet in engine.pending]
+    for _ in range(20):
+        won = {bet_id for bet_id in pending if rng.random() < 0.5}
+        expected = [to_cents(payout['final_payout']) for payout in settle_as(session, won)['payouts']]
+        assert engine.scenario(won) == expected
+
+
+def test_exact_distribution_covers_every_combination(session):
+    engine = ScenarioEngine(session['bettors'], session['bets'], session['total_pool'])
+    result = engine.analyse()
+    assert result.method == 'exact' and len(engine.pending) == 8
+
+    brute = {}
+    for wins in itertools.product((False, True), repeat=len(engine.pending)):
+        won = {bet['id'] for bet, win in zip(engine.pending, wins) if win}
+        probability = 1.0
+        for bet, win in zip(engine.pending, wins):
+            p = scenarios.implied_probability(bet['odds'])
+            probability *= p if win else 1 - p
+        amount = to_cents(settle_as(session, won)['final_amount'])
+        brute[amount] = brute.get(amount, 0.0) + probability
+
+    assert [amount for amount, _ in result.outcomes] == sorted(brute)
+    for amount, probability in result.outcomes:
+        assert probability == pytest.approx(brute[amount])
+    assert result.worst == min(brute) and result.best == max(brute)
+    assert result.expected == pytest.approx(sum(a * p for a, p in brute.items()))
+    assert result.worst <= result.percentiles[5] <= result.percentiles[50] <= result.percentiles[95] <= result.best
+
+
+def test_monte_carlo_stays_within_the_true_range(session, monkeypatch):
+    monkeypatch.setattr(scenarios, 'EXACT_BET_LIMIT', 0)
+    monkeypatch.setattr(scenarios, 'MONTE_CARLO_SAMPLES', 4000)
+    scenarios._analyse.cache_clear()
+    engine = ScenarioEngine(session['bettors'], session['bets'], session['total_pool'])
+    result = engine.analyse()
+    scenarios._analyse.cache_clear()
+
+    exact = scenarios._summarise_exact(engine.base_amount,
+                                       scenarios._exact_outcomes(engine.payouts, engine.probabilities))
+    assert result.method == 'monte_carlo'
+    assert (result.worst, result.best) == (exact.worst, exact.best)
+    assert result.expected == pytest.approx(exact.expected)
+    for p in scenarios.PERCENTILES:
+        assert exact.worst <= result.percentiles[p] <= exact.best
+    assert sum(probability for _, probability in result.outcomes) == pytest.approx(1.0)
+
+
+def test_bettor_table_and_histogram(session):
+    engine = ScenarioEngine(session['bettors'], session['bets'], session['total_pool'])
+    result = engine.analyse()
+    rows = engine.bettor_table(result)
+    assert [row[0] for row in rows] == [bettor['name'] for bettor in session['bettors']]
+    for name, stake, worst, p5, p50, expected, p95, best in rows:
+        assert worst <= p5 <= p50 <= p95 <= best
+        assert worst <= expected <= best
+    bins = histogram(result, bins=7)
+    assert len(bins) == 7
+    assert sum(probability for _, _, probability in bins) == pytest.approx(1.0)
+
+
+def test_no_pending_bets_is_a_single_outcome(rng):
+    session = make_session(rng, 3, 6, settled=True)
+    engine = ScenarioEngine(session['bettors'], session['bets'], session['total_pool'])
+    result = engine.analyse()
+    final = to_cents(settle(session['bettors'], session['bets'], session['total_pool'])['final_amount'])
+    assert result.outcomes == [(final, 1.0)]
+    assert result.worst == result.best == final
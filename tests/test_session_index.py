@@ -0,0 +1,40 @@
+import os
+
+from session_index import SessionIndex
+from session_journal import SessionJournal, write_snapshot
+
+
+def write_session(path, stake, status='Won'):
+    bet = {'id': 'a', 'name': 'a', 'description': 'd', 'odds': 3.0, 'stake': stake,
+           'potential_payout': round(stake * 3, 2), 'status': status}
+    write_snapshot({'event': 'E', 'date': '2025-09-21 23:27:54', 'bettors': [{'name': 'Kasun', 'stake': stake}],
+                    'bets': [bet], 'total_pool': stake}, path)
+
+
+def test_totals_are_summed_in_cents(tmp_path):
+    for i, stake in enumerate((0.1, 0.2)):
+        write_session(str(tmp_path / f'betting_session_{i}.json'), stake)
+    with SessionIndex(str(tmp_path / 'index.db')) as index:
+        assert index.update_directory(str(tmp_path)) == (2, 0, [])
+        row, = index.bettor_totals()
+        assert (row['sessions'], row['stake_cents'], row['final_payout_cents']) == (2, 30, 90)
+        assert [session['total_pool_cents'] for session in index.sessions()] == [10, 20]
+
+
+def test_journal_changes_are_reindexed(tmp_path):
+    path = str(tmp_path / 'betting_session_1.json')
+    write_session(path, 10.0, status='Pending')
+    with SessionIndex(str(tmp_path / 'index.db')) as index:
+        assert index.update_directory(str(tmp_path))[0] == 1
+        assert index.update_directory(str(tmp_path))[0] == 0  # Nothing changed
+
+        snapshot_stamp = os.stat(path)
+        journal = SessionJournal(path, 0)
+        journal.append({'op': 'set_status', 'ids': ['a'], 'status': 'Won'})
+        journal.close()
+        assert os.stat(path).st_mtime == snapshot_stamp.st_mtime
+
+        assert not index.is_current(path)
+        assert index.update_directory(str(tmp_path))[0] == 1
+        session, = index.sessions()
+        assert (session['pending_count'], session['total_won_cents']) == (0, 3000)
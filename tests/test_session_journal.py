@@ -0,0 +1,123 @@
+import json
+import os
+
+from session_journal import SessionJournal, journal_path, load_session_file, read_session, write_snapshot
+
+
+def bet(bet_id, status='Pending'):
+    return {'id': bet_id, 'name': bet_id, 'description': 'd', 'odds': 2.0, 'stake': 10.0,
+            'potential_payout': 20.0, 'status': status}
+
+
+def test_journal_replays_over_snapshot(tmp_path):
+    path = str(tmp_path / 'session.json')
+    write_snapshot({'event': 'E', 'bettors': [], 'bets': [], 'total_pool': 100}, path)
+    journal = SessionJournal(path)
+    journal.append({'op': 'add_bet', 'bet': bet('a')})
+    journal.append({'op': 'add_bet', 'bet': bet('b')})
+    journal.append({'op': 'set_status', 'ids': ['a'], 'status': 'Won'})
+    journal.close()
+
+    session = load_session_file(path)
+    assert [(b['id'], b['status']) for b in session['bets']] == [('a', 'Won'), ('b', 'Pending')]
+    assert session['journal_seq'] == 3
+
+
+def test_torn_last_line_is_ignored(tmp_path):
+    path = str(tmp_path / 'session.json')
+    journal = SessionJournal(path)
+    journal.append({'op': 'session', 'date': 'D', 'event': 'E'})
+    journal.append({'op': 'add_bet', 'bet': bet('a')})
+    journal.close()
+    with open(journal_path(path), 'a', encoding='utf-8') as f:
+        f.write(json.dumps({'op': 'add_bet', 'bet': bet('b'), 'seq': 3})[:25])  # Died mid-write
+
+    session = load_session_file(path)
+    assert [b['id'] for b in session['bets']] == ['a']
+    assert session['journal_seq'] == 2
+
+
+def test_records_already_in_snapshot_are_skipped(tmp_path):
+    path = str(tmp_path / 'session.json')
+    journal = SessionJournal(path)
+    journal.append({'op': 'add_bet', 'bet': bet('a')})
+    session = load_session_file(path)
+    # Crash after the snapshot was written but before the journal was emptied
+    session['journal_seq'] = journal.seq
+    write_snapshot(session, path)
+    journal.append({'op': 'add_bet', 'bet': bet('b')})
+    journal.close()
+
+    assert [b['id'] for b in load_session_file(path)['bets']] == ['a', 'b']
+
+
+def test_compact_empties_the_journal(tmp_path):
+    path = str(tmp_path / 'session.json')
+    journal = SessionJournal(path)
+    session = {'bettors': [], 'bets': [bet('a')], 'total_pool': 10}
+    journal.append({'op': 'add_bet', 'bet': bet('a')})
+    journal.compact(session)
+    journal.close()
+    assert os.path.getsize(journal_path(path)) == 0
+    assert load_session_file(path)['bets'] == [bet('a')]
+
+
+def test_new_journal_replaces_a_stale_one(tmp_path):
+    path = str(tmp_path / 'session.json')
+    old = SessionJournal(path)
+    old.append({'op': 'add_bet', 'bet': bet('stale')})
+    old.close()
+
+    # Save As over the same path: a fresh snapshot and a journal starting at seq 0
+    write_snapshot({'bettors': [], 'bets': [], 'total_pool': 0, 'journal_seq': 0}, path)
+    SessionJournal(path).close()
+    assert load_session_file(path)['bets'] == []
+
+
+def test_reopened_journal_keeps_its_records(tmp_path):
+    path = str(tmp_path / 'session.json')
+    journal = SessionJournal(path)
+    journal.append({'op': 'add_bet', 'bet': bet('a')})
+    journal.close()
+
+    session = load_session_file(path)
+    journal = SessionJournal(path, session['journal_seq'])
+    journal.append({'op': 'add_bet', 'bet': bet('b')})
+    journal.close()
+    assert [b['id'] for b in load_session_file(path)['bets']] == ['a', 'b']
+
+
+def test_reopening_after_a_torn_line_drops_the_fragment(tmp_path):
+    path = str(tmp_path / 'session.json')
+    journal = SessionJournal(path)
+    journal.append({'op': 'add_bet', 'bet': bet('a')})
+    journal.close()
+    with open(journal_path(path), 'a', encoding='utf-8') as f:
+        f.write(json.dumps({'op': 'add_bet', 'bet': bet('torn'), 'seq': 2})[:25])  # Died mid-write
+
+    session = load_session_file(path)
+    journal = SessionJournal(path, session['journal_seq'])
+    journal.append({'op': 'add_bet', 'bet': bet('b')})
+    journal.append({'op': 'set_status', 'ids': ['a'], 'status': 'Won'})
+    journal.close()
+
+    session = load_session_file(path)
+    assert [(b['id'], b['status']) for b in session['bets']] == [('a', 'Won'), ('b', 'Pending')]
+    assert session['journal_seq'] == 3
+
+
+def test_bets_saved_without_ids_keep_them_across_a_crash(tmp_path):
+    path = str(tmp_path / 'session.json')
+    legacy = [{key: value for key, value in bet('x').items() if key != 'id'} for _ in range(3)]
+    write_snapshot({'event': 'E', 'bettors': [], 'bets': legacy, 'total_pool': 100}, path)
+
+    session = read_session(path)[0]
+    ids = [b['id'] for b in session['bets']]
+    assert len(set(ids)) == 3
+    journal = SessionJournal(path, session.get('journal_seq', 0))
+    journal.append({'op': 'set_status', 'ids': [ids[1]], 'status': 'Won'})
+    journal.append({'op': 'delete_bets', 'ids': [ids[2]]})
+    journal.close()  # No compaction: the snapshot still has no IDs
+
+    session = load_session_file(path)
+    assert [(b['id'], b['status']) for b in session['bets']] == [(ids[0], 'Pending'), (ids[1], 'Won')]
@@ -0,0 +1,60 @@
+import pytest
+
+from conftest import STATUSES, make_bet
+from session_model import SessionTotals, apply_tracked_op, index_bets, remove_bets
+
+
+def test_running_totals_match_recount(rng):
+    bets = []
+    totals = SessionTotals()
+    for _ in range(3000):
+        action = rng.random()
+        if action < 0.5 or not bets:
+            bet = make_bet(rng)
+            bets.append(bet)
+            totals.add_bet(bet)
+        elif action < 0.7:
+            bet = bets.pop(rng.randrange(len(bets)))
+            totals.remove_bet(bet)
+        else:
+            totals.set_status(rng.choice(bets), rng.choice(STATUSES))
+        totals.verify(bets)
+
+    recount = SessionTotals(bets)
+    for field in SessionTotals.FIELDS:
+        assert getattr(totals, field) == getattr(recount, field)
+
+
+def test_verify_reports_drift(rng):
+    bets = [make_bet(rng, status='Won') for _ in range(5)]
+    totals = SessionTotals(bets)
+    bets[0]['status'] = 'Lost'  # Changed behind the totals' back
+    with pytest.raises(AssertionError, match='won_payout_cents'):
+        totals.verify(bets)
+
+
+def test_set_status_to_same_status_is_a_no_op(rng):
+    bet = make_bet(rng, status='Pending')
+    totals = SessionTotals([bet])
+    totals.set_status(bet, 'Pending')
+    assert totals.pending_count == 1
+
+
+def test_remove_bets_matches_by_identity(rng):
+    bets = [make_bet(rng) for _ in range(50)]
+    twin = dict(bets[10])  # Equal to bets[10] but not the same bet
+    removed = [bets[10], bets[49], bets[0]]
+    expected = [bet for bet in bets if bet not in removed]
+    remove_bets(bets, removed + [twin])
+    assert bets == expected
+
+
+def test_delete_bets_op_keeps_totals(rng):
+    session = {'bets': [make_bet(rng) for _ in range(20)]}
+    bet_index = index_bets(session['bets'])
+    totals = SessionTotals(session['bets'])
+    ids = [session['bets'][3]['id'], session['bets'][7]['id']]
+    apply_tracked_op(session, {'op': 'delete_bets', 'ids': ids + ids[:1] + ['missing']}, bet_index, totals)
+    assert len(session['bets']) == 18
+    assert not set(ids) & set(bet_index)
+    totals.verify(session['bets'])
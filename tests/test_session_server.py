@@ -0,0 +1,93 @@
+import asyncio
+import json
+
+from conftest import make_session
+from session_model import SessionTotals, apply_tracked_op, index_bets
+from session_server import SessionServer, encode
+
+
+def exchange(server, lines):
+    """Send raw lines to server.handle and return the messages it wrote back"""
+
+    async def run():
+        listener = await asyncio.start_server(server.handle, '127.0.0.1', 0)
+        port = listener.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        for line in lines:
+            writer.write(line)
+        await writer.drain()
+        writer.write_eof()
+        replies = [json.loads(line) async for line in reader]
+        writer.close()
+        listener.close()
+        await listener.wait_closed()
+        return replies
+
+    return asyncio.run(run())
+
+
+def test_malformed_messages_are_rejected_without_dropping_the_connection(rng):
+    server = SessionServer(make_session(rng, 3, 0))
+    replies = exchange(server, [
+        encode({'type': 'hello', 'client': 'a'}),
+        b'[1, 2]\n',
+        b'{"type": "op", "id": 9, \n',
+        encode({'type': 'op', 'id': 1}),
+        encode({'type': 'op', 'id': 2, 'op': 'add_bet'}),
+        encode({'type': 'op', 'id': 3, 'op': {'op': 'add_bet', 'bet': {'id': 'x'}}}),
+        encode({'type': 'nonsense', 'id': 4}),
+        encode({'type': 'op', 'id': 5, 'op': {'op': 'set_status', 'ids': [], 'status': 'Won'}}),
+    ])
+    kinds = [reply['type'] for reply in replies]
+    assert kinds == ['snapshot', 'reject', 'reject', 'reject', 'snapshot', 'reject', 'snapshot',
+                     'reject', 'snapshot', 'reject', 'op']
+    assert replies[-1]['id'] == 5
+    assert server.version == 1
+
+
+def test_ops_with_wrong_field_types_are_refused(rng):
+    server = SessionServer(make_session(rng, 3, 2))
+    bet = server.session['bets'][0]
+    good = dict(bet, id='new', stake=0.01)
+    for op in (
+        {'op': 'add_bet', 'bet': dict(good, name=None)},
+        {'op': 'add_bet', 'bet': dict(good, description=['Podium'])},
+        {'op': 'add_bet', 'bet': dict(good, odds='2.5')},
+        {'op': 'add_bets', 'bets': dict(good)},
+        {'op': 'set_status', 'ids': bet['id'], 'status': 'Won'},
+        {'op': 'delete_bets', 'ids': [[bet['id']]]},
+        {'op': 'reprice', 'prices': [[bet['id'], 'evens', 2.0]]},
+    ):
+        version, reason = server.submit(op)
+        assert version is None and reason, op
+    assert server.session['bets'][0] is bet and len(server.session['bets']) == 2
+    assert server.submit({'op': 'add_bet', 'bet': good}) == (1, None)
+
+
+def test_stale_reprice_of_a_settled_bet_is_refused(rng):
+    session = make_session(rng, 3, 0)
+    bet = {'id': 'b1', 'name': 'n', 'description': 'd', 'odds': 2.0, 'stake': 50.0,
+           'potential_payout': 100.0, 'status': 'Pending'}
+    server = SessionServer(session)
+    assert server.submit({'op': 'add_bet', 'bet': bet})[1] is None
+    assert server.submit({'op': 'set_status', 'ids': ['b1'], 'status': 'Won'})[1] is None
+
+    # Another operator priced the bet before seeing the result
+    version, reason = server.submit({'op': 'reprice', 'prices': [['b1', 9.0, 450.0]]})
+    assert version is None and reason
+    assert (bet['odds'], bet['potential_payout']) == (2.0, 100.0)
+    assert server.totals.won_payout_cents == 10000
+
+
+def test_reprice_skips_settled_bets_when_applied(rng):
+    session = make_session(rng, 3, 0)
+    won = {'id': 'w', 'name': 'n', 'description': 'd', 'odds': 2.0, 'stake': 1.0,
+           'potential_payout': 2.0, 'status': 'Won'}
+    pending = dict(won, id='p', status='Pending')
+    session['bets'] = [won, pending]
+    bet_index = index_bets(session['bets'])
+    totals = SessionTotals(session['bets'])
+    apply_tracked_op(session, {'op': 'reprice', 'prices': [['w', 5.0, 5.0], ['p', 3.0, 3.0]]},
+                     bet_index, totals)
+    assert won['potential_payout'] == 2.0 and pending['potential_payout'] == 3.0
+    totals.verify(session['bets'])
@@ -0,0 +1,63 @@
+import json
+
+import pytest
+
+from session_stream import iter_session
+
+
+def write_session(path, session, **dump_args):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(session, f, **dump_args)
+    return str(path)
+
+
+def read_back(path, chunk_size):
+    fields = {}
+    bets = []
+    for kind, key, value in iter_session(path, chunk_size=chunk_size):
+        if kind == 'field':
+            fields[key] = value
+        else:
+            bets.append(value)
+    return fields, bets
+
+
+def sample_session():
+    return {
+        'date': '2025-09-21 23:27:54',
+        'event': 'Grand Prix — Baku',  # Multi-byte characters that chunks can split
+        'bettors': [{'name': 'Ünal', 'stake': 1500.5}, {'name': '佐藤', 'stake': 12}],
+        'bets': [{'id': f"b{i}", 'name': f"Bet {i} ✓", 'odds': 1.5 + i, 'stake': 10 ** i,
+                  'potential_payout': 123456789.25, 'status': 'Pending'} for i in range(12)],
+        'total_pool': 1512.5,
+        'journal_seq': 1234567,
+    }
+
+
+@pytest.mark.parametrize('indent', [None, 2])
+def test_every_chunk_boundary(tmp_path, indent):
+    session = sample_session()
+    path = write_session(tmp_path / 'session.json', session, indent=indent, ensure_ascii=False)
+    size = len(open(path, 'rb').read())
+    for chunk_size in list(range(1, 40)) + [size - 1, size, size + 1]:
+        fields, bets = read_back(path, chunk_size)
+        assert bets == session['bets'], chunk_size
+        assert fields == {key: value for key, value in session.items() if key != 'bets'}, chunk_size
+
+
+def test_number_at_end_of_chunk_is_not_cut_short(tmp_path):
+    path = write_session(tmp_path / 'session.json', {'bets': [], 'total_pool': 123456789012})
+    for chunk_size in range(1, 50):
+        assert read_back(path, chunk_size)[0]['total_pool'] == 123456789012
+
+
+def test_empty_session_and_empty_bets(tmp_path):
+    assert read_back(write_session(tmp_path / 'a.json', {}), 3) == ({}, [])
+    assert read_back(write_session(tmp_path / 'b.json', {'bets': []}), 3) == ({}, [])
+
+
+def test_malformed_file_raises(tmp_path):
+    path = tmp_path / 'bad.json'
+    path.write_text('{"bets": [{"id": 1} {"id": 2}]}')
+    with pytest.raises(json.JSONDecodeError):
+        read_back(str(path), 4)
@@ -0,0 +1,54 @@
+import pytest
+
+from conftest import make_session
+from money import to_cents
+from settlement import SessionArrays, settle, settle_session
+
+
+def test_worked_example():
+    bettors = [{'name': 'A', 'stake': 600.0}, {'name': 'B', 'stake': 400.0}]
+    bets = [
+        {'name': 'x', 'description': 'd', 'odds': 2.5, 'stake': 200.0, 'potential_payout': 500.0, 'status': 'Won'},
+        {'name': 'y', 'description': 'd', 'odds': 3.0, 'stake': 300.0, 'potential_payout': 900.0, 'status': 'Lost'},
+        {'name': 'z', 'description': 'd', 'odds': 1.5, 'stake': 100.0, 'potential_payout': 150.0, 'status': 'Void'},
+    ]
+    result = settle(bettors, bets, 1000.0)
+    assert result['total_stake'] == 600.0
+    assert result['total_profit'] == 0.0
+    assert result['leftover_money'] == 400.0
+    assert result['final_amount'] == 1000.0
+    assert [payout['final_payout'] for payout in result['payouts']] == [600.0, 400.0]
+    assert [payout['share_of_leftover'] for payout in result['payouts']] == [240.0, 160.0]
+
+
+def test_payouts_add_up_exactly(rng):
+    for _ in range(200):
+        session = make_session(rng, rng.randint(1, 12), rng.randint(0, 40))
+        result = settle_session(session)
+        payouts = result['payouts']
+        assert sum(to_cents(payout['final_payout']) for payout in payouts) == to_cents(result['final_amount'])
+        assert sum(to_cents(payout['share_of_leftover']) for payout in payouts) == to_cents(result['leftover_money'])
+        for payout in payouts:
+            assert to_cents(payout['share_of_winnings']) + to_cents(payout['share_of_leftover']) == \
+                to_cents(payout['final_payout'])
+
+
+def test_empty_pool():
+    result = settle([{'name': 'A', 'stake': 0}], [], 0)
+    assert result['payouts'][0]['final_payout'] == 0
+    assert result['payouts'][0]['percentage'] == 0
+
+
+def test_vectorized_matches_scalar(rng):
+    pytest.importorskip('numpy')
+    for _ in range(100):
+        session = make_session(rng, rng.randint(1, 25), rng.randint(0, 200))
+        assert settle_session(session, vectorized=True) == settle_session(session)
+
+
+def test_settlement_arrays_keep_cents(rng):
+    pytest.importorskip('numpy')
+    session = make_session(rng, 50, 500)
+    settled = SessionArrays(session['bettors'], session['bets'], session['total_pool']).settle()
+    assert int(settled.final_payout.sum()) == settled.final_amount
+    assert int(settled.share_of_leftover.sum()) == settled.leftover_money
@@ -0,0 +1,57 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules only needed once a dialog opens, a file is parsed or an optional fast path runs
+DEFERRED_MODULES = (
+    'numpy', 'pyarrow', 'tkinter.messagebox', 'tkinter.simpledialog', 'tkinter.filedialog',
+    'sqlite3', 'session_index', 'ledger', 'multiprocessing', 'argparse', 'asyncio',
+    'csv_import', 'export', 'odds_feed', 'session_server', 'scenarios',
+)
+
+IMPORT_APP = """
+import importlib.util, json, sys
+spec = importlib.util.spec_from_file_location('bet_splitter_app', sys.argv[1])
+app = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(app)
+"""
+
+DRAW_MAIN_MENU = IMPORT_APP + """
+import tkinter as tk
+try:
+    root = tk.Tk()
+except tk.TclError:
+    print('null')
+    sys.exit()
+app.BetSplitterApp(root)
+root.update()
+"""
+
+PRINT_MODULES = """
+print(json.dumps(sorted(sys.modules)))
+"""
+
+
+def loaded_modules(code):
+    output = subprocess.run([sys.executable, '-c', code + PRINT_MODULES, os.path.join(ROOT, 'Bet-Splitter.py')],
+                            cwd=ROOT, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def test_importing_the_app_defers_heavy_modules():
+    pytest.importorskip('tkinter')
+    loaded = set(loaded_modules(IMPORT_APP))
+    assert not loaded & set(DEFERRED_MODULES)
+
+
+def test_drawing_the_main_menu_defers_heavy_modules():
+    pytest.importorskip('tkinter')
+    loaded = loaded_modules(DRAW_MAIN_MENU)
+    if loaded is None:
+        pytest.skip("No display available")
+    assert not set(loaded) & set(DEFERRED_MODULES)
@@ -0,0 +1,56 @@
+"""Keyed row model for ttk.Treeview widgets.
+
+Each row keeps a stable iid, so a change only inserts, updates or removes the
+rows it affects. Selection, focus and scroll position survive updates.
+"""
+
+
+class KeyedTreeRows:
+    """Keep a Treeview's rows in sync with keyed values, touching only changed rows"""
+
+    def __init__(self, tree):
+        self.tree = tree
+        self.values = {}  # iid -> values tuple last written to the tree
+
+    def __contains__(self, iid):
+        return iid in self.values
+
+    def upsert(self, iid, values, index='end'):
+        """Insert the row if it is new, otherwise update it only if its values changed"""
+        values = tuple(values)
+        old_values = self.values.get(iid)
+        if old_values is None:
+            self.tree.insert('', index, iid=iid, values=values)
+        elif old_values != values:
+            self.tree.item(iid, values=values)
+        self.values[iid] = values
+
+    def remove(self, iid):
+        """Remove a row if it is present"""
+        if self.values.pop(iid, None) is not None:
+            self.tree.delete(iid)
+
+    def sync(self, rows):
+        """Make the tree show exactly rows, an iterable of (iid, values) in display order"""
+        order = []
+        for iid, values in rows:
+            self.upsert(iid, values)
+            order.append(iid)
+
+        wanted = set(order)
+        stale = [iid for iid in self.values if iid not in wanted]
+        if stale:
+            self.tree.delete(*stale)
+            for iid in stale:
+                del self.values[iid]
+
+        # Only reorder when rows are out of place
+        if list(self.tree.get_children()) != order:
+            for index, iid in enumerate(order):
+                self.tree.move(iid, '', index)
+
+    def clear(self):
+        """Remove every row"""
+        if self.values:
+            self.tree.delete(*self.values)
+            self.values.clear()